@@ -1,10 +1,9 @@
 import streamlit as st
+import pandas as pd
 from core import (
     dashboard_summary,
-    utils,
     sidebar,
     data_variables,
-    dashboard_plot,
 )
 
 # ==========================================================================================================    
@@ -27,12 +26,12 @@ def dashboard() -> None:
 # ==========================================================================================================    
     # SIDEBAR
 # ==========================================================================================================    
-    df = sidebar.render_sidebar()
-    if df is None:
+    dataset_entry = sidebar.render_dataset_selector()
+    if dataset_entry is None:
         st.warning("No dataset selected. Please select one from the sidebar.")
         st.stop()
-    # Filter the dataset
-    if set(data_variables.TRAFFIC_VIOLATION_COLUMNS).issubset(set(df.columns)) is False:
+
+    if set(data_variables.TRAFFIC_VIOLATION_COLUMNS).issubset(set(dataset_entry['columns'] or [])) is False:
         st.warning("Current Dataset is not suitable for this dashboard.")
         st.info(
                 f"""
@@ -43,25 +42,38 @@ def dashboard() -> None:
             )
         st.warning("Please Select a valid traffic violation dataset from the sidebar.")
         st.stop()
-    elif df.shape[0] == 0:
+    elif dataset_entry['row_count'] == 0:
         st.warning("The selected dataset is empty. Please upload a valid traffic violation dataset.")
         st.stop()
     
     # ==========================================================================================================    
     else:
-        # Filter or clean the dataset
-        df = utils.filter_the_dataset(df)
+        # Years stored in the dataset, from its partition file names
+        dataset_years = sidebar.get_dataset_years(dataset_entry)
+        if not dataset_years:
+            st.warning("The selected dataset has no valid dates. Please upload a valid traffic violation dataset.")
+            st.stop()
+
+        # Every section reads the date range it shows from the daily aggregate cube of the dataset (see core/data_cube.py),
+        # built or loaded here once
+        with st.spinner("Aggregating the dataset ..."):
+            sidebar.load_selected_cube(dataset_entry)
+
+        # The four year sliders default to the same range, they share its memoized selection (see core/filter_cache.py)
+        def query_years(years):
+            return sidebar.query_selected_cube(dataset_entry, f"{years[0]}-01-01", f"{years[1]}-12-31")
 
 # ==========================================================================================================    
     # Summary Calculations for Last N Days
 # ==========================================================================================================    
         no_of_days_for_summary  = st.expander("Days Filter", expanded=False).slider("Select Number of Days for Summary Calculations", min_value=7, max_value=365, value=30, step=1, key="days_slider")
-        df_last_n_days = utils.get_last_n_days_data(df, no_of_days_for_summary)
+        today = pd.Timestamp.now().normalize()
+        cube_last_n_days = sidebar.query_selected_cube(dataset_entry, today - pd.Timedelta(days=no_of_days_for_summary), today)
         
         col1, col2 = st.columns(2)
         with col1:
             st.info(f"### Total Violations (Last {no_of_days_for_summary} Days)")
-            summary = dashboard_summary.get_violations_summary_of_last_n_days(df_last_n_days)
+            summary = dashboard_summary.get_violations_summary_of_last_n_days(cube_last_n_days)
             
             # Display Charts
             # with st.expander("View Violation Types Distribution Chart"):
@@ -76,13 +88,13 @@ def dashboard() -> None:
             with sub_col2:
                 st.metric(label="Violations/Day", value=f"{int(summary.get('total_no_of_violations')/no_of_days_for_summary)}")
             with sub_col3:
-                st.metric(label="Violations/VehicleType", value=f"{int(summary.get('total_no_of_violations')/df_last_n_days['Vehicle_Type'].nunique())}")
+                st.metric(label="Violations/VehicleType", value=f"{int(summary.get('total_no_of_violations')/summary.get('total_vehicle_types'))}")
             st.markdown('---')
             
     # ==========================================================================================================
             # --- License Insights ---
             st.info(f"### License Insights (Last {no_of_days_for_summary} Days)")
-            license_insights = dashboard_summary.get_license_insights(df_last_n_days)
+            license_insights = dashboard_summary.get_license_insights(cube_last_n_days)
             
             with st.container():
                 st.markdown("<h3 style='text-align: center;'>License Validity</h3>", unsafe_allow_html=True)
@@ -99,7 +111,7 @@ def dashboard() -> None:
     # ==========================================================================================================
         with col2:
             st.info(f"### Total Fines (Last {no_of_days_for_summary} Days)")
-            fine_summary = dashboard_summary.get_total_fines_generated(df_last_n_days)
+            fine_summary = dashboard_summary.get_total_fines_generated(cube_last_n_days)
             
             # Display Charts
             # with st.expander("View Fines Distribution Chart"):
@@ -116,7 +128,7 @@ def dashboard() -> None:
 
     # ==========================================================================================================
             st.info(f"### Location Insights (Last {no_of_days_for_summary} Days)")
-            location_based_summary = dashboard_summary.get_violations_by_location(df_last_n_days)
+            location_based_summary = dashboard_summary.get_violations_by_location(cube_last_n_days)
             # with st.expander("View Violations by Location Chart"):
             with st.container():    
                 st.markdown("<h3 style='text-align: center;'>Violations by Location</h3>", unsafe_allow_html=True)
@@ -140,8 +152,8 @@ def dashboard() -> None:
     # Additional Dashboard Metrics Overview
 # ==========================================================================================================  
         # Year Filter for Global Overview
-        min_year = int(df['Date'].dt.year.min())
-        max_year = int(df['Date'].dt.year.max())
+        min_year = dataset_years[0]
+        max_year = dataset_years[-1]
 # ==========================================================================================================  
     # GLOBAL DATA OVERVIEW
 # ==========================================================================================================  
@@ -160,11 +172,10 @@ def dashboard() -> None:
              )
         
         # Filter Data
-        mask_global = (df['Date'].dt.year >= selected_years_global[0]) & (df['Date'].dt.year <= selected_years_global[1])
-        df_global = df[mask_global]
+        cube_global = query_years(selected_years_global)
         
         with st.expander(f"📊 Executive Summary Report ({selected_years_global[0]} - {selected_years_global[1]})", expanded=True):
-             global_metrics = dashboard_summary.get_global_overview_metrics(df_global)
+             global_metrics = dashboard_summary.get_global_overview_metrics(cube_global)
              
              # Row 1
              c1, c2, c3, c4 = st.columns(4, border=True)
@@ -202,11 +213,10 @@ def dashboard() -> None:
              )
              
         # Filter Data
-        mask_behavior = (df['Date'].dt.year >= selected_years_behavior[0]) & (df['Date'].dt.year <= selected_years_behavior[1])
-        df_behavior = df[mask_behavior]
+        cube_behavior = query_years(selected_years_behavior)
 
         with st.expander(f"Advanced Risk Indicators ({selected_years_behavior[0]} - {selected_years_behavior[1]})", expanded=True):
-             behavior_metrics = dashboard_summary.get_behavioral_analysis(df_behavior)
+             behavior_metrics = dashboard_summary.get_behavioral_analysis(cube_behavior)
              
              over_speeding_count, over_speeding_pct = behavior_metrics['over_speeding_stats']
              court_count, court_pct = behavior_metrics['court_appearance_stats']
@@ -282,10 +292,9 @@ def dashboard() -> None:
                  )
             
             # Filter
-            mask_vehicle = (df['Date'].dt.year >= years_vehicle[0]) & (df['Date'].dt.year <= years_vehicle[1])
-            df_vehicle = df[mask_vehicle]
+            cube_vehicle = query_years(years_vehicle)
             
-            st.pyplot(dashboard_plot.plot_vehicle_type_vs_violation_type(df_vehicle), width='stretch')
+            st.pyplot(dashboard_summary.get_vehicle_violation_chart(cube_vehicle).get('fig'), width='stretch')
             
         st.markdown('---')
         
@@ -304,11 +313,11 @@ def dashboard() -> None:
                  )
             
             # Filter
-            mask_heatmap = (df['Date'].dt.year >= years_heatmap[0]) & (df['Date'].dt.year <= years_heatmap[1])
-            df_heatmap = df[mask_heatmap]
+            cube_heatmap = query_years(years_heatmap)
 
-            st.pyplot(dashboard_plot.plot_severity_heatmap_by_location(df_heatmap), width='stretch')
+            st.pyplot(dashboard_summary.get_severity_heatmap(cube_heatmap).get('fig'), width='stretch')
         st.markdown('---')        
+        sidebar.render_memory_report()
     # ------------------------------
     # INFO SECTION
     # ------------------------------
@@ -0,0 +1,5 @@
+import pandas as pd
+
+# Copy-on-Write lets pages and helpers derive columns and filters from the shared, cached
+# dataset without defensive copies: any write goes to a new buffer, never to the shared one.
+pd.set_option("mode.copy_on_write", True)
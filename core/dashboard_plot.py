@@ -46,12 +46,14 @@ apply_plot_style()
 
 # =============================== Dashboard Overview Plots =============================================
 # ----- Amit's Plots -----
-def plot_violation_type_percentage_pie(df):
+def plot_violation_type_percentage_pie(violation_counts):
     """
     Plots the percentage of traffic violation types as a pie chart.
+
+    Args:
+        violation_counts (pd.Series): Number of violations per violation type, most frequent first.
     """
     apply_plot_style()
-    violation_counts = df['Violation_Type'].value_counts()
     
     fig, ax = plt.subplots(figsize=FIG_SIZE)
     wedges, texts, autotexts = ax.pie(
@@ -181,13 +183,15 @@ def plot_violations_by_location(location_based_violations):
     return fig
 # =================================================================================
 # ---- Anshu's Plots ----
-def plot_license_validity_by_gender(df):
+def plot_license_validity_by_gender(validity_gender):
 
     """
     Anshu: License Validity by Gender.
+
+    Args:
+        validity_gender (pd.DataFrame): Number of licenses per validity (rows) and driver gender (columns).
     """
     apply_plot_style()
-    validity_gender = df.groupby(['License_Validity', 'Driver_Gender']).size().unstack(fill_value=0)
     
     fig, ax = plt.subplots(figsize=FIG_SIZE)
     validity_gender.plot(
@@ -236,16 +240,25 @@ def plot_gender_distribution(gender_distribution):
     return fig
 
 # 2. Vehicle Type vs Violation Type (Monika's Contribution)
-def plot_vehicle_type_vs_violation_type(df):
+def plot_vehicle_type_vs_violation_type(vehicle_violations):
     """
     Monika: Vehicle type vs Violation Type.
+
+    Args:
+        vehicle_violations (pd.Series): Number of violations indexed by (Violation_Type, Vehicle_Type).
     """
     apply_plot_style()
+    # Only the observed violation and vehicle types are drawn
+    observed = vehicle_violations[vehicle_violations > 0]
+    counts = vehicle_violations.rename('Count').reset_index()
     fig, ax = plt.subplots(figsize=FIG_SIZE)
-    sns.countplot(
-        data=df, 
+    sns.barplot(
+        data=counts, 
         x='Violation_Type',
+        y='Count',
         hue='Vehicle_Type',
+        order=observed.index.get_level_values('Violation_Type').unique().tolist(),
+        hue_order=observed.index.get_level_values('Vehicle_Type').unique().tolist(),
         ax=ax,
         palette='Set1',
         edgecolor='black'
@@ -259,40 +272,14 @@ def plot_vehicle_type_vs_violation_type(df):
     return fig
 
 # 3. Severity Heatmap by Location (Mrunalini's Contribution)
-def plot_severity_heatmap_by_location(df):
+def plot_severity_heatmap_by_location(location_heatmap):
     """
     Mrunalini: Average Severity Score by Location and Violation Type.
+
+    Args:
+        location_heatmap (pd.DataFrame): Average severity score per location (rows) and violation type (columns).
     """
     apply_plot_style()
-    # Helper to calculate severity (Internal logic kept same)
-    def calc_severity_score(row):
-        severity = 0
-        if pd.notnull(row.get('Fine_Amount')): severity += row['Fine_Amount'] / 1000
-        if pd.notnull(row.get('Penalty_Points')): severity += row['Penalty_Points'] 
-        if pd.notnull(row.get('Recorded_Speed')) and pd.notnull(row.get('Speed_Limit')):
-            if row['Recorded_Speed'] > row['Speed_Limit']:
-                severity += (row['Recorded_Speed'] - row['Speed_Limit']) / 10
-        if pd.notnull(row.get('Alcohol_Level')): severity += row['Alcohol_Level'] * 10
-        if row.get('Helmet_Worn') == 'No': severity += 10
-        if row.get('Seatbelt_Worn') == 'No': severity += 10
-        if row.get('Traffic_Light_Status') == 'Red': severity += 15
-        if pd.notnull(row.get('Previous_Violations')): severity += row['Previous_Violations'] * 1.5
-        return severity
-
-    # We need a copy to avoid SettingWithCopyWarning on the original df if modifying
-    # But for dashboard summary df is passed, better to just apply
-    # Optimizing: Calculate on the fly might be slow for full df, but for dashboard summary (last n days) should be fine.
-    
-    # We'll use a local copy to be safe
-    local_df = df.copy()
-    local_df['Violation_Severity_Score'] = local_df.apply(calc_severity_score, axis=1)
-    
-    location_heatmap = local_df.pivot_table(
-        values='Violation_Severity_Score',
-        index='Location',
-        columns='Violation_Type',
-        aggfunc='mean'
-    )
 
     fig, ax = plt.subplots(figsize=FIG_SIZE)
     sns.heatmap(
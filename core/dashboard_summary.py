@@ -1,29 +1,62 @@
 import pandas as pd
 import core.dashboard_plot as dashboard_plot
+from core import metric_kernel
+from core.data_cube import CubeSlice
+from core.metric_kernel import MetricSpec
+
+# The dashboard summaries are computed from a date range of the dataset cube (see core/data_cube.py),
+# never from the rows themselves.
+
+# Metrics of the Executive Summary Report (see core/metric_kernel.py)
+GLOBAL_OVERVIEW_METRICS = [
+    MetricSpec('most_common_violation', 'mode', 'Violation_Type', "N/A"),
+    MetricSpec('top_location', 'mode', 'Location', "N/A"),
+    MetricSpec('top_agency', 'mode', 'Issuing_Agency', "N/A"),
+    MetricSpec('common_payment', 'mode', 'Payment_Method', "N/A"),
+    MetricSpec('avg_fine', 'mean', 'Fine_Amount', 0),
+    MetricSpec('max_fine', 'max', 'Fine_Amount', 0),
+    MetricSpec('min_fine', 'min', 'Fine_Amount', 0),
+]
+
+def _mode(cube_slice: CubeSlice, cuboid: str, dim: str):
+    """
+    Returns the most frequent value of a dimension (the first one in category order on ties), None without rows.
+    """
+    top = cube_slice.top_k(cuboid, dim, 1)
+    return top.index[0] if len(top) else None
 
 # =================================================================================
-def get_violations_summary_of_last_n_days(df_last_n_days: pd.DataFrame) -> dict:
+def get_violations_summary_of_last_n_days(cube_slice: CubeSlice) -> dict:
     # 1. calculate the no of violations in last n days
-    total_no_of_violations = df_last_n_days.shape[0]
+    total_no_of_violations = cube_slice.total('count')
 
     # 2. Generate a figure of pie chart for violation types
-    fig = dashboard_plot.plot_violation_type_percentage_pie(df_last_n_days)
+    violation_counts = cube_slice.top_k('violation_fines', 'Violation_Type')
+    fig = dashboard_plot.plot_violation_type_percentage_pie(violation_counts)
     
     return {
         'total_no_of_violations': total_no_of_violations,
+        # Number of vehicle types involved in the violations
+        'total_vehicle_types': int((cube_slice.series('vehicle_violations', ['Vehicle_Type']) > 0).sum()),
         'fig': fig
     }
 
 # =================================================================================
-def get_total_fines_generated(df_last_n_days: pd.DataFrame) -> dict:
+def get_total_fines_generated(cube_slice: CubeSlice) -> dict:
     # 1. calculate total fines in last n days
-    total_fines = df_last_n_days['Fine_Amount'].sum()
-    avg_fine_per_violation = total_fines / df_last_n_days.shape[0] if df_last_n_days.shape[0] > 0 else 0
+    total_fines = cube_slice.total('fine')
+    if float(total_fines).is_integer():
+        total_fines = int(total_fines)
+    total_violations = cube_slice.total('count')
+    avg_fine_per_violation = total_fines / total_violations if total_violations > 0 else 0
     # ==============================================================================
     # 2. Prepare data for fines based on violation type
-    df_last_n_days['Fine_Amount'] = pd.to_numeric(df_last_n_days['Fine_Amount'], errors='coerce').fillna(0)
-    df_last_n_days['Fine_Paid'] = df_last_n_days['Fine_Paid'].astype(str).str.upper().str.strip()
-    summary = (df_last_n_days.groupby(['Violation_Type', 'Fine_Paid'])['Fine_Amount'].sum().unstack(fill_value=0))
+    fines = cube_slice.series('violation_fines', measure='fine', dropna=False)
+    counts = cube_slice.series('violation_fines', dropna=False)
+    # Only the observed groups with a violation type, like a groupby(observed=True)
+    fines = fines[(counts > 0).to_numpy() & fines.index.get_level_values('Violation_Type').notna()]
+    fine_paid = fines.index.get_level_values('Fine_Paid').astype(str).str.upper().str.strip()
+    summary = fines.groupby([fines.index.get_level_values('Violation_Type'), fine_paid], observed=True).sum().unstack(fill_value=0)
     summary = summary.rename(columns={'YES': 'Paid', 'NO': 'Unpaid'})
     
     # 3. Generate a figure of fines based on violation type
@@ -36,9 +69,9 @@ def get_total_fines_generated(df_last_n_days: pd.DataFrame) -> dict:
     }
 
 # =================================================================================
-def get_violations_by_location(df_last_n_days: pd.DataFrame) -> dict:
+def get_violations_by_location(cube_slice: CubeSlice) -> dict:
     # 1. No Of Violations for the location
-    location_based_violations = df_last_n_days['Location'].value_counts().reset_index()
+    location_based_violations = cube_slice.top_k('location_severity', 'Location').reset_index()
     location_based_violations.columns = ['Location', 'No of Violations']
 
     # 2. Total No Of Violations
@@ -66,28 +99,29 @@ def get_violations_by_location(df_last_n_days: pd.DataFrame) -> dict:
     }
 
 # =================================================================================
-def get_license_insights(df_last_n_days: pd.DataFrame) -> dict:
+def get_license_insights(cube_slice: CubeSlice) -> dict:
     """
     Calculates insights related to License validity and type.
     """
-    if df_last_n_days.empty:
+    total_licenses = cube_slice.total('count')
+    if total_licenses == 0:
         return {}
         
     # 1. Top License Type
-    if 'License_Type' in df_last_n_days.columns:
-        most_common_license_type = df_last_n_days['License_Type'].mode()[0]
-    else:
+    most_common_license_type = _mode(cube_slice, 'license_types', 'License_Type')
+    if most_common_license_type is None:
         most_common_license_type = "N/A"
         
     # 2. Percentage of License Validity Expired
-    expired_percentage = 0.0
-    if 'License_Validity' in df_last_n_days.columns:
-        total_licenses = len(df_last_n_days)
-        expired_count = df_last_n_days[df_last_n_days['License_Validity'] == 'Expired'].shape[0]
-        expired_percentage = (expired_count / total_licenses) * 100 if total_licenses > 0 else 0
+    validity_counts = cube_slice.series('license_validity', ['License_Validity'])
+    expired_count = validity_counts.get('Expired', 0)
+    expired_percentage = (expired_count / total_licenses) * 100
 
     # 3. Generate License Validity Pie Chart
-    validity_fig = dashboard_plot.plot_license_validity_by_gender(df_last_n_days)
+    validity_gender = cube_slice.series('license_validity').unstack(fill_value=0)
+    # Only the observed validities and genders, like a groupby(observed=True)
+    validity_gender = validity_gender.loc[validity_gender.sum(axis=1) > 0, validity_gender.sum(axis=0) > 0]
+    validity_fig = dashboard_plot.plot_license_validity_by_gender(validity_gender)
     
     return {
         'most_common_license_type': most_common_license_type,
@@ -101,55 +135,37 @@ def get_license_insights(df_last_n_days: pd.DataFrame) -> dict:
 # =======================================================================================================================
 # =======================================================================================================================
 # =======================================================================================================================
-def get_global_overview_metrics(df: pd.DataFrame) -> dict:
+def get_global_overview_metrics(source) -> dict:
     """
     Generates summary statistics for the Global Data Overview.
-    """
-    metrics = {}
-    metrics['total_violations'] = len(df)
-    
-    if 'Violation_Type' in df.columns:
-        metrics['most_common_violation'] = df['Violation_Type'].mode()[0] if not df['Violation_Type'].mode().empty else "N/A"
-    else:
-        metrics['most_common_violation'] = "N/A"
-    
-    if 'Fine_Amount' in df.columns:
-        metrics['avg_fine'] = df['Fine_Amount'].mean()
-        metrics['max_fine'] = df['Fine_Amount'].max()
-        metrics['min_fine'] = df['Fine_Amount'].min()
-    else:
-        metrics['avg_fine'] = 0
-        metrics['max_fine'] = 0
-        metrics['min_fine'] = 0
-    
-    if 'Location' in df.columns:
-        metrics['top_location'] = df['Location'].mode()[0] if not df['Location'].mode().empty else "N/A"
-    else:
-        metrics['top_location'] = "N/A"
-            
-    if 'Issuing_Agency' in df.columns:
-        metrics['top_agency'] = df['Issuing_Agency'].mode()[0] if not df['Issuing_Agency'].mode().empty else "N/A"
-    else:
-        metrics['top_agency'] = "N/A"
+    All the metrics come from one fused pass (see metric_kernel): over the rows of a DataFrame,
+    or over the aggregates of a cube date range without touching the rows.
 
-    if 'Payment_Method' in df.columns:
-        metrics['common_payment'] = df['Payment_Method'].mode()[0] if not df['Payment_Method'].mode().empty else "N/A"
+    Args:
+        source (CubeSlice or pd.DataFrame): The cube date range (see data_cube.DataCube.query) or the rows.
+
+    Returns:
+        dict: 'total_violations' and the metrics of GLOBAL_OVERVIEW_METRICS.
+    """
+    if isinstance(source, CubeSlice):
+        total_violations = source.total('count')
+        states = source.metric_states(GLOBAL_OVERVIEW_METRICS)
     else:
-        metrics['common_payment'] = "N/A"
-             
-    return metrics
+        total_violations = len(source)
+        states = metric_kernel.accumulate(source, GLOBAL_OVERVIEW_METRICS)
+    return {'total_violations': total_violations, **metric_kernel.finalize(states, GLOBAL_OVERVIEW_METRICS)}
 
 
 # =======================================================================================================================
-def get_behavioral_analysis(df: pd.DataFrame) -> dict:
+def get_behavioral_analysis(cube_slice: CubeSlice) -> dict:
     """
     Computes flags and returns aggregate counts/percentages for:
     - Over Speeding
-    - High Fine (>90th percentile)
-    - Repeat Offenders (>2 violations)
+    - Court Appearance Required
+    - Repeat Offenders (Comments == 'Repeat Offender')
     - Bad Weather Risk
     """
-    total_records = len(df)
+    total_records = cube_slice.total('count')
     analysis_results = {
         'total_count': total_records,
         'over_speeding_stats': (0, 0.0),
@@ -163,40 +179,54 @@ def get_behavioral_analysis(df: pd.DataFrame) -> dict:
         return analysis_results
 
     # Helper to calculate count and percentage
-    def calculate_stats(boolean_mask):
-        count = boolean_mask.sum()
+    def calculate_stats(count):
+        count = int(count)
         percentage = (count / total_records) * 100
         return (count, percentage)
 
     # 1. Over Speeding
-    analysis_results['over_speeding_stats'] = calculate_stats(df['Recorded_Speed'] > df['Speed_Limit'])
+    analysis_results['over_speeding_stats'] = calculate_stats(cube_slice.total('over_speeding'))
 
     # 2. Court Appearance Required
-    if 'Court_Appearance_Required' in df.columns:
-        analysis_results['court_appearance_stats'] = calculate_stats(df['Court_Appearance_Required'] == 'Yes')
+    analysis_results['court_appearance_stats'] = calculate_stats(cube_slice.total('court_appearance'))
 
     # 3. Repeat Offenders (Based on Comments == 'Repeat Offender')
-    if 'Comments' in df.columns:
-        repeat_offender_counts = df[df['Comments'] == 'Repeat Offender'].value_counts().sum()
-        if len(df) > 0:
-            repeat_offender_pct = (repeat_offender_counts / len(df)) * 100
-
-        analysis_results['repeat_offender_stats'] = (repeat_offender_counts, repeat_offender_pct)
-
-    if 'Weather_Condition' in df.columns:
-        adverse_weather_conditions = {'fog', 'rain', 'snow', 'thunderstorm', 'hail', 'mist'}
-        # Case-insensitive check
-        is_adverse_weather = df['Weather_Condition'].astype(str).str.lower().isin(adverse_weather_conditions)
-        analysis_results['bad_weather_stats'] = calculate_stats(is_adverse_weather)
-        
-        # Top Weather
-        if not df['Weather_Condition'].empty:
-            weather_mode_result = df['Weather_Condition'].mode()
-            if not weather_mode_result.empty:
-                tps_weather_name = weather_mode_result[0]
-                tps_weather_count = (df['Weather_Condition'] == tps_weather_name).sum()
-                analysis_results['most_frequent_weather_stats'] = (tps_weather_name, tps_weather_count, (tps_weather_count / total_records) * 100)
+    analysis_results['repeat_offender_stats'] = calculate_stats(cube_slice.total('repeat_offender'))
+
+    adverse_weather_conditions = {'fog', 'rain', 'snow', 'thunderstorm', 'hail', 'mist'}
+    weather_counts = cube_slice.series('environment', ['Weather_Condition'])
+    # Case-insensitive check
+    is_adverse_weather = weather_counts.index.astype(str).str.lower().isin(adverse_weather_conditions)
+    analysis_results['bad_weather_stats'] = calculate_stats(weather_counts[is_adverse_weather].sum())
+    
+    # Top Weather
+    top_weather = cube_slice.top_k('environment', 'Weather_Condition', 1)
+    if len(top_weather):
+        tps_weather_name, tps_weather_count = top_weather.index[0], int(top_weather.iloc[0])
+        analysis_results['most_frequent_weather_stats'] = (tps_weather_name, tps_weather_count, (tps_weather_count / total_records) * 100)
     return analysis_results
 
 
-# =======================================================================================================================
\ No newline at end of file
+# =======================================================================================================================
+def get_vehicle_violation_chart(cube_slice: CubeSlice) -> dict:
+    """
+    Plots the number of violations per violation type and vehicle type.
+    """
+    return {
+        'fig': dashboard_plot.plot_vehicle_type_vs_violation_type(cube_slice.series('vehicle_violations'))
+    }
+
+
+# =======================================================================================================================
+def get_severity_heatmap(cube_slice: CubeSlice) -> dict:
+    """
+    Plots the average severity score (see core/severity.py) per location and violation type.
+    """
+    counts = cube_slice.series('location_severity').unstack()
+    severity = cube_slice.series('location_severity', measure='severity').unstack()
+    # Average of the observed cells only, like a pivot_table(observed=True)
+    location_heatmap = (severity / counts.where(counts > 0))
+    location_heatmap = location_heatmap.loc[counts.sum(axis=1) > 0, counts.sum(axis=0) > 0]
+    return {
+        'fig': dashboard_plot.plot_severity_heatmap_by_location(location_heatmap)
+    }
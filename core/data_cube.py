@@ -0,0 +1,501 @@
+import os
+import logging
+import json
+import numpy as np
+import pandas as pd
+
+from core import data_loader, dataset_catalog, metric_kernel, severity
+from core.data_schema import TRAFFIC_VIOLATION_SCHEMA
+
+logger = logging.getLogger(__name__)
+
+# This module pre-aggregates a traffic violation dataset into a small daily cube for the dashboard (app.py)
+# and the grouped tables of the Numerical Analysis page (see query_backend).
+# The cube is built once per dataset version with one pass of np.bincount per cuboid: the row counts
+# and sums of every day and every combination of a few dimension columns (a "cuboid"). Prefix sums over
+# the days turn any date range (last N days, a year range) into two lookups per cuboid, so the pages
+# never filter, group or load the rows again. The cube is stored next to the dataset sidecar.
+# Every measure is mergeable (sums and counts add, min/max take the min/max), so when days are appended
+# to a dataset (see dataset_catalog.record_change) only the new rows are aggregated and merged into the
+# stored cube of the previous version.
+
+# ---------------------------------------------------------
+# CUBE CONFIGURATION
+# ---------------------------------------------------------
+# Bump whenever the cuboids or measures change so that stored cubes are rebuilt
+CUBE_VERSION = 1
+# Cuboid name -> (dimension columns, summed measures besides the row count 'count', min/max measures).
+# 'day' has no dimension: the totals of every day.
+CUBOIDS = {
+    'day': ([], ['fine', 'fine_count', 'over_speeding', 'court_appearance', 'repeat_offender'], ['fine_min', 'fine_max']),
+    'violation_fines': (['Violation_Type', 'Fine_Paid'], ['fine', 'fine_count'], ['fine_min', 'fine_max']),
+    'location_severity': (['Location', 'Violation_Type'], ['severity'], []),
+    'vehicle_violations': (['Violation_Type', 'Vehicle_Type'], [], []),
+    'violation_genders': (['Violation_Type', 'Driver_Gender'], ['id_count'], []),
+    'vehicle_models': (['Vehicle_Type', 'Vehicle_Model_Year'], ['fine', 'fine_count'], []),
+    'license_validity': (['License_Validity', 'Driver_Gender'], [], []),
+    'license_types': (['License_Type'], [], []),
+    'agencies': (['Issuing_Agency'], [], []),
+    'payments': (['Payment_Method'], [], []),
+    'environment': (['Weather_Condition', 'Road_Condition'], [], []),
+    'hourly': (['DayOfWeek', 'Hour'], ['id_count'], []),
+}
+# (column, aggregation) of query_backend.group_aggregate -> cube measure ('mean' is a sum over a count)
+AGGREGATION_MEASURES = {
+    (None, 'size'): 'count',
+    ('Fine_Amount', 'count'): 'fine_count',
+    ('Fine_Amount', 'sum'): 'fine',
+    ('Fine_Amount', 'min'): 'fine_min',
+    ('Fine_Amount', 'max'): 'fine_max',
+    ('Violation_ID', 'count'): 'id_count',
+}
+MEAN_MEASURES = {'Fine_Amount': ('fine', 'fine_count')}
+# Numeric columns summarized by the 'day' cuboid: column -> its (count, sum, min, max) measures
+NUMERIC_SUMMARIES = {'Fine_Amount': ('fine_count', 'fine', 'fine_min', 'fine_max')}
+
+
+def is_extreme(measure: str) -> bool:
+    """
+    Min/max measures are reduced with min/max instead of being summed.
+    """
+    return measure.endswith(("_min", "_max"))
+
+
+class CubeSlice:
+    """
+    The aggregates of one date range of a DataCube (see DataCube.query).
+    """
+    def __init__(self, labels: dict, values: dict, days: int):
+        self.labels = labels
+        # '<cuboid>.<measure>' -> one value per group of the cuboid
+        self.values = values
+        # Number of days of the range holding at least one row
+        self.days = days
+
+    def total(self, measure: str = 'count'):
+        """
+        Returns a 'day' measure over the range (a Python number, NaN for a min/max without values).
+        """
+        return self.values[f"day.{measure}"][0].item()
+
+    def series(self, cuboid: str, dims: list = None, measure: str = 'count', dropna: bool = True) -> pd.Series:
+        """
+        Returns a measure of a cuboid over the range, summed (min/max measures: reduced) over the dimensions not in dims.
+
+        Args:
+            cuboid (str): Name of the cuboid (see CUBOIDS).
+            dims (list): Dimensions to keep, in cuboid order (all of them by default).
+            measure (str): 'count' or one of the measures of the cuboid.
+            dropna (bool): Drops the group of the rows with a missing value in a kept dimension.
+
+        Returns:
+            pd.Series: One value per group (zero, or NaN for min/max, for the groups without rows),
+                       indexed by the dimension values in category order (a MultiIndex for several dimensions).
+        """
+        cube_dims = CUBOIDS[cuboid][0]
+        dims = cube_dims if dims is None else dims
+        shape = [len(self.labels[col]) + 1 for col in cube_dims]
+        values = self.values[f"{cuboid}.{measure}"].reshape(shape)
+        other_axes = tuple(i for i, col in enumerate(cube_dims) if col not in dims)
+        if is_extreme(measure):
+            reduce = np.fmin if measure.endswith("_min") else np.fmax
+            values = reduce.reduce(values, axis=other_axes) if other_axes else values
+        else:
+            values = values.sum(axis=other_axes)
+
+        # The missing values are the last group of every dimension.
+        # Categorical levels keep the category order when the result is sorted or unstacked.
+        levels = [pd.CategoricalIndex(self.labels[col] + ([] if dropna else [np.nan]), categories=self.labels[col], name=col)
+                  for col in dims]
+        if dropna:
+            values = values[tuple(slice(0, -1) for _ in dims)]
+        if len(dims) == 1:
+            index = levels[0]
+        else:
+            index = pd.MultiIndex.from_product(levels, names=dims)
+        return pd.Series(values.ravel(), index=index, name=measure)
+
+    def top_k(self, cuboid: str, dim: str, k: int = None) -> pd.Series:
+        """
+        Returns the k (default: all) most frequent values of a dimension with their row counts, like
+        Series.value_counts(): most frequent first, category order on ties, without the values that have no rows.
+        The counts are exact: they are merged, not estimated.
+        """
+        counts = self.series(cuboid, [dim])
+        counts = counts[counts > 0].sort_values(ascending=False, kind="stable")
+        return counts if k is None else counts.head(k)
+
+    def metric_states(self, specs: list) -> dict:
+        """
+        Returns the states of metric_kernel metrics over the range, read from the cube instead of the rows:
+        the value counts of a dimension from the first cuboid holding it, the numeric summaries of NUMERIC_SUMMARIES.
+        Columns the cube does not hold get no state (see metric_kernel.finalize).
+        """
+        states = {}
+        for spec in specs:
+            kind = metric_kernel.state_kind(spec.func)
+            if kind == 'categories':
+                cuboid = next((name for name, (dims, _, _) in CUBOIDS.items() if spec.column in dims), None)
+                if cuboid is not None:
+                    counts = self.series(cuboid, [spec.column])
+                    states[(spec.column, kind)] = metric_kernel.CategoryCounts(counts.index.tolist(), counts.to_numpy())
+            elif spec.column in NUMERIC_SUMMARIES:
+                count, total, minimum, maximum = (self.total(measure) for measure in NUMERIC_SUMMARIES[spec.column])
+                states[(spec.column, kind)] = metric_kernel.NumericSummary(int(count), float(total), minimum, maximum)
+        return states
+
+    def aggregate(self, group_cols: list, aggregations: list) -> pd.DataFrame:
+        """
+        Answers a query_backend.group_aggregate() from the first cuboid with all the group columns
+        and measures for all the aggregations.
+
+        Returns:
+            pd.DataFrame: The observed groups in key order, the group columns then one column per aggregation
+                          (named like query_backend does), or None when no cuboid answers the query.
+        """
+        needed = set()
+        for col, func in aggregations:
+            if func == 'mean' and col in MEAN_MEASURES:
+                needed.update(MEAN_MEASURES[col])
+            elif (None if func == 'size' else col, func) in AGGREGATION_MEASURES:
+                needed.add(AGGREGATION_MEASURES[(None if func == 'size' else col, func)])
+            else:
+                return None
+        for cuboid, (dims, summed, extremes) in CUBOIDS.items():
+            # The group columns must follow the cuboid order to get the groups in the key order of a groupby
+            if group_cols and [col for col in dims if col in group_cols] == list(group_cols) and needed.issubset(['count'] + summed + extremes):
+                break
+        else:
+            return None
+
+        counts = self.series(cuboid, group_cols)
+        observed = (counts > 0).to_numpy()
+        result = counts.index.to_frame(index=False)[observed]
+        for col, func in aggregations:
+            name = "size" if func == 'size' else f"{col}_{func}"
+            if func == 'mean':
+                total, count = (self.series(cuboid, group_cols, measure).to_numpy()[observed] for measure in MEAN_MEASURES[col])
+                result[name] = np.divide(total, count, out=np.full(len(total), np.nan), where=count > 0)
+            else:
+                measure = AGGREGATION_MEASURES[(None if func == 'size' else col, func)]
+                result[name] = self.series(cuboid, group_cols, measure).to_numpy()[observed]
+        return result.reset_index(drop=True)
+
+
+class DataCube:
+    """
+    Per-day aggregates of a dataset for the cuboids of CUBOIDS.
+
+    - days: the sorted days holding at least one row (rows without a date are not part of the cube)
+    - labels: dimension column -> its values (the categories for Categorical columns)
+    - arrays: '<cuboid>.<measure>' -> array (days, groups), the groups in the row-major order of the
+      cuboid dimensions with the missing values as the last group of every dimension.
+      Only the prefix sums of the summed measures are kept (see daily).
+    """
+    def __init__(self, days: np.ndarray, labels: dict, arrays: dict):
+        self.days = days
+        self.labels = labels
+        # Row i of a prefix sum is the sum of the days before days[i]
+        self.prefix = {}
+        self.extremes = {}
+        for name, values in arrays.items():
+            if is_extreme(name):
+                self.extremes[name] = values
+            else:
+                self.prefix[name] = np.zeros((len(days) + 1, values.shape[1]), dtype=values.dtype)
+                np.cumsum(values, axis=0, out=self.prefix[name][1:])
+
+    def daily(self, name: str) -> np.ndarray:
+        """
+        Returns the array (days, groups) of a measure.
+        """
+        if is_extreme(name):
+            return self.extremes[name]
+        return np.diff(self.prefix[name], axis=0)
+
+    def query(self, start_date=None, end_date=None) -> CubeSlice:
+        """
+        Returns the aggregates of the rows dated from start_date to end_date (both days included,
+        None for an open end), in time independent of the number of rows.
+        """
+        start = 0 if start_date is None else np.searchsorted(self.days, np.datetime64(pd.Timestamp(start_date).date(), 'D'), side='left')
+        end = len(self.days) if end_date is None else np.searchsorted(self.days, np.datetime64(pd.Timestamp(end_date).date(), 'D'), side='right')
+        end = max(start, end)
+        values = {name: prefix[end] - prefix[start] for name, prefix in self.prefix.items()}
+        for name, array in self.extremes.items():
+            if end == start:
+                values[name] = np.full(array.shape[1], np.nan)
+            else:
+                reduce = np.fmin if name.endswith("_min") else np.fmax
+                values[name] = reduce.reduce(array[start:end], axis=0)
+        return CubeSlice(self.labels, values, int(end - start))
+
+
+# ==================================================================================
+def _numbers(df: pd.DataFrame, col: str) -> np.ndarray:
+    return pd.to_numeric(df[col], errors='coerce').to_numpy(dtype="float64", na_value=np.nan)
+# -------------------------------------------------------------------------------
+def _equals(df: pd.DataFrame, col: str, value: str) -> np.ndarray:
+    return df[col].eq(value).fillna(False).to_numpy(dtype=bool)
+# -------------------------------------------------------------------------------
+def _dimension_codes(values: pd.Series) -> tuple:
+    """
+    Returns the group code of every value (missing values get the last code) and the labels of the codes.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes = values.cat.codes.to_numpy()
+        labels = values.cat.categories.tolist()
+    else:
+        codes, uniques = pd.factorize(values, sort=True)
+        labels = pd.Index(uniques).tolist()
+    return np.where(codes < 0, len(labels), codes).astype(np.int64), labels
+# -------------------------------------------------------------------------------
+def build_cube(df: pd.DataFrame) -> DataCube:
+    """
+    Aggregates a prepared traffic violation dataset (see data_loader) into its daily cube.
+
+    Args:
+        df (pd.DataFrame): The whole dataset (or the rows appended to it), with the 'Date' column parsed.
+
+    Returns:
+        DataCube: The daily aggregates.
+    """
+    dates = df['Date'].to_numpy().astype("datetime64[D]")
+    dated = ~np.isnat(dates)
+    day_numbers = dates[dated].astype(np.int64)
+    first_day = day_numbers.min() if day_numbers.size else 0
+    # Dense day offsets -> index among the days holding rows, in one pass without sorting
+    offsets = day_numbers - first_day
+    present = np.bincount(offsets) > 0
+    day_index = (np.cumsum(present) - 1)[offsets]
+    days = (np.flatnonzero(present) + first_day).astype("datetime64[D]")
+    n_days = len(days)
+
+    fine = _numbers(df, 'Fine_Amount')[dated]
+    measures = {
+        'fine': fine,
+        'fine_count': ~np.isnan(fine),
+        'id_count': df['Violation_ID'].notna().to_numpy()[dated],
+        'over_speeding': (_numbers(df, 'Recorded_Speed') > _numbers(df, 'Speed_Limit'))[dated],
+        'court_appearance': _equals(df, 'Court_Appearance_Required', 'Yes')[dated],
+        'repeat_offender': _equals(df, 'Comments', 'Repeat Offender')[dated],
+        'severity': severity.get_severity_scores(df).to_numpy(dtype="float64")[dated],
+    }
+
+    labels, codes = {}, {}
+    for dims, _, _ in CUBOIDS.values():
+        for col in dims:
+            if col not in codes:
+                col_codes, labels[col] = _dimension_codes(df[col])
+                codes[col] = col_codes[dated]
+
+    arrays = {}
+    for cuboid, (dims, summed, extremes) in CUBOIDS.items():
+        groups = 1
+        group = np.zeros(len(day_index), dtype=np.int64)
+        for col in dims:
+            size = len(labels[col]) + 1
+            group = group * size + codes[col]
+            groups *= size
+        key = day_index * groups + group
+        arrays[f"{cuboid}.count"] = np.bincount(key, minlength=n_days * groups).reshape(n_days, groups)
+        for measure in summed:
+            if measures[measure].dtype == bool:
+                # Counted flags stay integers
+                counted = np.bincount(key[measures[measure]], minlength=n_days * groups)
+            else:
+                counted = np.bincount(key, weights=np.nan_to_num(measures[measure]), minlength=n_days * groups)
+            arrays[f"{cuboid}.{measure}"] = counted.reshape(n_days, groups)
+        for measure in extremes:
+            source, func = measure.rsplit("_", 1)
+            reduced = pd.Series(measures[source]).groupby(key).agg(func)
+            values = np.full(n_days * groups, np.nan)
+            values[reduced.index.to_numpy()] = reduced.to_numpy()
+            arrays[f"{cuboid}.{measure}"] = values.reshape(n_days, groups)
+    return DataCube(days, labels, arrays)
+
+
+# ==================================================================================
+def _merge_labels(col: str, base: list, delta: list) -> list:
+    """
+    Merges the values of a dimension in the order a build over all the rows gives them:
+    the known categories of the schema first, then the other values sorted.
+    """
+    if base == delta:
+        return base
+    merged = set(base).union(delta)
+    known = TRAFFIC_VIOLATION_SCHEMA.get(col)
+    if isinstance(known, list):
+        # See data_schema.to_known_categorical
+        categories = [value for value in known if value in merged]
+        return categories + sorted(merged.difference(categories), key=str)
+    try:
+        return sorted(merged)
+    except TypeError:
+        return base + [value for value in delta if value not in base]
+# -------------------------------------------------------------------------------
+def _align_groups(values: np.ndarray, dims: list, labels: dict, merged_labels: dict, fill) -> np.ndarray:
+    """
+    Moves the groups of a cube array (days, groups) to their position in the merged labels.
+    """
+    if all(labels[col] == merged_labels[col] for col in dims):
+        return values
+    n_days = values.shape[0]
+    shape = [len(labels[col]) + 1 for col in dims]
+    merged_shape = [len(merged_labels[col]) + 1 for col in dims]
+    aligned = np.full((n_days, *merged_shape), fill, dtype=values.dtype)
+    positions = []
+    for col in dims:
+        position = {value: i for i, value in enumerate(merged_labels[col])}
+        # The missing values stay the last group
+        positions.append(np.array([position[value] for value in labels[col]] + [len(merged_labels[col])]))
+    aligned[np.ix_(np.arange(n_days), *positions)] = values.reshape(n_days, *shape)
+    return aligned.reshape(n_days, -1)
+# -------------------------------------------------------------------------------
+def merge_cubes(base: DataCube, delta: DataCube) -> DataCube:
+    """
+    Merges the cube of new rows into the cube of a dataset, in time proportional to the size of the cubes
+    (not of the rows). Days present in both get their sums added and their min/max combined.
+
+    Returns:
+        DataCube: The cube of all the rows, equal to a cube built from all of them.
+    """
+    labels = {col: _merge_labels(col, base.labels[col], delta.labels[col]) for col in base.labels}
+    days = np.union1d(base.days, delta.days)
+    base_rows = np.searchsorted(days, base.days)
+    delta_rows = np.searchsorted(days, delta.days)
+    arrays = {}
+    for cuboid, (dims, summed, extremes) in CUBOIDS.items():
+        for measure in ['count'] + summed + extremes:
+            name = f"{cuboid}.{measure}"
+            fill = np.nan if is_extreme(measure) else 0
+            base_values = _align_groups(base.daily(name), dims, base.labels, labels, fill)
+            delta_values = _align_groups(delta.daily(name), dims, delta.labels, labels, fill)
+            merged = np.full((len(days), base_values.shape[1]), fill, dtype=np.result_type(base_values, delta_values))
+            merged[base_rows] = base_values
+            if not is_extreme(measure):
+                merged[delta_rows] += delta_values
+            elif measure.endswith("_min"):
+                merged[delta_rows] = np.fmin(merged[delta_rows], delta_values)
+            else:
+                merged[delta_rows] = np.fmax(merged[delta_rows], delta_values)
+            arrays[name] = merged
+    return DataCube(days, labels, arrays)
+
+
+# ==================================================================================
+def _compact(values: np.ndarray) -> np.ndarray:
+    if values.dtype.kind == 'i' and (values.size == 0 or values.max() <= np.iinfo(np.int32).max):
+        return values.astype(np.int32)
+    return values
+# -------------------------------------------------------------------------------
+def save_cube(cube: DataCube, path: str) -> None:
+    """
+    Stores the cube of the current version of a dataset CSV file in the cache folder and removes
+    the cubes of its older versions.
+    """
+    cube_path = data_loader.get_cube_path(path)
+    tmp_path = f"{cube_path}.{os.getpid()}.tmp"
+    os.makedirs(data_loader.CACHE_DIR, exist_ok=True)
+    # Only the cells of the (day, group) pairs holding rows are stored: their flat positions once per cuboid,
+    # then the values of every measure at those positions (integers in 32 bits when they fit)
+    cells = {}
+    for cuboid, (_, summed, extremes) in CUBOIDS.items():
+        positions = np.flatnonzero(cube.daily(f"{cuboid}.count"))
+        cells[f"{cuboid}.positions"] = _compact(positions)
+        for measure in ['count'] + summed + extremes:
+            cells[f"{cuboid}.{measure}"] = _compact(cube.daily(f"{cuboid}.{measure}").ravel()[positions])
+    try:
+        with open(tmp_path, "wb") as file:
+            np.savez(file, version=CUBE_VERSION, days=cube.days, labels=np.array(json.dumps(cube.labels)), **cells)
+        os.replace(tmp_path, cube_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    for old_cube_path in data_loader.list_cube_paths(path):
+        if os.path.abspath(old_cube_path) != os.path.abspath(cube_path):
+            try:
+                os.remove(old_cube_path)
+            except OSError:
+                pass
+# -------------------------------------------------------------------------------
+def _read_cube(cube_path: str) -> DataCube:
+    if not os.path.exists(cube_path):
+        return None
+    try:
+        with np.load(cube_path, allow_pickle=False) as stored:
+            if 'version' not in stored.files or int(stored['version']) != CUBE_VERSION:
+                return None
+            days = stored['days']
+            labels = json.loads(str(stored['labels']))
+            arrays = {}
+            for cuboid, (dims, summed, extremes) in CUBOIDS.items():
+                groups = int(np.prod([len(labels[col]) + 1 for col in dims]))
+                positions = stored[f"{cuboid}.positions"]
+                for measure in ['count'] + summed + extremes:
+                    name = f"{cuboid}.{measure}"
+                    values = stored[name]
+                    if is_extreme(measure):
+                        array = np.full(len(days) * groups, np.nan)
+                    else:
+                        array = np.zeros(len(days) * groups, dtype=np.int64 if values.dtype.kind == 'i' else values.dtype)
+                    array[positions] = values
+                    arrays[name] = array.reshape(len(days), groups)
+            return DataCube(days, labels, arrays)
+    except Exception as e:
+        logger.warning("Could not read cube %s: %s", cube_path, e, exc_info=True)
+        return None
+# -------------------------------------------------------------------------------
+def load_cube(path: str) -> DataCube:
+    """
+    Reads the stored cube of the current version of a dataset CSV file, None when there is none.
+    """
+    return _read_cube(data_loader.get_cube_path(path))
+# -------------------------------------------------------------------------------
+def update_cube(path: str) -> DataCube:
+    """
+    Brings the stored cube of an earlier version of a dataset CSV file up to date with the rows appended
+    since then (see dataset_catalog.list_changes): only the appended byte range is read and aggregated.
+
+    Returns:
+        DataCube: The cube of the current version, None when no stored cube leads to it through appends.
+    """
+    fingerprint = data_loader.dataset_fingerprint(path)
+    changes = {change['fingerprint']: change for change in dataset_catalog.list_changes(path) if change['kind'] == "append"}
+    chain = []
+    while fingerprint in changes:
+        change = changes.pop(fingerprint)
+        chain.insert(0, change)
+        base = _read_cube(data_loader.get_cube_path(path, change['previous_fingerprint']))
+        if base is not None:
+            delta = data_loader.read_csv_rows(path, chain[0]['first_byte'], chain[-1]['size'])
+            return merge_cubes(base, build_cube(delta))
+        fingerprint = change['previous_fingerprint']
+    return None
+# -------------------------------------------------------------------------------
+def get_cube(path: str, load_frame) -> DataCube:
+    """
+    Returns the cube of a dataset. When it is not stored yet it is updated from the cube of an earlier
+    version (see update_cube) or built from load_frame(), and stored.
+
+    Args:
+        path (str): Path of the dataset CSV file.
+        load_frame: Function returning the whole prepared dataset, only called to build the cube.
+
+    Returns:
+        DataCube: The daily aggregates of the dataset.
+    """
+    cube = load_cube(path)
+    if cube is not None:
+        return cube
+    try:
+        cube = update_cube(path)
+    except Exception:
+        logger.exception("Could not update the cube of %s, rebuilding", path)
+    if cube is None:
+        cube = build_cube(load_frame())
+    try:
+        save_cube(cube, path)
+    except Exception as e:
+        logger.warning("Could not store cube for %s: %s", path, e, exc_info=True)
+    return cube
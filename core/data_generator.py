@@ -1,7 +1,21 @@
+import io
+import os
+import csv
 import random
-from datetime import datetime, timedelta
-from faker import Faker
+import shutil
+import json
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
 
+from core import dataset_catalog
+from core.data_schema import VIOLATION_ID, OFFICER_ID, format_prefixed_ids
 
 from core.data_variables import (
     vehicle_colors_list,
@@ -26,123 +40,1116 @@ from core.data_variables import (
     alcohol_levels_mapping,
     towing_mapping,
     court_mapping,
-    payment_methods_mapping
+    payment_methods_mapping,
+    draw_mappings
 )
 
+# This module generates synthetic traffic violation datasets column by column.
+# Every column is drawn for all rows at once with a seeded NumPy Generator, the dependent columns
+# (vehicle type, fine, helmet, payment, ...) are looked up from the data_variables mappings by category code,
+# so no Python code runs per row. The values of those mappings are drawn from the master seed (see get_seeded_mappings). Text columns are Categoricals of the distinct values.
+# Large datasets are generated and written in chunks of CHUNK_ROWS rows (CSV or Parquet), so memory use
+# does not grow with the dataset size. Run `python -m core.data_generator --help` for the command line.
+# Datasets are generated per calendar month partition, each with its own seed derived from the master seed
+# and the month, so partitions can be generated in parallel worker processes and the output does not
+# depend on the number of workers.
+# Workload profiles (WORKLOAD_PROFILES) skew the data like production traffic: Zipf-distributed locations
+# and officers, hour-of-day, seasonal, weekend and multi-year volume curves and injected spikes, whose
+# ground truth is returned so pattern detection can be validated.
 
 # ---------------------------------------
 # FAKE DATA GENERATOR SETUP
 # ---------------------------------------
-fake = Faker("en_IN")
-
-# SINGLE RECORD GENERATOR
-def generate_record(idx, date: datetime.date):
-    violation_id = f"VLT{idx:06d}"
-    violation_type = random.choice(violation_types_list)
-    fine_amount = fine_mapping.get(violation_type, random.randint(100, 10000))
-    location = random.choice(states_list)
-    date = date.strftime("%Y-%m-%d")
-    time = fake.time()
-
-    vehicle_type = random.choice(vehicle_types_mapping.get(violation_type, []))
-    vehicle_color = random.choice(vehicle_colors_list)
-
-    vehicle_model_year = random.randint(1990, int(datetime.strptime(date, "%Y-%m-%d").date().year))
-
-    registration_state = random.choice(states_list)
-
-    helmet_worn = helmet_worn_mapping.get(vehicle_type, "NA")
-    seatbelt_worn = seatbelt_worn_mapping.get(vehicle_type, "NA")
-
-    driver_age = random.randint(18, 80)
-    driver_gender = random.choice(driver_genders_list)
-
-    number_of_passengers = no_of_passengers_mapping.get(vehicle_type, random.randint(0, 50))
-
-    penalty_points = random.randint(0, 8)
-    weather_condition = random.choice(weather_conditions_list)
-    road_condition = random.choice(road_conditions_list)
-
-    officer_id = f"OFF{random.randint(1000, 9999)}"
-    license_type = random.choice(license_types_list)
-    issuing_agency = random.choice(issuing_agencies_list)
-    license_validity = random.choice(license_validity_list)
-    
-    traffic_light_status = random.choice(["Red", "Green", "Yellow"])
-    
-    speed_limit = random.randint(20, 120)
-    recorded_speed = random.randint(0, 200)
-    
-    breathalyzer_result = random.choice(breathalyzer_results_list)
-    alcohol_level = alcohol_levels_mapping.get(breathalyzer_result, 0.00)
-
-    towed = towing_mapping.get(violation_type, "No")
-    # -------------------------
-    # Fine logic
-    fine_paid = "NA"
-    six_year_rule_date = datetime.today().date().replace(year=datetime.today().year - 6)
-    if datetime.strptime(date, "%Y-%m-%d").date() < six_year_rule_date:
-        fine_paid = "Yes"
+TRAFFIC_LIGHT_STATUSES = ["Red", "Green", "Yellow"]
+YES_NO = ["Yes", "No"]
+# Fines before this many years are always paid
+FINE_PAID_AFTER_YEARS = 6
+
+# Every 'HH:MM:SS' of a day and every officer ID, drawn by index instead of being formatted per row
+TIMES_OF_DAY = np.array([f"{s // 3600:02d}:{s // 60 % 60:02d}:{s % 60:02d}" for s in range(24 * 3600)], dtype=object)
+OFFICER_ID_RANGE = (1000, 9999)
+OFFICER_IDS = format_prefixed_ids(np.arange(OFFICER_ID_RANGE[0], OFFICER_ID_RANGE[1] + 1), OFFICER_ID).to_numpy(dtype=object)
+
+# Rows generated and written at a time by the streaming writer
+CHUNK_ROWS = 250_000
+# Rows formatted to CSV text at a time
+CSV_BATCH_ROWS = 65_536
+# Bytes read from the end of a CSV file to find its last record (see read_last_record)
+TAIL_BYTES = 64 * 1024
+
+# ---------------------------------------
+# WORKLOAD PROFILES
+# ---------------------------------------
+# Share of the violations per hour of the day: quiet nights, morning and evening rush hours
+HOURLY_TRAFFIC_CURVE = [
+    0.8, 0.5, 0.4, 0.3, 0.4, 0.8, 1.8, 3.5, 5.5, 6.0, 5.0, 4.5,
+    4.5, 4.6, 4.4, 4.6, 5.4, 6.5, 7.0, 6.2, 4.8, 3.6, 2.6, 1.6,
+]
+# Volume of every month (January .. December): festive season and monsoon peaks
+SEASONAL_TRAFFIC_CURVE = [0.95, 0.9, 0.95, 1.0, 1.05, 0.95, 1.1, 1.1, 1.0, 1.15, 1.2, 1.25]
+
+# Settings of a profile not given in WORKLOAD_PROFILES
+PROFILE_DEFAULTS = {
+    'location_zipf': 0.0,            # Zipf exponent of the locations ranked by their weight in states_list, 0 = no skew
+    'officer_zipf': 0.0,             # Zipf exponent of the officer IDs, 0 = uniform
+    'hourly_curve': None,            # 24 weights of the hours of the day, None = uniform times
+    'seasonal_curve': None,          # 12 volume factors of the months, None = flat
+    'weekend_factor': 1.0,           # Volume factor of Saturdays and Sundays
+    'yearly_growth': 0.0,            # Volume growth per year (0.05 = +5% a year)
+    'spikes_per_year': 0.0,          # Injected spikes: extra violations at one location for a few days
+    'spike_multiplier': (3.0, 6.0),  # Range of the volume factor of a spike day
+    'spike_days': (1, 3),            # Range of the length of a spike in days
+}
+WORKLOAD_PROFILES = {
+    # Every value equally likely (apart from the weights of the data_variables lists), the same volume every day
+    "uniform": {},
+    # Production-like skew and volume curves
+    "realistic": {
+        'location_zipf': 1.1,
+        'officer_zipf': 0.8,
+        'hourly_curve': HOURLY_TRAFFIC_CURVE,
+        'seasonal_curve': SEASONAL_TRAFFIC_CURVE,
+        'weekend_factor': 1.3,
+        'yearly_growth': 0.06,
+    },
+    # Realistic, plus spikes to find with the pattern detection
+    "spiky": {
+        'location_zipf': 1.1,
+        'officer_zipf': 0.8,
+        'hourly_curve': HOURLY_TRAFFIC_CURVE,
+        'seasonal_curve': SEASONAL_TRAFFIC_CURVE,
+        'weekend_factor': 1.3,
+        'yearly_growth': 0.06,
+        'spikes_per_year': 6.0,
+    },
+}
+DEFAULT_PROFILE = "uniform"
+
+# ---------------------------------------
+# FAULT INJECTION
+# ---------------------------------------
+# Faults of the real uploads, applied to a share of the rows of a column (in this order, a later fault wins):
+# - outlier: out-of-range value (numeric columns)
+# - unit_suffix: number written with its unit or currency, e.g. '₹1,500' or '85 km/h' (numeric columns)
+# - malformed_date: date in another format or an impossible date ('Date')
+# - alternative_time: 'HH:MM' instead of 'HH:MM:SS' ('Time')
+# - quoted: value wrapped in stray double quotes
+# - null: missing value
+FAULT_KINDS = ["outlier", "unit_suffix", "malformed_date", "alternative_time", "quoted", "null"]
+# Faults that turn a numeric column into text
+TEXT_FAULTS = ["unit_suffix", "malformed_date", "alternative_time", "quoted"]
+
+OUTLIER_VALUES = {
+    "Driver_Age": [-1, 0, 150, 999],
+    "Recorded_Speed": [-10, 450, 999],
+    "Speed_Limit": [0, 999],
+    "Fine_Amount": [-500, 0, 10_000_000],
+    "Alcohol_Level": [-0.1, 5.0],
+    "Vehicle_Model_Year": [1900, 2099],
+    "Number_of_Passengers": [-1, 60],
+    "Penalty_Points": [-3, 99],
+    "Previous_Violations": [-1, 500],
+}
+UNIT_FORMATS = {
+    "Fine_Amount": "₹{:,}",
+    "Recorded_Speed": "{} km/h",
+    "Speed_Limit": "{} km/h",
+    "Alcohol_Level": "{}%",
+    "Driver_Age": "{} yrs",
+}
+# Other numeric columns get thousands separators
+DEFAULT_UNIT_FORMAT = "{:,}"
+# The last format gives an impossible day
+MALFORMED_DATE_FORMATS = ["%d/%m/%Y", "%m-%d-%Y", "%Y/%m/%d", "%d %b %Y", "%Y-%m-%dT%H:%M:%S", "%Y-%m-32"]
+
+# Rates of the faults per column: {column: {fault: share of the rows}}
+FAULT_PROFILES = {
+    "none": {},
+    # Roughly the mix seen in the uploaded datasets
+    "messy": {
+        "Date": {"malformed_date": 0.02, "null": 0.005},
+        "Time": {"alternative_time": 0.3, "null": 0.01},
+        "Fine_Amount": {"outlier": 0.002, "unit_suffix": 0.05, "null": 0.01},
+        "Recorded_Speed": {"outlier": 0.002, "unit_suffix": 0.03},
+        "Driver_Age": {"outlier": 0.01, "null": 0.01},
+        "Alcohol_Level": {"outlier": 0.001, "null": 0.02},
+        "Location": {"quoted": 0.02},
+        "Vehicle_Type": {"null": 0.01},
+        "Comments": {"quoted": 0.05, "null": 0.1},
+    },
+}
+DEFAULT_FAULTS = "none"
+
+# The data_variables mappings, with the values drawn when that module is imported. Generated datasets use
+# values drawn from their master seed instead (see get_seeded_mappings).
+GENERATOR_MAPPINGS = {
+    "vehicle_types_mapping": vehicle_types_mapping,
+    "helmet_worn_mapping": helmet_worn_mapping,
+    "seatbelt_worn_mapping": seatbelt_worn_mapping,
+    "no_of_passengers_mapping": no_of_passengers_mapping,
+    "fine_mapping": fine_mapping,
+    "alcohol_levels_mapping": alcohol_levels_mapping,
+    "towing_mapping": towing_mapping,
+    "court_mapping": court_mapping,
+    "payment_methods_mapping": payment_methods_mapping,
+}
+# Spawn key of the seed of the drawn mapping values, a child of the master seed apart from the month partitions
+MAPPINGS_SPAWN_KEY = 0
+OUTPUT_FORMATS = ["csv", "parquet"]
+
+
+# ==================================================================================
+def _categories(values) -> tuple:
+    """
+    Returns the distinct values of a list (object array, in first-seen order) and the category code of every entry.
+    """
+    categories = list(dict.fromkeys(values))
+    return np.array(categories, dtype=object), np.array([categories.index(value) for value in values], dtype=np.int64)
+# -------------------------------------------------------------------------------
+def _draw(rng: np.random.Generator, values: list, size: int) -> tuple:
+    """
+    Draws uniformly from a list like random.choice (repeated entries act as weights).
+
+    Returns:
+        tuple: (categories, codes) — the distinct values and the category code of every draw.
+    """
+    categories, list_codes = _categories(values)
+    return categories, list_codes[rng.integers(0, len(values), size=size)]
+# -------------------------------------------------------------------------------
+def _draw_zipf(rng: np.random.Generator, values: list, size: int, exponent: float) -> tuple:
+    """
+    Draws from a list with Zipf weights: the distinct values are ranked by their weight in the list
+    (most repeated first) and the value of rank r is drawn with a probability proportional to 1 / r ** exponent.
+
+    Returns:
+        tuple: (categories, codes) like _draw().
+    """
+    categories, list_codes = _categories(values)
+    ranked = np.argsort(-np.bincount(list_codes, minlength=len(categories)), kind="stable")
+    weights = 1.0 / np.arange(1, len(categories) + 1) ** exponent
+    return categories, ranked[rng.choice(len(categories), size=size, p=weights / weights.sum())]
+# -------------------------------------------------------------------------------
+def _lookup(categories: np.ndarray, codes: np.ndarray, mapping: dict, default) -> np.ndarray:
+    """
+    Vectorized mapping.get(value, default) for a coded column, for the numeric mappings. default is a
+    function returning one value per row, called only when some values are missing from the mapping.
+    """
+    known = np.array([category in mapping for category in categories], dtype=bool)
+    result = np.array([mapping.get(category, 0) for category in categories])[codes]
+    missing = ~known[codes]
+    if missing.any():
+        result[missing] = default(int(missing.sum()))
+    return result
+# -------------------------------------------------------------------------------
+def _lookup_categorical(categories: np.ndarray, codes: np.ndarray, mapping: dict, default: str) -> pd.Categorical:
+    """
+    Vectorized mapping.get(value, default) for a coded column, for the text mappings.
+    """
+    values, value_codes = _categories([mapping.get(category, default) for category in categories])
+    return pd.Categorical.from_codes(value_codes[codes], values)
+# -------------------------------------------------------------------------------
+def get_seeded_mappings(seed) -> dict:
+    """
+    Draws the values of the data_variables mappings (fines, passengers, helmet, seatbelt, alcohol level, ...)
+    with a random.Random seeded from a child of the master seed, so the seed alone fixes them in every process.
+
+    Returns:
+        dict: mapping name -> {category: value} (see data_variables.draw_mappings).
+    """
+    sequence = np.random.SeedSequence(seed, spawn_key=(MAPPINGS_SPAWN_KEY,))
+    return draw_mappings(random.Random(int.from_bytes(sequence.generate_state(4).tobytes(), "little")))
+# -------------------------------------------------------------------------------
+def get_fine_paid_cutoff(today=None):
+    """
+    Returns the date before which every fine is paid (FINE_PAID_AFTER_YEARS ago, 29 February becomes the 28th).
+    """
+    today = today or datetime.today().date()
+    try:
+        return today.replace(year=today.year - FINE_PAID_AFTER_YEARS)
+    except ValueError:
+        return today.replace(year=today.year - FINE_PAID_AFTER_YEARS, day=28)
+
+
+# ==================================================================================
+def get_workload_profile(profile=None) -> dict:
+    """
+    Returns the settings of a workload profile: a name of WORKLOAD_PROFILES or a dict of settings,
+    completed with PROFILE_DEFAULTS.
+    """
+    if profile is None:
+        profile = DEFAULT_PROFILE
+    if isinstance(profile, str):
+        if profile not in WORKLOAD_PROFILES:
+            raise ValueError(f"Unknown workload profile '{profile}', expected one of {list(WORKLOAD_PROFILES)}")
+        profile = WORKLOAD_PROFILES[profile]
+    return {**PROFILE_DEFAULTS, **profile}
+# -------------------------------------------------------------------------------
+def get_volume_factors(days: np.ndarray, profile=None) -> np.ndarray:
+    """
+    Returns the relative volume of every day from the seasonal curve, the weekend factor and the yearly growth
+    of the profile, scaled to a mean of 1 so the records per day keep their range on average.
+    """
+    profile = get_workload_profile(profile)
+    factors = np.ones(len(days))
+    if len(days) == 0:
+        return factors
+    if profile['seasonal_curve'] is not None:
+        months = days.astype("datetime64[M]").astype(np.int64) % 12
+        factors *= np.asarray(profile['seasonal_curve'], dtype=float)[months]
+    # 1970-01-01 was a Thursday: day number + 3 is 5 and 6 on Saturdays and Sundays
+    weekdays = (days.astype(np.int64) + 3) % 7
+    factors *= np.where(weekdays >= 5, profile['weekend_factor'], 1.0)
+    years = (days - days[0]).astype(np.int64) / 365.25
+    factors *= (1 + profile['yearly_growth']) ** years
+    return factors / factors.mean()
+# -------------------------------------------------------------------------------
+def plan_spikes(days: np.ndarray, profile=None, rng: np.random.Generator = None) -> list:
+    """
+    Picks the injected spikes of a date range: on the days of a spike the volume is multiplied and the
+    extra violations happen at the spike location.
+
+    Returns:
+        list: The ground truth, one dict per spike: 'start' and 'end' ('YYYY-MM-DD', inclusive),
+              'location' and 'multiplier', in date order.
+    """
+    profile = get_workload_profile(profile)
+    rng = rng or np.random.default_rng()
+    count = int(round(profile['spikes_per_year'] * len(days) / 365.25))
+    if count == 0 or len(days) == 0:
+        return []
+    locations = list(dict.fromkeys(states_list))
+    spikes = []
+    for start in np.sort(rng.choice(len(days), size=min(count, len(days)), replace=False)):
+        length = int(rng.integers(profile['spike_days'][0], profile['spike_days'][1], endpoint=True))
+        end = min(start + length, len(days)) - 1
+        spikes.append({
+            'start': str(days[start]),
+            'end': str(days[end]),
+            'location': locations[rng.integers(0, len(locations))],
+            'multiplier': round(float(rng.uniform(*profile['spike_multiplier'])), 1),
+        })
+    return spikes
+# -------------------------------------------------------------------------------
+def get_spike_days(spikes: list) -> dict:
+    """
+    Returns {day (datetime64[D]): (location, multiplier)} for the days of the spikes (see plan_spikes),
+    a later spike wins on days where two spikes overlap.
+    """
+    spike_days = {}
+    for spike in spikes:
+        for day in np.arange(np.datetime64(spike['start'], "D"), np.datetime64(spike['end'], "D") + 1):
+            spike_days[day] = (spike['location'], spike['multiplier'])
+    return spike_days
+
+
+# ==================================================================================
+def get_fault_rates(faults=None) -> dict:
+    """
+    Returns the fault rates per column: a name of FAULT_PROFILES or a dict {column: {fault: rate}}
+    (see FAULT_KINDS), without the zero rates.
+
+    Raises:
+        ValueError: For an unknown profile, column or fault, a rate outside 0..1 or a fault the column cannot have.
+    """
+    if faults is None:
+        faults = DEFAULT_FAULTS
+    if isinstance(faults, str):
+        if faults not in FAULT_PROFILES:
+            raise ValueError(f"Unknown fault profile '{faults}', expected one of {list(FAULT_PROFILES)}")
+        faults = FAULT_PROFILES[faults]
+    if not isinstance(faults, dict) or not all(isinstance(column_rates, dict) for column_rates in faults.values()):
+        raise ValueError("Fault rates must be a fault profile name or a dict {column: {fault: rate}}")
+    dtypes = generate_columns(np.array([], dtype="datetime64[D]")).dtypes
+    rates = {}
+    for col, column_rates in faults.items():
+        if col not in dtypes:
+            raise ValueError(f"Unknown column '{col}' in the fault rates")
+        for kind, rate in column_rates.items():
+            if kind not in FAULT_KINDS:
+                raise ValueError(f"Unknown fault '{kind}' for '{col}', expected one of {FAULT_KINDS}")
+            if not 0 <= rate <= 1:
+                raise ValueError(f"The rate of '{kind}' for '{col}' must be between 0 and 1, got {rate}")
+            numeric = pd.api.types.is_numeric_dtype(dtypes[col])
+            if (kind in ["outlier", "unit_suffix"] and not numeric) or (kind == "malformed_date" and col != "Date") \
+                    or (kind == "alternative_time" and col != "Time"):
+                raise ValueError(f"'{col}' cannot have the fault '{kind}'")
+        column_rates = {kind: rate for kind, rate in column_rates.items() if rate > 0}
+        if column_rates:
+            rates[col] = column_rates
+    return rates
+# -------------------------------------------------------------------------------
+def _outliers(col: str, values: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    if col in OUTLIER_VALUES:
+        return rng.choice(np.asarray(OUTLIER_VALUES[col], dtype=values.dtype), size=len(values))
+    # Negative or ten times the value
+    return values * rng.choice(np.array([-1, 10], dtype=values.dtype), size=len(values))
+# -------------------------------------------------------------------------------
+def _malformed_dates(dates: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    dates = pd.DatetimeIndex(dates.astype("datetime64[D]"))
+    picks = rng.integers(0, len(MALFORMED_DATE_FORMATS), size=len(dates))
+    malformed = np.empty(len(dates), dtype=object)
+    for index, date_format in enumerate(MALFORMED_DATE_FORMATS):
+        selected = picks == index
+        malformed[selected] = dates[selected].strftime(date_format)
+    return malformed
+# -------------------------------------------------------------------------------
+def inject_faults(df: pd.DataFrame, faults=None, rng: np.random.Generator = None) -> pd.DataFrame:
+    """
+    Applies faults to a share of the rows of the generated columns, to exercise the cleaning code.
+
+    Every fault of a column hits each row with its rate, independently of the other faults.
+    A column gets the same dtype in every chunk whatever rows are hit, so chunks can be written to one file:
+    text faults turn a column into strings, nulls make integer columns nullable ('Int64').
+
+    Args:
+        df (pd.DataFrame): Generated records (see generate_columns).
+        faults: Fault rates (see get_fault_rates), no fault when None or empty.
+        rng (np.random.Generator): Random generator.
+
+    Returns:
+        pd.DataFrame: A new DataFrame with the faulty columns replaced.
+    """
+    faults = get_fault_rates(faults)
+    if not faults:
+        return df
+    rng = rng or np.random.default_rng()
+    size = len(df)
+    faulty = {}
+    for col, rates in faults.items():
+        # The masks are always drawn in the order of FAULT_KINDS, so the same seed hits the same rows
+        masks = {kind: rng.random(size) < rates[kind] for kind in FAULT_KINDS if kind in rates}
+        values = df[col]
+        categorical = isinstance(values.dtype, pd.CategoricalDtype)
+        if not categorical and not any(kind in masks for kind in TEXT_FAULTS):
+            array = values.to_numpy(copy=True)
+            if "outlier" in masks:
+                array[masks["outlier"]] = _outliers(col, array[masks["outlier"]], rng)
+            if "null" in masks:
+                if np.issubdtype(array.dtype, np.integer):
+                    array = pd.array(array, dtype="Int64")
+                array[masks["null"]] = None
+            faulty[col] = array
+            continue
+        if categorical and list(masks) == ["null"]:
+            # Stays a Categorical, missing values are code -1
+            codes = values.cat.codes.to_numpy(copy=True)
+            codes[masks["null"]] = -1
+            faulty[col] = pd.Categorical.from_codes(codes, values.cat.categories)
+            continue
+
+        numbers = None
+        if not categorical:
+            numbers = values.to_numpy(copy=True)
+            if "outlier" in masks:
+                numbers[masks["outlier"]] = _outliers(col, numbers[masks["outlier"]], rng)
+        text = values.to_numpy(dtype=object, copy=True) if numbers is None else numbers.astype(str).astype(object)
+        if "unit_suffix" in masks:
+            unit_format = UNIT_FORMATS.get(col, DEFAULT_UNIT_FORMAT)
+            text[masks["unit_suffix"]] = [unit_format.format(number) for number in numbers[masks["unit_suffix"]].tolist()]
+        if "malformed_date" in masks:
+            text[masks["malformed_date"]] = _malformed_dates(text[masks["malformed_date"]], rng)
+        if "alternative_time" in masks:
+            text[masks["alternative_time"]] = [time[:5] for time in text[masks["alternative_time"]]]
+        if "quoted" in masks:
+            text[masks["quoted"]] = ['"' + value + '"' for value in text[masks["quoted"]]]
+        if "null" in masks:
+            text[masks["null"]] = None
+        faulty[col] = text
+    return df.assign(**faulty)
+
+
+# ==================================================================================
+def generate_columns(dates: np.ndarray, first_id: int = 1, rng: np.random.Generator = None, profile=None, spike_days: dict = None,
+                     mappings: dict = None) -> pd.DataFrame:
+    """
+    Generates one violation record per entry of dates, column by column.
+
+    Follows the rules of the data_variables mappings: the vehicle type is drawn from the types allowed
+    for the violation type, the fine, towing and court appearance follow the violation type, helmet,
+    seatbelt and passengers follow the vehicle type, the alcohol level follows the breathalyzer result
+    and the payment method follows whether the fine was paid (always paid for old violations).
+
+    Args:
+        dates (np.ndarray): datetime64[D] date of every record.
+        first_id (int): Number of the first Violation_ID.
+        rng (np.random.Generator): Random generator, seeded for reproducible data.
+        profile: Workload profile (see get_workload_profile) for the location, officer and hour skew.
+        spike_days (dict): Optional spike of every day (see get_spike_days): the share of the records
+                           of that day above the normal volume is moved to the spike location.
+        mappings (dict): Drawn mapping values (see get_seeded_mappings), the values drawn when data_variables
+                         was imported by default.
+
+    Returns:
+        pd.DataFrame: The generated records, with the columns of the traffic violation datasets.
+    """
+    rng = rng or np.random.default_rng()
+    profile = get_workload_profile(profile)
+    mappings = {**GENERATOR_MAPPINGS, **(mappings or {})}
+    dates = np.asarray(dates, dtype="datetime64[D]")
+    size = len(dates)
+
+    def column(categories, codes):
+        # Categoricals share the distinct values, no string is copied per row
+        return pd.Categorical.from_codes(codes, categories)
+
+    def draw(values):
+        return column(*_draw(rng, values, size))
+
+    def integers(low, high):
+        return rng.integers(low, high, size=size, endpoint=True)
+
+    violation_categories, violation_codes = _draw(rng, violation_types_list, size)
+
+    # Vehicle type: uniform among the types allowed for the violation type of the row.
+    # allowed[violation code] holds the vehicle codes of the allowed types, padded to the longest list.
+    vehicle_categories = np.array(list(dict.fromkeys(
+        vehicle for violation in violation_categories for vehicle in vehicle_types_mapping.get(violation, [])
+    )), dtype=object)
+    allowed_lists = [[list(vehicle_categories).index(vehicle) for vehicle in vehicle_types_mapping.get(violation, [])]
+                     for violation in violation_categories]
+    allowed_counts = np.array([len(codes) for codes in allowed_lists], dtype=np.int64)
+    if (allowed_counts[violation_codes] == 0).any():
+        # random.choice of an empty list
+        raise IndexError("Cannot choose a vehicle type for a violation type without vehicle types")
+    allowed = np.zeros((len(allowed_lists), max(allowed_counts.max(), 1)), dtype=np.int64)
+    for violation_code, codes in enumerate(allowed_lists):
+        allowed[violation_code, :len(codes)] = codes
+    vehicle_codes = allowed[violation_codes, rng.integers(0, allowed_counts[violation_codes].clip(min=1))]
+
+    breathalyzer_categories, breathalyzer_codes = _draw(rng, breathalyzer_results_list, size)
+
+    # Fines of violations older than FINE_PAID_AFTER_YEARS are always paid
+    paid_categories = np.array(YES_NO, dtype=object)
+    paid_codes = np.where(dates < np.datetime64(get_fine_paid_cutoff(), "D"), 0, rng.integers(0, 2, size=size))
+
+    if profile['location_zipf'] > 0:
+        location_categories, location_codes = _draw_zipf(rng, states_list, size, profile['location_zipf'])
+    else:
+        location_categories, location_codes = _draw(rng, states_list, size)
+    for day, (location, multiplier) in (spike_days or {}).items():
+        day_rows = np.flatnonzero(dates == day)
+        if len(day_rows):
+            spike_rows = day_rows[rng.random(len(day_rows)) < 1 - 1 / multiplier]
+            location_codes[spike_rows] = list(location_categories).index(location)
+
+    if profile['hourly_curve'] is not None:
+        hourly_curve = np.asarray(profile['hourly_curve'], dtype=float)
+        hours = rng.choice(24, size=size, p=hourly_curve / hourly_curve.sum())
+        time_codes = hours * 3600 + rng.integers(0, 3600, size=size)
+    else:
+        time_codes = rng.integers(0, len(TIMES_OF_DAY), size=size)
+
+    if profile['officer_zipf'] > 0:
+        weights = 1.0 / np.arange(1, len(OFFICER_IDS) + 1) ** profile['officer_zipf']
+        officer_codes = rng.choice(len(OFFICER_IDS), size=size, p=weights / weights.sum())
     else:
-        fine_paid = random.choice(["Yes", "No"])
-    # --------------------------
-    payment_method = payment_methods_mapping.get(fine_paid, "NA")
-
-    court_appearance_required = court_mapping.get(violation_type, "No")
-    previous_violations = random.randint(0, 20)
-    comments = random.choice(comments_list)
-
-    record = {
-        "Violation_ID": violation_id,
-        "Violation_Type": violation_type,
-        "Fine_Amount": fine_amount,
-        "Location": location,
-        "Date": date,
-        "Time": time,
-        "Vehicle_Type": vehicle_type,
-        "Vehicle_Color": vehicle_color,
-        "Vehicle_Model_Year": vehicle_model_year,
-        "Registration_State": registration_state,
-        "Helmet_Worn": helmet_worn,
-        "Seatbelt_Worn": seatbelt_worn,   
-        "Driver_Age": driver_age,
-        "Driver_Gender": driver_gender,
-        "Number_of_Passengers": number_of_passengers,
-        "Penalty_Points": penalty_points,
-        "Weather_Condition": weather_condition,
-        "Road_Condition": road_condition,
-        "Officer_ID": officer_id,
-        "License_Type": license_type,
-        "Issuing_Agency": issuing_agency,
-        "License_Validity": license_validity,
-        "Traffic_Light_Status": traffic_light_status,
-        "Speed_Limit": speed_limit,
-        "Recorded_Speed": recorded_speed,
-        "Alcohol_Level": alcohol_level,
-        "Breathalyzer_Result": breathalyzer_result,
-        "Towed": towed,
-        "Fine_Paid": fine_paid,
-        "Payment_Method": payment_method,
-        "Court_Appearance_Required": court_appearance_required,
-        "Previous_Violations": previous_violations,
-        "Comments": comments
-    }
-    
-    return record
+        officer_codes = rng.integers(0, len(OFFICER_IDS), size=size)
+
+    # Every distinct date is formatted once
+    date_labels, date_codes = np.unique(dates, return_inverse=True)
+    years = date_labels.astype("datetime64[Y]").astype(np.int64) + 1970
+
+    return pd.DataFrame({
+        "Violation_ID": format_prefixed_ids(np.arange(first_id, first_id + size), VIOLATION_ID).to_numpy(dtype=object),
+        "Violation_Type": column(violation_categories, violation_codes),
+        "Fine_Amount": _lookup(violation_categories, violation_codes, mappings['fine_mapping'],
+                               lambda count: rng.integers(100, 10000, size=count, endpoint=True)).astype(np.int64),
+        "Location": column(location_categories, location_codes),
+        "Date": column(np.datetime_as_string(date_labels, unit="D").astype(object), date_codes),
+        "Time": column(TIMES_OF_DAY, time_codes),
+        "Vehicle_Type": column(vehicle_categories, vehicle_codes),
+        "Vehicle_Color": draw(vehicle_colors_list),
+        "Vehicle_Model_Year": rng.integers(1990, years[date_codes], endpoint=True),
+        "Registration_State": draw(states_list),
+        "Helmet_Worn": _lookup_categorical(vehicle_categories, vehicle_codes, mappings['helmet_worn_mapping'], "NA"),
+        "Seatbelt_Worn": _lookup_categorical(vehicle_categories, vehicle_codes, mappings['seatbelt_worn_mapping'], "NA"),
+        "Driver_Age": integers(18, 80),
+        "Driver_Gender": draw(driver_genders_list),
+        "Number_of_Passengers": _lookup(vehicle_categories, vehicle_codes, mappings['no_of_passengers_mapping'],
+                                        lambda count: rng.integers(0, 50, size=count, endpoint=True)).astype(np.int64),
+        "Penalty_Points": integers(0, 8),
+        "Weather_Condition": draw(weather_conditions_list),
+        "Road_Condition": draw(road_conditions_list),
+        "Officer_ID": column(OFFICER_IDS, officer_codes),
+        "License_Type": draw(license_types_list),
+        "Issuing_Agency": draw(issuing_agencies_list),
+        "License_Validity": draw(license_validity_list),
+        "Traffic_Light_Status": draw(TRAFFIC_LIGHT_STATUSES),
+        "Speed_Limit": integers(20, 120),
+        "Recorded_Speed": integers(0, 200),
+        "Alcohol_Level": _lookup(breathalyzer_categories, breathalyzer_codes, mappings['alcohol_levels_mapping'], lambda count: 0.00).astype(np.float64),
+        "Breathalyzer_Result": column(breathalyzer_categories, breathalyzer_codes),
+        "Towed": _lookup_categorical(violation_categories, violation_codes, mappings['towing_mapping'], "No"),
+        "Fine_Paid": column(paid_categories, paid_codes),
+        "Payment_Method": _lookup_categorical(paid_categories, paid_codes, mappings['payment_methods_mapping'], "NA"),
+        "Court_Appearance_Required": _lookup_categorical(violation_categories, violation_codes, mappings['court_mapping'], "No"),
+        "Previous_Violations": integers(0, 20),
+        "Comments": draw(comments_list),
+    })
 
 
 # DATASET GENERATOR — DAY BY DAY
-def generate_dataset_by_days(start_date=("2015-01-01"), end_date=(datetime.now().date().strftime("%Y-%m-%d")), min_records_per_day=5, max_records_per_day=15):
-    
-    current_date = datetime.strptime(start_date, "%Y-%m-%d").date()
-    end_date = datetime.strptime(end_date, "%Y-%m-%d").date()
-    
-    violation_counter = 1
-    records = []
-    while current_date <= end_date:
-        daily_count = random.randint(min_records_per_day, max_records_per_day)
-        for _ in range(daily_count):
-            records.append(generate_record(violation_counter, current_date))
-            violation_counter += 1
-        current_date += timedelta(days=1)
-    return records
\ No newline at end of file
+def get_daily_counts(start_date, end_date, min_records_per_day=5, max_records_per_day=15, rows=None, rng=None, profile=None, spikes=None) -> tuple:
+    """
+    Plans the number of records of every day of the date range.
+
+    Args:
+        start_date (str): First day, 'YYYY-MM-DD'.
+        end_date (str): Last day (inclusive), 'YYYY-MM-DD'.
+        min_records_per_day (int), max_records_per_day (int): Range of the daily record count.
+        rows (int): Optional total number of records, spread at random over the days instead.
+        rng (np.random.Generator): Random generator.
+        profile: Workload profile whose volume curves scale the counts (see get_volume_factors).
+        spikes (list): Spikes multiplying the counts of their days (see plan_spikes).
+
+    Returns:
+        tuple: (days, counts) — the datetime64[D] days and their record counts.
+    """
+    rng = rng or np.random.default_rng()
+    start = np.datetime64(datetime.strptime(start_date, "%Y-%m-%d").date(), "D")
+    end = np.datetime64(datetime.strptime(end_date, "%Y-%m-%d").date(), "D")
+
+    days = np.arange(start, end + np.timedelta64(1, "D"), dtype="datetime64[D]")
+    factors = get_volume_factors(days, profile)
+    for day, (location, multiplier) in get_spike_days(spikes or []).items():
+        factors[days == day] *= multiplier
+    if rows is not None:
+        if len(days) == 0:
+            return days, np.zeros(0, dtype=np.int64)
+        return days, rng.multinomial(rows, factors / factors.sum())
+    counts = rng.integers(min_records_per_day, max_records_per_day, size=len(days), endpoint=True)
+    if (factors != 1).any():
+        counts = np.rint(counts * factors).astype(np.int64)
+    return days, counts
+# -------------------------------------------------------------------------------
+def plan_partitions(start_date, end_date, min_records_per_day=5, max_records_per_day=15, rows=None, seed=None, profile=None, first_id: int = 1, faults=None) -> tuple:
+    """
+    Splits a dataset into calendar month partitions that can be generated independently.
+
+    The spikes and daily record counts are planned up front from the master seed, which fixes the
+    Violation_ID range of every partition (numbered from first_id), and every partition gets a seed derived
+    from the master seed and its month. See get_daily_counts() for the arguments, a seed of None draws a new master seed.
+
+    Returns:
+        tuple: (partitions, spikes) — one dict per month: 'key' ('YYYY-MM'), 'days', 'counts', 'first_id'
+               (Violation_ID number of its first record), 'rows', 'seed' (np.random.SeedSequence of the
+               partition), 'profile', 'spike_days' (see get_spike_days), 'faults' (see get_fault_rates) and
+               'mappings' (see get_seeded_mappings);
+               and the ground truth of the injected spikes (see plan_spikes).
+    """
+    seed = np.random.SeedSequence(seed).entropy
+    faults = get_fault_rates(faults)
+    mappings = get_seeded_mappings(seed)
+    plan_rng = np.random.default_rng(np.random.SeedSequence(seed))
+    start = np.datetime64(datetime.strptime(start_date, "%Y-%m-%d").date(), "D")
+    end = np.datetime64(datetime.strptime(end_date, "%Y-%m-%d").date(), "D")
+    spikes = plan_spikes(np.arange(start, end + np.timedelta64(1, "D"), dtype="datetime64[D]"), profile, plan_rng)
+    spike_days = get_spike_days(spikes)
+    days, counts = get_daily_counts(start_date, end_date, min_records_per_day, max_records_per_day, rows,
+                                    rng=plan_rng, profile=profile, spikes=spikes)
+
+    months = days.astype("datetime64[M]")
+    keys, starts = np.unique(months, return_index=True)
+    bounds = list(starts) + [len(days)]
+    partitions = []
+    for key, first_day, last_day in zip(keys, bounds[:-1], bounds[1:]):
+        year, month = (int(part) for part in str(key).split("-"))
+        partition_rows = int(counts[first_day:last_day].sum())
+        partitions.append({
+            'key': str(key),
+            'days': days[first_day:last_day],
+            'counts': counts[first_day:last_day],
+            'first_id': first_id,
+            'rows': partition_rows,
+            'seed': np.random.SeedSequence([seed, year, month]),
+            'profile': profile,
+            'spike_days': {day: spike for day, spike in spike_days.items() if np.datetime64(day, "M") == key},
+            'faults': faults,
+            'mappings': mappings,
+        })
+        first_id += partition_rows
+    return partitions, spikes
+# -------------------------------------------------------------------------------
+def iter_partition_chunks(partition: dict, chunk_rows: int = CHUNK_ROWS):
+    """
+    Generates the records of one partition (see plan_partitions) as DataFrames of at most chunk_rows
+    records. Only the dates of the current chunk are expanded.
+    """
+    rng = np.random.default_rng(partition['seed'])
+    days, counts = partition['days'], partition['counts']
+    ends = np.cumsum(counts)
+    total_rows = int(ends[-1]) if len(ends) else 0
+    if total_rows == 0:
+        # An empty partition still has its columns
+        yield inject_faults(generate_columns(np.array([], dtype="datetime64[D]"), first_id=partition['first_id'], rng=rng,
+                                             profile=partition['profile'], mappings=partition['mappings']), partition['faults'], rng)
+    for first_row in range(0, total_rows, chunk_rows):
+        last_row = min(first_row + chunk_rows, total_rows)
+        first_day = np.searchsorted(ends, first_row, side="right")
+        last_day = np.searchsorted(ends, last_row - 1, side="right")
+        # Records of the chunk per day: the first and last day may be split with the neighbouring chunks
+        day_counts = counts[first_day:last_day + 1].copy()
+        day_counts[0] -= first_row - (ends[first_day] - counts[first_day])
+        day_counts[-1] -= ends[last_day] - last_row
+        dates = np.repeat(days[first_day:last_day + 1], day_counts)
+        chunk = generate_columns(dates, first_id=partition['first_id'] + first_row, rng=rng,
+                                 profile=partition['profile'], spike_days=partition['spike_days'], mappings=partition['mappings'])
+        yield inject_faults(chunk, partition['faults'], rng)
+# -------------------------------------------------------------------------------
+def iter_dataset_chunks(start_date, end_date, min_records_per_day=5, max_records_per_day=15, seed=None, rows=None, chunk_rows=CHUNK_ROWS, profile=None, faults=None):
+    """
+    Generates a dataset as DataFrames of at most chunk_rows records (a chunk never spans two months),
+    in date order with consecutive Violation_IDs. See get_daily_counts() for the arguments and
+    inject_faults() for faults, the same seed and arguments give the same records.
+    """
+    partitions, spikes = plan_partitions(start_date, end_date, min_records_per_day, max_records_per_day, rows, seed, profile, faults=faults)
+    for partition in partitions:
+        yield from iter_partition_chunks(partition, chunk_rows)
+# -------------------------------------------------------------------------------
+def generate_dataset_by_days(start_date=("2015-01-01"), end_date=(datetime.now().date().strftime("%Y-%m-%d")), min_records_per_day=5, max_records_per_day=15, seed=None, profile=None, faults=None) -> pd.DataFrame:
+    """
+    Generates a dataset with a random number of records (min..max, inclusive) for every day of the date range.
+
+    Args:
+        start_date (str): First day, 'YYYY-MM-DD'.
+        end_date (str): Last day (inclusive), 'YYYY-MM-DD'.
+        min_records_per_day (int), max_records_per_day (int): Range of the daily record count.
+        seed (int): Optional seed, the same seed and arguments give the same dataset.
+        profile: Workload profile, a name of WORKLOAD_PROFILES (see get_workload_profile).
+        faults: Fault rates, a name of FAULT_PROFILES (see inject_faults), no faults by default.
+
+    Returns:
+        pd.DataFrame: The generated records in date order, Violation_IDs numbered from 1.
+                      df.attrs['spikes'] holds the ground truth of the injected spikes (see plan_spikes).
+    """
+    seed = np.random.SeedSequence(seed).entropy
+    rng = np.random.default_rng(seed)
+    start = np.datetime64(datetime.strptime(start_date, "%Y-%m-%d").date(), "D")
+    end = np.datetime64(datetime.strptime(end_date, "%Y-%m-%d").date(), "D")
+    spikes = plan_spikes(np.arange(start, end + np.timedelta64(1, "D"), dtype="datetime64[D]"), profile, rng)
+    days, counts = get_daily_counts(start_date, end_date, min_records_per_day, max_records_per_day, rng=rng, profile=profile, spikes=spikes)
+    df = generate_columns(np.repeat(days, counts), first_id=1, rng=rng, profile=profile, spike_days=get_spike_days(spikes),
+                          mappings=get_seeded_mappings(seed))
+    df = inject_faults(df, faults, rng)
+    df.attrs['spikes'] = spikes
+    return df
+
+
+# ==================================================================================
+def get_output_format(path: str, file_format: str = None) -> str:
+    """
+    Returns the output format: file_format, else the one of the file extension ('csv' by default).
+    """
+    if file_format is None:
+        extension = os.path.splitext(path)[1].lower().lstrip(".")
+        file_format = extension if extension in OUTPUT_FORMATS else "csv"
+    if file_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format '{file_format}', expected one of {OUTPUT_FORMATS}")
+    return file_format
+# -------------------------------------------------------------------------------
+def _to_arrow(chunk: pd.DataFrame) -> pa.Table:
+    """
+    Converts a generated chunk to Arrow. The Categoricals stay dictionary encoded (written as their values),
+    with int32 indices so every chunk has the same schema whatever its number of categories.
+    """
+    table = pa.Table.from_pandas(chunk, preserve_index=False)
+    schema = pa.schema([
+        pa.field(field.name, pa.dictionary(pa.int32(), field.type.value_type)) if pa.types.is_dictionary(field.type) else field
+        for field in table.schema
+    ])
+    return table.cast(schema)
+# -------------------------------------------------------------------------------
+def get_csv_header(columns: list) -> bytes:
+    """
+    Returns the CSV header line, written like pandas to_csv (Arrow quotes every header name).
+    """
+    header = io.StringIO()
+    csv.writer(header, lineterminator="\n").writerow(columns)
+    return header.getvalue().encode()
+# -------------------------------------------------------------------------------
+def write_dataset_chunks(output_path: str, chunks, file_format: str = None, total_rows: int = None, progress_callback=None, include_header: bool = True) -> dict:
+    """
+    Writes DataFrame chunks to one CSV or Parquet file, one chunk in memory at a time.
+    The file is written under a temporary name and renamed when complete.
+
+    Args:
+        output_path (str): Path of the output file, its folder is created if needed.
+        chunks: Iterable of DataFrames with the same columns (see iter_dataset_chunks).
+        file_format (str): 'csv' or 'parquet', from the extension of output_path when None.
+        total_rows (int): Optional number of rows, passed on to progress_callback.
+        progress_callback: Optional function (rows_written, total_rows) called after each chunk.
+        include_header (bool): Whether a CSV file starts with the header line.
+
+    Returns:
+        dict: 'path', 'format', 'rows' and 'bytes' of the written file.
+    """
+    file_format = get_output_format(output_path, file_format)
+    output_dir = os.path.dirname(output_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    tmp_path = f"{output_path}.{os.getpid()}.tmp"
+    writer = None
+    rows = 0
+
+    try:
+        with open(tmp_path, "wb") as sink:
+            try:
+                for chunk in chunks:
+                    table = _to_arrow(chunk)
+                    if writer is None:
+                        if file_format == "parquet":
+                            writer = pq.ParquetWriter(sink, table.schema)
+                        else:
+                            if include_header:
+                                sink.write(get_csv_header(table.column_names))
+                            writer = pacsv.CSVWriter(sink, table.schema, write_options=pacsv.WriteOptions(include_header=False))
+                    if file_format == "parquet":
+                        # One row group per chunk
+                        writer.write_table(table)
+                    else:
+                        # The CSV text is formatted batch by batch
+                        writer.write_table(table, max_chunksize=CSV_BATCH_ROWS)
+                    rows += len(table)
+                    # Only one chunk is kept in memory: release this one before the next is generated
+                    del chunk, table
+                    if progress_callback is not None:
+                        progress_callback(rows, total_rows)
+            finally:
+                if writer is not None:
+                    writer.close()
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    return {'path': output_path, 'format': file_format, 'rows': rows, 'bytes': os.path.getsize(output_path)}
+# -------------------------------------------------------------------------------
+def _write_partition(partition: dict, part_path: str, file_format: str, chunk_rows: int) -> int:
+    """
+    Generates one partition into its own file (CSV without header), returns its number of records.
+    """
+    chunks = iter_partition_chunks(partition, chunk_rows)
+    return write_dataset_chunks(part_path, chunks, file_format, include_header=False)['rows']
+# -------------------------------------------------------------------------------
+def _append_part(sink, part_path: str, file_format: str, writer):
+    """
+    Appends a partition file to the output file: CSV bytes are copied, Parquet row groups are rewritten as they are.
+    Returns the Parquet writer (opened with the schema of the first part).
+    """
+    if file_format == "parquet":
+        part = pq.ParquetFile(part_path)
+        if writer is None:
+            writer = pq.ParquetWriter(sink, part.schema_arrow)
+        for index in range(part.num_row_groups):
+            row_group = part.read_row_group(index)
+            if len(row_group):
+                writer.write_table(row_group)
+    else:
+        with open(part_path, "rb") as part:
+            shutil.copyfileobj(part, sink, 1024 * 1024)
+    return writer
+# -------------------------------------------------------------------------------
+def write_dataset_by_days(output_path: str, start_date, end_date, min_records_per_day=5, max_records_per_day=15, seed=None, rows=None,
+                          file_format: str = None, chunk_rows: int = CHUNK_ROWS, workers: int = 1, profile=None, progress_callback=None,
+                          first_id: int = 1, include_header: bool = True, faults=None) -> dict:
+    """
+    Generates a dataset and streams it to a CSV or Parquet file in chunks of chunk_rows records,
+    so memory use depends on chunk_rows (per worker) and not on the dataset size.
+
+    With workers > 1 the month partitions (see plan_partitions) are generated in a process pool,
+    each into its own temporary file, and appended to the output in date order. The file is the same
+    byte for byte whatever the number of workers, and in every process: everything random, including the
+    values of the data_variables mappings, is drawn from the master seed.
+    See get_daily_counts() and write_dataset_chunks() for the other arguments, profile is a workload profile
+    (see get_workload_profile), first_id the Violation_ID number of the first record and faults
+    the fault rates of the columns (see inject_faults).
+
+    Returns:
+        dict: 'path', 'format', 'rows', 'bytes', 'seed' (the master seed, to generate the same dataset again),
+              'partitions' (number of month partitions) and 'spikes' (ground truth, see plan_spikes).
+    """
+    file_format = get_output_format(output_path, file_format)
+    seed = np.random.SeedSequence(seed).entropy
+    partitions, spikes = plan_partitions(start_date, end_date, min_records_per_day, max_records_per_day, rows, seed, profile, first_id, faults)
+    total_rows = sum(partition['rows'] for partition in partitions)
+
+    if workers <= 1 or len(partitions) <= 1:
+        def chunks():
+            if not partitions:
+                # An empty date range still has its columns
+                yield inject_faults(generate_columns(np.array([], dtype="datetime64[D]")), faults)
+            for partition in partitions:
+                yield from iter_partition_chunks(partition, chunk_rows)
+        # Written in one pass, the same bytes as the appended partition files of the parallel path
+        result = write_dataset_chunks(output_path, chunks(), file_format, total_rows, progress_callback, include_header)
+    else:
+        parts_dir = f"{output_path}.{os.getpid()}.parts"
+        tmp_path = f"{output_path}.{os.getpid()}.tmp"
+        os.makedirs(parts_dir, exist_ok=True)
+        part_paths = [os.path.join(parts_dir, f"{partition['key']}.{file_format}") for partition in partitions]
+        rows_written = 0
+        writer = None
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                part_rows = executor.map(_write_partition, partitions, part_paths,
+                                         [file_format] * len(partitions), [chunk_rows] * len(partitions))
+                with open(tmp_path, "wb") as sink:
+                    try:
+                        if file_format == "csv" and include_header:
+                            sink.write(get_csv_header(list(generate_columns(np.array([], dtype="datetime64[D]")).columns)))
+                        # Results come back in partition order, each part is appended and removed once it is done
+                        for part_path, partition_rows in zip(part_paths, part_rows):
+                            writer = _append_part(sink, part_path, file_format, writer)
+                            os.remove(part_path)
+                            rows_written += partition_rows
+                            if progress_callback is not None:
+                                progress_callback(rows_written, total_rows)
+                    finally:
+                        if writer is not None:
+                            writer.close()
+            os.replace(tmp_path, output_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        finally:
+            shutil.rmtree(parts_dir, ignore_errors=True)
+        result = {'path': output_path, 'format': file_format, 'rows': rows_written, 'bytes': os.path.getsize(output_path)}
+
+    return {**result, 'seed': seed, 'partitions': len(partitions), 'spikes': spikes}
+
+
+# ==================================================================================
+def _read_record_id_and_date(line: bytes, columns: list) -> tuple:
+    """
+    Returns (number of the Violation_ID, day of the Date) of a generated CSV line, None for an unreadable value.
+    """
+    try:
+        record = next(csv.reader([line.decode()]))
+    except (UnicodeDecodeError, csv.Error, StopIteration):
+        return None, None
+    if len(record) != len(columns):
+        return None, None
+    # Stray quotes may come from the fault injection (see inject_faults)
+    violation_id, date = (record[columns.index(col)].strip('"') for col in ["Violation_ID", "Date"])
+    prefix = VIOLATION_ID.prefix
+    number = int(violation_id[len(prefix):]) if violation_id.startswith(prefix) and violation_id[len(prefix):].isdigit() else None
+    try:
+        day = np.datetime64(date[:10], "D") if date else None
+    except ValueError:
+        day = None
+    return number, day
+# -------------------------------------------------------------------------------
+def read_last_record(path: str) -> dict:
+    """
+    Reads the last record of a generated CSV dataset from the end of the file, without parsing the rest.
+
+    The last records may have a faulty Violation_ID or Date (see inject_faults): the records of the tail
+    are read back to the last readable ones. Violation_IDs are numbered in row order, so the last one
+    follows from any readable one, and the rows are written day by day, so the faulty dates after the
+    last readable one are on that day.
+
+    Returns:
+        dict: 'violation_id' (number of its Violation_ID), 'date' (its day, datetime64[D]) and 'size' (bytes of the file),
+              None for a dataset without records.
+
+    Raises:
+        ValueError: When the file is not a CSV file written by this generator, or no record of its last
+            TAIL_BYTES has a readable Violation_ID or Date.
+    """
+    columns = list(generate_columns(np.array([], dtype="datetime64[D]")).columns)
+    if get_output_format(path) != "csv":
+        raise ValueError(f"Only CSV datasets can be extended in place: {path}")
+    with open(path, "rb") as f:
+        if dataset_catalog.read_header(f) != columns:
+            raise ValueError(f"{path} is not a generated traffic violation dataset (its columns differ)")
+        size = f.seek(0, os.SEEK_END)
+        f.seek(max(size - TAIL_BYTES, 0))
+        tail = f.read()
+    # The first line is the header, or the end of a record cut by the seek
+    records = tail.rstrip(b"\r\n").splitlines()[1:]
+    if not records and size <= TAIL_BYTES:
+        # Only the header line
+        return None
+    violation_id, date = None, None
+    for position in range(len(records) - 1, -1, -1):
+        number, day = _read_record_id_and_date(records[position], columns)
+        if violation_id is None and number is not None:
+            violation_id = number + len(records) - 1 - position
+        date = day if date is None else date
+        if violation_id is not None and date is not None:
+            break
+    if violation_id is None or date is None:
+        last_line = records[-1][:200] if records else b""
+        raise ValueError(f"No record at the end of {path} has a readable Violation_ID and Date, the last one is {last_line!r}")
+    return {'violation_id': violation_id, 'date': date, 'size': size}
+# -------------------------------------------------------------------------------
+def append_dataset_days(path: str, end_date, min_records_per_day=5, max_records_per_day=15, seed=None, rows=None,
+                        chunk_rows: int = CHUNK_ROWS, workers: int = 1, profile=None, progress_callback=None, faults=None) -> dict:
+    """
+    Extends a generated CSV dataset in place with the days after its last record, up to end_date.
+
+    The new days are generated like a dataset of their own (month partitions, see write_dataset_by_days)
+    with Violation_IDs continuing from the last record, written to a temporary file and appended to the
+    dataset, so the existing bytes are never rewritten. The dataset catalog entry is updated and a change
+    record is added to its change log (see dataset_catalog.record_change), so caches and pre-aggregations
+    of the previous version can add the new rows instead of being rebuilt.
+
+    Args:
+        path (str): Path of the generated CSV dataset.
+        end_date (str): Last day to generate (inclusive), 'YYYY-MM-DD'.
+        See write_dataset_by_days() for the other arguments.
+
+    Returns:
+        dict: The change record: 'id', 'path', 'kind' ('append'), 'previous_fingerprint' and 'fingerprint'
+              (data_loader fingerprints before and after), 'first_byte' and 'size' (byte range of the new rows),
+              'first_row' and 'rows' (row range), 'first_id' and 'last_id' (Violation_ID numbers), 'date_min'
+              and 'date_max' (days of the new rows), 'years' (years with new rows), 'partitions' and 'spikes';
+              and the generation arguments 'seed', 'profile', 'min_records_per_day', 'max_records_per_day',
+              'requested_rows' and 'faults': write_dataset_by_days() over date_min..date_max with them and
+              first_id gives the appended rows again. None when the dataset already reaches end_date.
+    """
+    last_record = read_last_record(path)
+    if last_record is None:
+        raise ValueError(f"{path} has no records to continue from")
+    start = last_record['date'] + np.timedelta64(1, "D")
+    end = np.datetime64(datetime.strptime(end_date, "%Y-%m-%d").date(), "D")
+    if start > end:
+        return None
+
+    first_id = last_record['violation_id'] + 1
+    previous_fingerprint = dataset_catalog.data_loader.dataset_fingerprint(path)
+    entry = dataset_catalog.get_dataset(path)
+    delta_path = f"{path}.{os.getpid()}.append.csv"
+    try:
+        delta = write_dataset_by_days(
+            delta_path, str(start), end_date, min_records_per_day, max_records_per_day, seed=seed, rows=rows,
+            file_format="csv", chunk_rows=chunk_rows, workers=workers, profile=profile, progress_callback=progress_callback,
+            first_id=first_id, include_header=False, faults=faults,
+        )
+        first_byte = previous_size = last_record['size']
+        with open(path, "r+b") as sink:
+            try:
+                sink.seek(previous_size - 1)
+                if sink.read(1) != b"\n":
+                    sink.write(b"\n")
+                    first_byte += 1
+                with open(delta_path, "rb") as part:
+                    shutil.copyfileobj(part, sink, 1024 * 1024)
+            except BaseException:
+                # The dataset is left as it was
+                sink.truncate(previous_size)
+                raise
+    finally:
+        if os.path.exists(delta_path):
+            os.remove(delta_path)
+
+    appended_record = read_last_record(path)
+    if entry is not None:
+        # The catalog does not see a file growing in place, its entry is updated here
+        if entry['row_count'] is not None:
+            # Only the hashes are computed again, the metadata follows from the appended rows
+            metadata = {**entry, 'row_count': entry['row_count'] + delta['rows'], 'date_max': str(appended_record['date'])}
+            dataset_catalog.register_dataset(path, dataset_catalog.hash_file(path), metadata)
+        else:
+            dataset_catalog.register_dataset(path, *dataset_catalog.scan_file(path))
+    # Generated Violation_IDs are numbered from 1 in row order
+    first_row = entry['row_count'] if entry is not None and entry['row_count'] is not None else first_id - 1
+    years = list(range(start.astype(object).year, end.astype(object).year + 1)) if delta['rows'] else []
+    return dataset_catalog.record_change({
+        'path': path,
+        'kind': "append",
+        'previous_fingerprint': previous_fingerprint,
+        'fingerprint': dataset_catalog.data_loader.dataset_fingerprint(path),
+        'first_byte': first_byte,
+        'size': os.path.getsize(path),
+        'first_row': first_row,
+        'rows': delta['rows'],
+        'first_id': first_id,
+        'last_id': first_id + delta['rows'] - 1,
+        'date_min': str(start),
+        'date_max': str(end),
+        'years': years,
+        'partitions': delta['partitions'],
+        'spikes': delta['spikes'],
+        'seed': delta['seed'],
+        'profile': profile if isinstance(profile, str) or profile is None else "custom",
+        'min_records_per_day': min_records_per_day,
+        'max_records_per_day': max_records_per_day,
+        'requested_rows': rows,
+        'faults': faults,
+    })
+
+
+# ==================================================================================
+def main(argv=None) -> None:
+    """
+    Command line entry point: python -m core.data_generator --output data.parquet --rows 100000000 --seed 1
+    With --append the days after the last record of an existing CSV dataset are added to it (see append_dataset_days).
+    """
+    parser = argparse.ArgumentParser(prog="python -m core.data_generator", description="Generate a synthetic traffic violation dataset.")
+    parser.add_argument("--output", "-o", required=True, help="Output file (.csv or .parquet)")
+    parser.add_argument("--start-date", default="2015-01-01", help="First day, YYYY-MM-DD (default: %(default)s)")
+    parser.add_argument("--end-date", default=datetime.now().date().strftime("%Y-%m-%d"), help="Last day, YYYY-MM-DD (default: today)")
+    parser.add_argument("--rows", type=int, help="Total number of records, spread over the days (default: use --min/--max-per-day)")
+    parser.add_argument("--min-per-day", type=int, default=5, help="Minimum records per day (default: %(default)s)")
+    parser.add_argument("--max-per-day", type=int, default=15, help="Maximum records per day (default: %(default)s)")
+    parser.add_argument("--seed", type=int, help="Master seed for reproducible datasets (default: a new one, printed at the end)")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, help="Output format (default: from the file extension)")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS, help="Records generated and written at a time per worker (default: %(default)s)")
+    parser.add_argument("--profile", choices=list(WORKLOAD_PROFILES), default=DEFAULT_PROFILE, help="Workload profile (default: %(default)s)")
+    parser.add_argument("--faults", default=DEFAULT_FAULTS,
+                        help=f"Fault injection: one of {list(FAULT_PROFILES)} or a JSON object of rates per column, "
+                             "e.g. '{\"Time\": {\"alternative_time\": 0.2}}' (default: %(default)s)")
+    parser.add_argument("--spikes-output", help="JSON file to save the ground truth of the injected spikes to")
+    parser.add_argument("--append", action="store_true", help="Extend the existing CSV --output with the days after its last record up to --end-date")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes generating month partitions (default: %(default)s)")
+    args = parser.parse_args(argv)
+    if args.chunk_rows < 1:
+        parser.error("--chunk-rows must be at least 1")
+    faults = args.faults
+    try:
+        if faults not in FAULT_PROFILES:
+            faults = json.loads(faults)
+        get_fault_rates(faults)
+    except (ValueError, TypeError) as e:
+        parser.error(f"--faults: {e}")
+
+    def show_progress(rows_written, total_rows):
+        print(f"\r{rows_written:,} / {total_rows:,} rows", end="", flush=True)
+
+    started = datetime.now()
+    if args.append:
+        change = append_dataset_days(
+            args.output, args.end_date, args.min_per_day, args.max_per_day, seed=args.seed, rows=args.rows,
+            chunk_rows=args.chunk_rows, workers=args.workers, profile=args.profile, progress_callback=show_progress, faults=faults,
+        )
+        if change is None:
+            print(f"{args.output} already reaches {args.end_date}, nothing to append")
+            return
+        seconds = (datetime.now() - started).total_seconds()
+        print(f"\nAppended {change['rows']:,} rows ({change['date_min']} to {change['date_max']}, Violation_IDs {change['first_id']} to {change['last_id']}) "
+              f"to {change['path']} in {seconds:.1f}s")
+        print(f"Change record {change['id']}, seed {change['seed']}")
+        if change['spikes'] and args.spikes_output:
+            with open(args.spikes_output, "w") as f:
+                json.dump(change['spikes'], f, indent=2)
+        return
+    result = write_dataset_by_days(
+        args.output, args.start_date, args.end_date, args.min_per_day, args.max_per_day,
+        seed=args.seed, rows=args.rows, file_format=args.format, chunk_rows=args.chunk_rows, workers=args.workers,
+        profile=args.profile, progress_callback=show_progress, faults=faults,
+    )
+    seconds = (datetime.now() - started).total_seconds()
+    print(f"\nWrote {result['rows']:,} rows ({result['bytes'] / 1024 ** 2:,.1f} MB, {result['format']}) to {result['path']} in {seconds:.1f}s")
+    print(f"{result['partitions']} month partitions, seed {result['seed']}")
+    if result['spikes']:
+        print(f"{len(result['spikes'])} injected spikes")
+        if args.spikes_output:
+            with open(args.spikes_output, "w") as f:
+                json.dump(result['spikes'], f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,434 @@
+import io
+import os
+import logging
+import re
+import glob
+import shutil
+import hashlib
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.feather as feather
+from core.data_schema import apply_schema
+from core.data_prepare import prepare_dataset
+
+logger = logging.getLogger(__name__)
+
+# This module handles loading of the CSV datasets shown in the sidebar.
+# A CSV is converted once into a typed and prepared "sidecar": a folder with one Arrow IPC (Feather v2)
+# file per year. Later loads open the sidecar files memory-mapped, so every session and every server
+# process reading the same dataset shares the same OS page cache pages instead of private copies,
+# and a year range only opens the files of those years.
+
+# ---------------------------------------------------------
+# SIDECAR CACHE CONFIGURATION
+# ---------------------------------------------------------
+CACHE_DIR = ".dataset_cache"
+SIDECAR_EXTENSION = ".arrow"
+# Bump whenever the stored column types change so that older sidecars are rebuilt
+SIDECAR_VERSION = 7
+# Sidecar partition files are named 'Year=2021.arrow', rows without a year go to 'Year=null.arrow'
+PARTITION_COLUMN = "Year"
+NULL_PARTITION = "null"
+# Aggregate cubes (see data_cube) are stored next to the sidecars as '<path key>_<fingerprint>_cube_v<version>.npz'
+CUBE_SUFFIX = "_cube"
+
+# Text columns stay in the (memory-mapped) Arrow buffers instead of becoming Python string objects
+ARROW_STRING_DTYPES = {
+    pa.string(): pd.StringDtype("pyarrow"),
+    pa.large_string(): pd.StringDtype("pyarrow"),
+}
+
+# CSV path -> sidecar path of every dataset opened by this process (for the memory report)
+_mapped_sidecars = {}
+
+
+def dataset_fingerprint(path: str) -> str:
+    """
+    Builds a short fingerprint for a dataset file from its path, size and modification time.
+    The fingerprint changes whenever the file is replaced or edited.
+
+    Args:
+        path (str): Path of the CSV file.
+
+    Returns:
+        str: Hex digest identifying the current version of the file.
+    """
+    stat = os.stat(path)
+    key = f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+
+def _path_key(path: str) -> str:
+    return hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()[:12]
+
+
+def get_sidecar_path(path: str) -> str:
+    """
+    Returns the sidecar folder for the current version of the CSV file.
+    """
+    return os.path.join(CACHE_DIR, f"{_path_key(path)}_{dataset_fingerprint(path)}_v{SIDECAR_VERSION}")
+
+
+def get_partition_path(sidecar_path: str, year) -> str:
+    """
+    Returns the file of one year (None for the rows without a year) in a sidecar folder.
+    """
+    name = NULL_PARTITION if year is None else int(year)
+    return os.path.join(sidecar_path, f"{PARTITION_COLUMN}={name}{SIDECAR_EXTENSION}")
+
+
+def list_partitions(sidecar_path: str) -> dict:
+    """
+    Lists the partition files of a sidecar folder from their names, without opening them.
+
+    Returns:
+        dict: year (None for the rows without a year) -> file path, in year order with None last.
+    """
+    partitions = {}
+    for file_path in glob.glob(os.path.join(sidecar_path, f"{PARTITION_COLUMN}=*{SIDECAR_EXTENSION}")):
+        name = os.path.basename(file_path)[len(PARTITION_COLUMN) + 1:-len(SIDECAR_EXTENSION)]
+        partitions[None if name == NULL_PARTITION else int(name)] = file_path
+    return dict(sorted(partitions.items(), key=lambda item: (item[0] is None, item[0] or 0)))
+
+
+def get_staged_path(path: str) -> str:
+    """
+    Returns the location of the staged Arrow copy written by the upload ingest (see ingest) for the
+    current version of the CSV file. Once the sidecar is built, the staged copy is removed as stale.
+    """
+    return os.path.join(CACHE_DIR, f"{_path_key(path)}_{dataset_fingerprint(path)}_staged{SIDECAR_EXTENSION}")
+
+
+def get_cube_path(path: str, fingerprint: str = None) -> str:
+    """
+    Returns the location of the daily aggregate cube (see data_cube) of the current version of the CSV file,
+    or of the version with the given fingerprint.
+    """
+    fingerprint = dataset_fingerprint(path) if fingerprint is None else fingerprint
+    return os.path.join(CACHE_DIR, f"{_path_key(path)}_{fingerprint}{CUBE_SUFFIX}_v{SIDECAR_VERSION}.npz")
+
+
+def list_cube_paths(path: str) -> list:
+    """
+    Lists the stored cubes of every version of the CSV file.
+    """
+    return glob.glob(os.path.join(CACHE_DIR, f"{_path_key(path)}_*{CUBE_SUFFIX}_v*.npz"))
+
+
+def _remove_stale_sidecars(path: str, keep: str) -> None:
+    """
+    Deletes sidecars built from older versions (or older formats) of the same CSV file.
+    Files that are still mapped by another process stay readable until that process unmaps them.
+    """
+    for old_sidecar in glob.glob(os.path.join(CACHE_DIR, f"{_path_key(path)}_*")):
+        # Cubes of older versions are kept, data_cube updates them with the appended rows and removes them
+        if old_sidecar.endswith(".tmp") or CUBE_SUFFIX in os.path.basename(old_sidecar):
+            continue
+        if os.path.abspath(old_sidecar) != os.path.abspath(keep):
+            try:
+                if os.path.isdir(old_sidecar):
+                    shutil.rmtree(old_sidecar)
+                else:
+                    os.remove(old_sidecar)
+            except OSError:
+                pass
+
+
+def _apply_types(df: pd.DataFrame) -> pd.DataFrame:
+    if 'Date' in df.columns:
+        df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
+    return apply_schema(df)
+
+
+def read_csv_typed(path: str) -> pd.DataFrame:
+    """
+    Reads a CSV file, parses the 'Date' column (if present) into datetime
+    and applies the compact traffic violation dtypes.
+    """
+    return _apply_types(pd.read_csv(path))
+
+
+def read_csv_rows(path: str, first_byte: int, end_byte: int) -> pd.DataFrame:
+    """
+    Reads only the rows stored between two byte offsets of a CSV file (e.g. the rows appended by a change,
+    see dataset_catalog.record_change), typed and prepared like the loaded dataset.
+
+    Args:
+        path (str): Path of the CSV file.
+        first_byte (int): Offset of the first row to read, at the start of a line.
+        end_byte (int): Offset after the last row to read.
+
+    Returns:
+        pd.DataFrame: The prepared rows, with the columns of the file header.
+    """
+    with open(path, "rb") as file:
+        columns = pd.read_csv(file, nrows=0).columns.tolist()
+        file.seek(first_byte)
+        data = file.read(max(0, end_byte - first_byte))
+    if data.strip():
+        df = pd.read_csv(io.BytesIO(data), header=None, names=columns)
+    else:
+        df = pd.DataFrame({col: pd.Series(dtype=object) for col in columns})
+    return prepare_dataset(_apply_types(df))
+
+
+def _to_pandas(table: pa.Table) -> pd.DataFrame:
+    # split_blocks keeps one block per column so pandas does not consolidate (copy) the mapped buffers
+    return table.to_pandas(split_blocks=True, types_mapper=ARROW_STRING_DTYPES.get)
+
+
+def read_sidecar(sidecar_path: str) -> pd.DataFrame:
+    """
+    Opens a single Arrow IPC file memory-mapped and wraps it in a DataFrame.
+
+    Numeric, datetime and text columns reference the mapped file pages directly (zero-copy),
+    only the Categorical codes are materialized in process memory. The returned columns are
+    read-only, which is fine because the shared frame is never modified (Copy-on-Write).
+    """
+    with pa.memory_map(sidecar_path, "r") as source:
+        table = pa.ipc.open_file(source).read_all()
+    return _to_pandas(table)
+
+
+def read_partitions(sidecar_path: str, years: tuple = None) -> pd.DataFrame:
+    """
+    Opens the partition files of a sidecar folder memory-mapped and combines them into one DataFrame.
+
+    Args:
+        sidecar_path (str): The sidecar folder.
+        years (tuple): Optional (first, last) year range. Only the files of those years are opened,
+                       the rows without a year are only part of the unfiltered dataset.
+
+    Returns:
+        pd.DataFrame: The rows of the selected years, in year order.
+    """
+    partitions = list_partitions(sidecar_path)
+    if not partitions:
+        raise FileNotFoundError(f"No partition files in {sidecar_path}")
+    if years is None:
+        selected = list(partitions.values())
+    else:
+        selected = [file_path for year, file_path in partitions.items() if year is not None and years[0] <= year <= years[1]]
+
+    tables = []
+    for file_path in selected or [next(iter(partitions.values()))]:
+        with pa.memory_map(file_path, "r") as source:
+            tables.append(pa.ipc.open_file(source).read_all())
+    if not selected:
+        # No matching year: an empty frame that still has the columns and categories of the dataset
+        tables = [tables[0].slice(0, 0)]
+    return _to_pandas(pa.concat_tables(tables))
+
+
+def _filter_years(df: pd.DataFrame, years: tuple) -> pd.DataFrame:
+    """
+    Applies a (first, last) year range to a frame that could not be stored as a sidecar.
+    """
+    if years is None:
+        return df
+    if PARTITION_COLUMN not in df.columns:
+        return df.iloc[0:0]
+    return df[df[PARTITION_COLUMN].between(years[0], years[1])]
+
+
+def _write_partitions(df: pd.DataFrame, sidecar_path: str) -> None:
+    """
+    Writes a prepared dataset as one uncompressed Arrow IPC file per year into the sidecar folder.
+    The folder is written under a temporary name first so that other processes never read a partial sidecar.
+    """
+    # One schema for all files, so the partitions can be concatenated (Categoricals keep all their categories)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    if PARTITION_COLUMN in table.column_names:
+        year_column = table[PARTITION_COLUMN]
+        years = [year for year in pc.unique(year_column).to_pylist() if year is not None]
+        parts = {year: table.filter(pc.equal(year_column, year)) for year in sorted(years)}
+        undated = table.filter(pc.is_null(year_column))
+        if undated.num_rows or not parts:
+            parts[None] = undated
+    else:
+        parts = {None: table}
+
+    tmp_path = f"{sidecar_path}.{os.getpid()}.tmp"
+    os.makedirs(tmp_path, exist_ok=True)
+    try:
+        for year, part in parts.items():
+            # Uncompressed, so the file can be mapped and used without decoding
+            feather.write_feather(part, get_partition_path(tmp_path, year), compression="uncompressed")
+        os.replace(tmp_path, sidecar_path)
+    except OSError:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        # Another process may have stored the same sidecar in the meantime
+        if not os.path.isdir(sidecar_path):
+            raise
+
+
+def _build_sidecar(path: str, sidecar_path: str, years: tuple = None) -> pd.DataFrame:
+    """
+    Parses and prepares the CSV file (see data_prepare) and stores it as a year-partitioned sidecar folder.
+    """
+    staged_path = get_staged_path(path)
+    df = None
+    if os.path.exists(staged_path):
+        try:
+            # Already type-coerced during the upload, only the compact dtypes are left to apply
+            df = apply_schema(read_sidecar(staged_path))
+        except Exception:
+            logger.exception("Could not read staged copy %s, parsing the CSV", staged_path)
+    if df is None:
+        df = read_csv_typed(path)
+    df = prepare_dataset(df)
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        _write_partitions(df, sidecar_path)
+        _remove_stale_sidecars(path, keep=sidecar_path)
+    except Exception as e:
+        # Mixed-type object columns cannot always be stored in Arrow, the CSV result is still usable
+        logger.warning("Could not write sidecar for %s: %s", path, e, exc_info=True)
+        return _filter_years(df, years)
+    # Hand out the mapped version so this process shares its pages with the others as well
+    try:
+        df = read_partitions(sidecar_path, years)
+        _mapped_sidecars[path] = sidecar_path
+    except Exception as e:
+        logger.warning("Could not map sidecar %s: %s", sidecar_path, e, exc_info=True)
+        df = _filter_years(df, years)
+    return df
+
+
+def load_dataset(path: str, years: tuple = None) -> pd.DataFrame:
+    """
+    Loads a CSV dataset through its memory-mapped, year-partitioned sidecar.
+
+    On the first load (or after the CSV changed) the CSV is parsed and the sidecar is (re)built,
+    afterwards the sidecar is read directly with the dates parsed and the derived columns in place.
+
+    Args:
+        path (str): Path of the CSV file.
+        years (tuple): Optional (first, last) year range, only the partitions of those years are read.
+
+    Returns:
+        pd.DataFrame: The loaded and prepared dataset (the rows of the selected years).
+    """
+    sidecar_path = get_sidecar_path(path)
+    if os.path.isdir(sidecar_path):
+        try:
+            df = read_partitions(sidecar_path, years)
+            _mapped_sidecars[path] = sidecar_path
+            return df
+        except Exception as e:
+            logger.warning("Could not read sidecar %s, rebuilding: %s", sidecar_path, e, exc_info=True)
+            shutil.rmtree(sidecar_path, ignore_errors=True)
+    return _build_sidecar(path, sidecar_path, years)
+
+
+def get_dataset_partitions(path: str) -> list:
+    """
+    Returns the partitions of a dataset: its years in order, followed by None when some rows have no year.
+    The sidecar is built first if needed, afterwards only the file names are read.
+    """
+    sidecar_path = get_sidecar_path(path)
+    if not os.path.isdir(sidecar_path):
+        df = load_dataset(path)
+        if not os.path.isdir(sidecar_path):
+            if PARTITION_COLUMN not in df.columns:
+                return [None]
+            years = sorted(int(year) for year in df[PARTITION_COLUMN].dropna().unique())
+            return years + [None] if df[PARTITION_COLUMN].isna().any() else years
+    return list(list_partitions(sidecar_path))
+
+
+def get_partition_files(path: str, years: tuple = None) -> list:
+    """
+    Returns the sidecar files of a dataset for an optional (first, last) year range, for readers
+    that scan the files themselves (see query_backend). The sidecar is built first if needed.
+
+    Raises:
+        FileNotFoundError: When the dataset could not be stored as a sidecar.
+    """
+    sidecar_path = get_sidecar_path(path)
+    if not os.path.isdir(sidecar_path):
+        load_dataset(path)
+    partitions = list_partitions(sidecar_path)
+    if not partitions:
+        raise FileNotFoundError(f"No sidecar for {path}")
+    if years is None:
+        return list(partitions.values())
+    return [file_path for year, file_path in partitions.items() if year is not None and years[0] <= year <= years[1]]
+
+
+def get_dataset_schema(path: str) -> pd.DataFrame:
+    """
+    Returns a zero-row frame with the columns and dtypes (including the categories) of the loaded dataset.
+    """
+    sidecar_path = get_sidecar_path(path)
+    if not os.path.isdir(sidecar_path):
+        return load_dataset(path).iloc[0:0]
+    # An empty year range selects no file, only the schema of the dataset is read
+    return read_partitions(sidecar_path, years=(1, 0))
+
+
+# ---------------------------------------------------------
+# MEMORY REPORT
+# ---------------------------------------------------------
+SMAPS_HEADER = re.compile(r"^[0-9a-f]+-[0-9a-f]+ ")
+
+def _read_smaps(smaps_path: str, mapped_prefix: str = None) -> dict:
+    """
+    Sums the kB counters of /proc/<pid>/smaps(_rollup), optionally only for the mappings of the
+    files whose path starts with mapped_prefix.
+    """
+    totals = {}
+    in_mapping = mapped_prefix is None
+    with open(smaps_path) as smaps:
+        for line in smaps:
+            if SMAPS_HEADER.match(line):
+                # Mapping header line: "<address range> <perms> <offset> <dev> <inode> [path]"
+                if mapped_prefix is not None:
+                    fields = line.rstrip("\n").split(maxsplit=5)
+                    in_mapping = len(fields) == 6 and fields[5].startswith(mapped_prefix)
+                continue
+            key, _, value = line.partition(":")
+            if in_mapping and value.strip().endswith("kB"):
+                totals[key] = totals.get(key, 0) + int(value.split()[0])
+    return totals
+
+
+def get_mapped_memory_usage() -> pd.DataFrame:
+    """
+    Reports how much of every memory-mapped dataset is resident in this process and how much
+    of it is shared with other processes. Only available on Linux (reads /proc/self/smaps).
+
+    Returns:
+        pd.DataFrame: One row per dataset with sizes in MB, empty when not available.
+    """
+    if not os.path.exists("/proc/self/smaps"):
+        return pd.DataFrame()
+
+    rows = []
+    for path, sidecar_path in list(_mapped_sidecars.items()):
+        if not os.path.isdir(sidecar_path):
+            continue
+        usage = _read_smaps("/proc/self/smaps", os.path.join(os.path.abspath(sidecar_path), ""))
+        stored_bytes = sum(os.path.getsize(file_path) for file_path in list_partitions(sidecar_path).values())
+        rows.append({
+            'Dataset': os.path.basename(path),
+            'Stored (MB)': round(stored_bytes / 1024**2, 1),
+            'Resident (MB)': round(usage.get('Rss', 0) / 1024, 1),
+            'Shared (MB)': round((usage.get('Shared_Clean', 0) + usage.get('Shared_Dirty', 0)) / 1024, 1),
+            'Private (MB)': round((usage.get('Private_Clean', 0) + usage.get('Private_Dirty', 0)) / 1024, 1),
+        })
+    return pd.DataFrame(rows)
+
+
+def get_process_memory_usage() -> dict:
+    """
+    Returns the resident and shared memory of the whole process in MB (Linux only, else an empty dict).
+    """
+    if not os.path.exists("/proc/self/smaps_rollup"):
+        return {}
+    usage = _read_smaps("/proc/self/smaps_rollup")
+    return {
+        'resident_mb': round(usage.get('Rss', 0) / 1024, 1),
+        'shared_mb': round((usage.get('Shared_Clean', 0) + usage.get('Shared_Dirty', 0)) / 1024, 1),
+    }
@@ -0,0 +1,161 @@
+import numpy as np
+import pandas as pd
+
+from core.data_schema import to_compact_integer, ID_COLUMNS
+from core import severity
+
+# This module derives the analysis columns (time parts, speeding, age and alcohol bins) once per dataset.
+# Pages and plots read these columns from the prepared frame instead of parsing 'Date'/'Time' again.
+# Prepared datasets are sorted by 'Event_Time' (int64 nanosecond timestamps, undated rows last), so a date
+# range is two binary searches and a contiguous slice of the frame (see get_date_range).
+
+# ---------------------------------------------------------
+# DERIVED COLUMNS
+# ---------------------------------------------------------
+# Added by prepare_dataset(), they are not part of the source CSV
+DERIVED_COLUMNS = [
+    'Event_Time', 'Year', 'Month', 'Hour', 'DayOfWeek',
+    'Excess_Speed', 'Age_Group', 'Alcohol_Range', severity.SEVERITY_COLUMN,
+]
+
+MONTH_ORDER = ["January", "February", "March", "April", "May", "June",
+               "July", "August", "September", "October", "November", "December"]
+DAY_ORDER = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+AGE_GROUP_BINS = [0, 25, 35, 45, 60, 100]
+AGE_GROUP_LABELS = ["18-25", "26-35", "36-45", "46-60", "60+"]
+
+# The last edge is widened to the highest recorded level so every reading gets a label
+ALCOHOL_RANGE_BINS = [0, 0.03, 0.08, 0.15, 0.25, 0.251]
+ALCOHOL_RANGE_LABELS = ['Safe', 'Mild', 'Risky', 'High Risk', 'Dangerous']
+
+
+# ==================================================================================
+def parse_time_of_day(time_values: pd.Series) -> pd.Series:
+    """
+    Parses 'HH:MM' or 'HH:MM:SS' strings into a Timedelta since midnight (NaT when invalid).
+    """
+    text = time_values.astype("string").str.strip()
+    # to_timedelta() needs the seconds, add them to 'HH:MM' values
+    text = text.where(text.str.count(':') != 1, text + ':00')
+    return pd.to_timedelta(text, errors='coerce')
+# -------------------------------------------------------------------------------
+def _ordered_categorical(codes: pd.Series, categories: list) -> pd.Categorical:
+    """
+    Builds an ordered Categorical from zero-based codes (missing codes become NaN).
+    """
+    codes = codes.fillna(-1).astype("int8").to_numpy()
+    return pd.Categorical.from_codes(codes, categories=categories, ordered=True)
+# -------------------------------------------------------------------------------
+def get_alcohol_range_bins(alcohol_level: pd.Series) -> list:
+    """
+    Returns the Alcohol_Range bin edges with the last edge covering the highest recorded level.
+    """
+    max_alcohol = alcohol_level.max()
+    upper = ALCOHOL_RANGE_BINS[-1] if pd.isna(max_alcohol) else max(ALCOHOL_RANGE_BINS[-1], float(max_alcohol))
+    return ALCOHOL_RANGE_BINS[:-1] + [upper]
+
+
+# ==================================================================================
+def prepare_dataset(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Adds the derived analysis columns to a loaded dataset. Columns are only added when their
+    source columns are present, so any CSV can be prepared.
+
+    - Event_Time: 'Date' combined with the time of day from 'Time' (midnight when 'Time' is invalid)
+    - Year, Month, DayOfWeek: calendar parts of 'Date' (Month and DayOfWeek are ordered Categoricals)
+    - Hour: hour of the day from 'Time'
+    - Excess_Speed: 'Recorded_Speed' - 'Speed_Limit'
+    - Age_Group, Alcohol_Range: binned 'Driver_Age' and 'Alcohol_Level'
+    - Violation_Severity_Score: severity score with the default weights (see severity.SEVERITY_WEIGHTS)
+
+    Args:
+        df (pd.DataFrame): Dataset with 'Date' already parsed to datetime (see data_loader).
+
+    Returns:
+        pd.DataFrame: A new DataFrame with the derived columns (the input frame is not modified),
+                      its rows sorted by 'Event_Time' when the dates are available.
+    """
+    derived = {}
+
+    time_of_day = None
+    if 'Time' in df.columns:
+        time_of_day = parse_time_of_day(df['Time'])
+        derived['Hour'] = to_compact_integer(time_of_day.dt.seconds // 3600, 'int8')
+
+    if 'Date' in df.columns and pd.api.types.is_datetime64_any_dtype(df['Date']):
+        dates = df['Date']
+        day_start = dates.dt.normalize()
+        derived['Event_Time'] = day_start if time_of_day is None else day_start + time_of_day.fillna(pd.Timedelta(0))
+        derived['Year'] = to_compact_integer(dates.dt.year, 'int16')
+        derived['Month'] = _ordered_categorical(dates.dt.month - 1, MONTH_ORDER)
+        derived['DayOfWeek'] = _ordered_categorical(dates.dt.dayofweek, DAY_ORDER)
+
+    if all(col in df.columns and pd.api.types.is_numeric_dtype(df[col]) for col in ['Recorded_Speed', 'Speed_Limit']):
+        derived['Excess_Speed'] = df['Recorded_Speed'] - df['Speed_Limit']
+
+    if 'Driver_Age' in df.columns and pd.api.types.is_numeric_dtype(df['Driver_Age']):
+        derived['Age_Group'] = pd.cut(df['Driver_Age'], bins=AGE_GROUP_BINS, labels=AGE_GROUP_LABELS, include_lowest=True)
+
+    if 'Alcohol_Level' in df.columns and pd.api.types.is_numeric_dtype(df['Alcohol_Level']):
+        # Alcohol_Level is stored as float32, round it back so values on a bin edge (e.g. 0.15) stay in the same bin
+        alcohol_level = df['Alcohol_Level'].astype("float64").round(6)
+        derived['Alcohol_Range'] = pd.cut(alcohol_level, bins=get_alcohol_range_bins(alcohol_level),
+                                          labels=ALCOHOL_RANGE_LABELS, include_lowest=True)
+
+    if any(col in df.columns for col in severity.SOURCE_COLUMNS):
+        derived[severity.SEVERITY_COLUMN] = severity.severity_scores(df)
+
+    df = df.assign(**derived)
+    if 'Event_Time' in df.columns:
+        # Stable, so the rows of the same time keep their file order
+        df = df.sort_values('Event_Time', kind='stable', na_position='last', ignore_index=True)
+    return df
+# -------------------------------------------------------------------------------
+def get_date_range(df: pd.DataFrame, start_date=None, end_date=None) -> pd.DataFrame:
+    """
+    Returns the rows dated from start_date to end_date (both days included, None for an open end).
+
+    The rows of a prepared dataset (and of any frame filtered from it) are sorted by 'Event_Time', so the
+    range is found with two np.searchsorted calls in O(log n) and returned as a slice (a view, no copy).
+    Frames without 'Event_Time' are filtered with a 'Date' mask.
+
+    Args:
+        df (pd.DataFrame): The rows, in prepared dataset order.
+        start_date, end_date (date, str or Timestamp): First and last day of the range.
+
+    Returns:
+        pd.DataFrame: The rows of the range (undated rows are never part of it).
+    """
+    start = None if start_date is None else pd.Timestamp(start_date).normalize()
+    # Everything before the day after end_date, whatever the time of day
+    end = None if end_date is None else pd.Timestamp(end_date).normalize() + pd.Timedelta(days=1)
+
+    if 'Event_Time' in df.columns and pd.api.types.is_datetime64_any_dtype(df['Event_Time']):
+        times = df['Event_Time'].to_numpy()
+        # NaT sorts after every timestamp, searching for it finds the end of the dated rows
+        first = 0 if start is None else np.searchsorted(times, start.to_datetime64(), side='left')
+        last = np.searchsorted(times, np.datetime64('NaT') if end is None else end.to_datetime64(), side='left')
+        return df.iloc[first:max(first, last)]
+
+    dates = df['Date']
+    mask = dates.notna()
+    if start is not None:
+        mask &= dates >= start
+    if end is not None:
+        mask &= dates < end
+    return df[mask]
+# -------------------------------------------------------------------------------
+def drop_derived_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Returns the DataFrame with only its source columns, for column pickers, views and downloads.
+    """
+    return df.drop(columns=[col for col in DERIVED_COLUMNS if col in df.columns])
+# -------------------------------------------------------------------------------
+def get_measure_columns(df: pd.DataFrame) -> list:
+    """
+    Returns the numeric source columns that can be aggregated or plotted as values:
+    the derived columns and the integer-stored IDs (see data_schema.ID_COLUMNS) are left out.
+    """
+    numeric_cols = drop_derived_columns(df).select_dtypes(include=['number']).columns
+    return [col for col in numeric_cols if col not in ID_COLUMNS]
@@ -0,0 +1,213 @@
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from core import data_variables as dv
+
+# This module describes the compact in-memory types of the traffic violation columns.
+# Closed vocabularies become pandas Categoricals and numbers use the smallest fitting width.
+# Identifiers like 'VLT000123' are stored as their number, the prefix is declared here and
+# added back only when the IDs are shown or exported (see format_id_columns).
+
+def _unique(*value_lists) -> list:
+    """
+    Merges the given lists into one list of unique values, keeping the first-seen order.
+    """
+    merged = []
+    for values in value_lists:
+        merged.extend(values)
+    return list(dict.fromkeys(merged))
+
+YES_NO_NA = ["Yes", "No", "NA"]
+
+
+class PrefixedId(NamedTuple):
+    """
+    An identifier column stored as an integer: the text ID is the prefix followed by the number,
+    zero-padded to at least width digits (e.g. 'VLT000123' for 123 with prefix 'VLT' and width 6).
+    """
+    prefix: str
+    width: int
+    dtype: str
+
+VIOLATION_ID = PrefixedId("VLT", 6, 'int32')
+OFFICER_ID = PrefixedId("OFF", 4, 'int16')
+
+# ---------------------------------------------------------
+# TRAFFIC VIOLATION SCHEMA
+# ---------------------------------------------------------
+# A list means a categorical column with those known categories, a string is the target numeric dtype,
+# a PrefixedId an identifier stored as its number.
+# Columns mapped to None are kept as loaded ('Date' is parsed by the loader).
+TRAFFIC_VIOLATION_SCHEMA = {
+    'Violation_ID': VIOLATION_ID,
+    'Violation_Type': _unique(dv.violation_types_list, dv.vehicle_types_mapping, dv.fine_mapping),
+    'Fine_Amount': 'int32',
+    'Location': _unique(dv.states_list, dv.indian_states_coordinates),
+    'Date': None,
+    'Time': None,
+    'Vehicle_Type': _unique(dv.vehicle_types_list, dv.seatbelt_worn_mapping),
+    'Vehicle_Color': _unique(dv.vehicle_colors_list),
+    'Vehicle_Model_Year': 'int16',
+    'Registration_State': _unique(dv.states_list, dv.indian_states_coordinates),
+    'Driver_Age': 'int8',
+    'Driver_Gender': _unique(dv.driver_genders_list),
+    'License_Type': _unique(dv.license_types_list),
+    'Penalty_Points': 'int8',
+    'Weather_Condition': _unique(dv.weather_conditions_list),
+    'Road_Condition': _unique(dv.road_conditions_list),
+    'Officer_ID': OFFICER_ID,
+    'Issuing_Agency': _unique(dv.issuing_agencies_list),
+    'License_Validity': _unique(dv.license_validity_list),
+    'Number_of_Passengers': 'int8',
+    'Helmet_Worn': YES_NO_NA,
+    'Seatbelt_Worn': YES_NO_NA,
+    'Traffic_Light_Status': ["Red", "Green", "Yellow"],
+    'Speed_Limit': 'int16',
+    'Recorded_Speed': 'int16',
+    'Alcohol_Level': 'float32',
+    'Breathalyzer_Result': _unique(dv.breathalyzer_results_list),
+    'Towed': YES_NO_NA,
+    'Fine_Paid': YES_NO_NA,
+    'Payment_Method': ['Cash', 'UPI', 'Online', 'Card', 'Pending', 'NA'],
+    'Court_Appearance_Required': YES_NO_NA,
+    'Previous_Violations': 'int16',
+    'Comments': _unique(dv.comments_list),
+}
+
+# Identifier columns, they are not measures even when stored as integers
+ID_COLUMNS = [col for col, spec in TRAFFIC_VIOLATION_SCHEMA.items() if isinstance(spec, PrefixedId)]
+
+# Wider integer types tried in order when a column does not fit its declared width
+INTEGER_WIDTHS = ['int8', 'int16', 'int32', 'int64']
+
+
+# ==================================================================================
+def to_compact_integer(series: pd.Series, dtype: str) -> pd.Series:
+    """
+    Casts an integer-valued column to the declared width, widening it when values do not fit.
+    Columns with missing, fractional or non-numeric values are returned unchanged.
+    """
+    if not pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+        return series
+    if series.isna().any():
+        return series
+    if pd.api.types.is_float_dtype(series) and not np.array_equal(series.to_numpy(), np.floor(series.to_numpy())):
+        return series
+    if series.empty:
+        return series.astype(dtype)
+
+    min_value, max_value = series.min(), series.max()
+    for width in INTEGER_WIDTHS[INTEGER_WIDTHS.index(dtype):]:
+        limits = np.iinfo(width)
+        if limits.min <= min_value and max_value <= limits.max:
+            return series.astype(width)
+    return series
+# -------------------------------------------------------------------------------
+def to_compact_float(series: pd.Series, dtype: str) -> pd.Series:
+    """
+    Casts a numeric column to the declared float width. Non-numeric columns are returned unchanged.
+    """
+    if not pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+        return series
+    return series.astype(dtype)
+# -------------------------------------------------------------------------------
+def to_known_categorical(series: pd.Series, known_categories: list) -> pd.Series:
+    """
+    Converts a text column into a Categorical.
+
+    Known categories come first (in schema order), values outside the vocabulary are appended
+    as extra categories so nothing is lost. Categories that never occur are dropped.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        series = series.astype(object)
+    if not (pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series)):
+        return series
+
+    observed = set(series.dropna().unique())
+    categories = [value for value in known_categories if value in observed]
+    extras = sorted(observed.difference(categories), key=str)
+    return series.astype(pd.CategoricalDtype(categories + extras))
+# -------------------------------------------------------------------------------
+def to_prefixed_id(series: pd.Series, spec: PrefixedId) -> pd.Series:
+    """
+    Converts a text ID column into its numbers (compact integer width), when every value is the prefix
+    followed by digits and formatting the numbers gives back the same text. Other columns are returned unchanged.
+    """
+    if pd.api.types.is_integer_dtype(series):
+        return to_compact_integer(series, spec.dtype)
+    if not (pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series)) or series.isna().any():
+        return series
+    try:
+        text = pa.array(series, type=pa.string(), from_pandas=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return series
+    if not pc.all(pc.match_substring_regex(text, f"^{spec.prefix}[0-9]+$"), min_count=0).as_py():
+        return series
+    numbers = pc.cast(pc.utf8_slice_codeunits(text, len(spec.prefix)), pa.int64())
+    # 'VLT0000123' or 'VLT123' would not be written back the same way
+    if not pc.all(pc.equal(_format_ids(numbers, spec), text), min_count=0).as_py():
+        return series
+    return to_compact_integer(pd.Series(numbers.to_numpy(), index=series.index, name=series.name), spec.dtype)
+# -------------------------------------------------------------------------------
+def _format_ids(numbers: pa.Array, spec: PrefixedId) -> pa.Array:
+    padded = pc.utf8_lpad(pc.cast(numbers, pa.string()), width=spec.width, padding="0")
+    return pc.binary_join_element_wise(spec.prefix, padded, "")
+# -------------------------------------------------------------------------------
+def format_prefixed_ids(numbers, spec: PrefixedId) -> pd.Series:
+    """
+    Formats ID numbers as their text IDs (Arrow string kernels, no Python string per row is built).
+
+    Args:
+        numbers (pd.Series or np.ndarray): The ID numbers, missing values stay missing.
+        spec (PrefixedId): Prefix and width of the IDs.
+
+    Returns:
+        pd.Series: The text IDs (string[pyarrow]), with the index of numbers when it is a Series.
+    """
+    index = numbers.index if isinstance(numbers, pd.Series) else None
+    formatted = _format_ids(pa.array(numbers, type=pa.int64(), from_pandas=True), spec)
+    return pd.Series(formatted, index=index, dtype=pd.StringDtype("pyarrow"), name=getattr(numbers, "name", None))
+# -------------------------------------------------------------------------------
+def format_id_columns(df: pd.DataFrame, schema: dict = TRAFFIC_VIOLATION_SCHEMA) -> pd.DataFrame:
+    """
+    Returns the DataFrame with its integer ID columns formatted as text IDs, for tables, plots and downloads.
+    Call it on the rows that are shown, the stored dataset keeps the numbers.
+    """
+    formatted = {
+        col: format_prefixed_ids(df[col], spec)
+        for col, spec in schema.items()
+        if isinstance(spec, PrefixedId) and col in df.columns and pd.api.types.is_integer_dtype(df[col])
+    }
+    return df.assign(**formatted) if formatted else df
+
+
+# ==================================================================================
+def apply_schema(df: pd.DataFrame, schema: dict = TRAFFIC_VIOLATION_SCHEMA) -> pd.DataFrame:
+    """
+    Applies the compact dtypes of the schema to every matching column of the DataFrame.
+    Columns that are not part of the schema, or do not match the expected kind of values, are kept as they are.
+
+    Args:
+        df (pd.DataFrame): The loaded dataset.
+        schema (dict): Column name -> category list, numeric dtype or PrefixedId.
+
+    Returns:
+        pd.DataFrame: A new DataFrame with compact column types (the input frame is not modified).
+    """
+    converted = {}
+    for col, spec in schema.items():
+        if col not in df.columns or spec is None:
+            continue
+        if isinstance(spec, list):
+            converted[col] = to_known_categorical(df[col], spec)
+        elif isinstance(spec, PrefixedId):
+            converted[col] = to_prefixed_id(df[col], spec)
+        elif spec.startswith('int'):
+            converted[col] = to_compact_integer(df[col], spec)
+        elif spec.startswith('float'):
+            converted[col] = to_compact_float(df[col], spec)
+    return df.assign(**converted)
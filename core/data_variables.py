@@ -1,5 +1,9 @@
 import random
 
+# The mappings below whose values are drawn at random are built by draw_<mapping>(rng) functions and drawn
+# once with the global random module when this module is imported. data_generator draws them again with
+# a random.Random seeded from its master seed (see draw_mappings), so a seed gives the same dataset in every process.
+
 # ====================================================================================
 # General Data Definations
 # ====================================================================================
@@ -47,35 +51,43 @@ vehicle_types_mapping = {
 
 # -------------------- VEHICLE SAFETY MAPPING -----------------------
 
-seatbelt_worn_mapping = {
-    "Car": random.choice(['Yes', 'No']),
-    "Motorcycle": 'NA',
-    "Truck": random.choice(['Yes', 'No']),
-    "Bus": random.choice(['Yes', 'No']),
-    "Auto-Rickshaw": 'NA',
-    "Bicycle": 'NA',
-    "Van": random.choice(['Yes', 'No']),  
-    "Pickup": random.choice(['Yes', 'No']),
-    "Electric Scooter": 'NA',
-    "Tractor": 'NA',         
-    "E-Rickshaw": 'NA',
-    "Scooty": 'NA'
-}
+def draw_seatbelt_worn_mapping(rng=random) -> dict:
+    # Seatbelt worn by vehicle type ('NA' for vehicles without seatbelts)
+    return {
+        "Car": rng.choice(['Yes', 'No']),
+        "Motorcycle": 'NA',
+        "Truck": rng.choice(['Yes', 'No']),
+        "Bus": rng.choice(['Yes', 'No']),
+        "Auto-Rickshaw": 'NA',
+        "Bicycle": 'NA',
+        "Van": rng.choice(['Yes', 'No']),  
+        "Pickup": rng.choice(['Yes', 'No']),
+        "Electric Scooter": 'NA',
+        "Tractor": 'NA',         
+        "E-Rickshaw": 'NA',
+        "Scooty": 'NA'
+    }
 
-helmet_worn_mapping = {
-    "Car" : "NA",
-    "Motorcycle" : random.choice(["Yes", "No"]),
-    "Truck" : "NA",
-    "Bus" : "NA",
-    "Auto-Rickshaw" : "NA",
-    "Bicycle" : random.choice(["Yes", "No"]),
-    "Van" : "NA",
-    "Pickup" : "NA",
-    "Electric Scooter" : random.choice(["Yes", "No"]),
-    "Tractor" : "NA",
-    "E-Rickshaw" : "NA",
-    "Scooty" : random.choice(["Yes", "No"])
-}
+seatbelt_worn_mapping = draw_seatbelt_worn_mapping()
+
+def draw_helmet_worn_mapping(rng=random) -> dict:
+    # Helmet worn by vehicle type ('NA' for vehicles without helmets)
+    return {
+        "Car" : "NA",
+        "Motorcycle" : rng.choice(["Yes", "No"]),
+        "Truck" : "NA",
+        "Bus" : "NA",
+        "Auto-Rickshaw" : "NA",
+        "Bicycle" : rng.choice(["Yes", "No"]),
+        "Van" : "NA",
+        "Pickup" : "NA",
+        "Electric Scooter" : rng.choice(["Yes", "No"]),
+        "Tractor" : "NA",
+        "E-Rickshaw" : "NA",
+        "Scooty" : rng.choice(["Yes", "No"])
+    }
+
+helmet_worn_mapping = draw_helmet_worn_mapping()
 
 # ------------------------- VEHICLE TYPES ---------------------------
 vehicle_types_list = [
@@ -94,20 +106,24 @@ vehicle_types_list = [
 ]
 
 # ----------------------------- FINE MAP -----------------------------
-fine_mapping = {
-    "Overspeeding": random.randint(1000, 4000),
-    "Drunk Driving": random.randint(1000, 1500),
-    "Wrong Lane": random.randint(500, 5000),
-    "Red Light Violation": random.randint(1000, 5000),
-    "No Parking": random.randint(500, 1500),
-    "Seatbelt Violation": random.randint(1000, 5000),
-    "Helmet Violation": random.randint(1000, 5000),
-    "Mobile Phone Usage": random.randint(1000, 5000),
-    "Overloading": random.randint(1000, 5000),
-    "Illegal U Turn": random.randint(500, 1000),
-    "Driving Without License": random.randint(1000, 5000),
-    # "Hit and Run": random.choice([100000, 200000, 300000, 400000, 500000, 600000, 700000, 800000, 900000]),
-}
+def draw_fine_mapping(rng=random) -> dict:
+    # Fine amount by violation type
+    return {
+        "Overspeeding": rng.randint(1000, 4000),
+        "Drunk Driving": rng.randint(1000, 1500),
+        "Wrong Lane": rng.randint(500, 5000),
+        "Red Light Violation": rng.randint(1000, 5000),
+        "No Parking": rng.randint(500, 1500),
+        "Seatbelt Violation": rng.randint(1000, 5000),
+        "Helmet Violation": rng.randint(1000, 5000),
+        "Mobile Phone Usage": rng.randint(1000, 5000),
+        "Overloading": rng.randint(1000, 5000),
+        "Illegal U Turn": rng.randint(500, 1000),
+        "Driving Without License": rng.randint(1000, 5000),
+        # "Hit and Run": rng.choice([100000, 200000, 300000, 400000, 500000, 600000, 700000, 800000, 900000]),
+    }
+
+fine_mapping = draw_fine_mapping()
 
 # --------------- VEHICLE SAFETY MAPPING -----------
 vehicle_colors_list = [
@@ -121,21 +137,25 @@ driver_genders_list = [
     "Male", "Male", "Male", "Female", "Other"
 ]
 
-no_of_passengers_mapping = {
-    # It will based on vehicle type
-    "Car": random.randint(0, 4),
-    "Motorcycle": random.randint(0, 2),
-    "Truck": random.randint(0, 3),
-    "Bus": random.randint(0, 50),
-    "Auto-Rickshaw": random.randint(0, 3),
-    "Bicycle": random.randint(0, 1),
-    "Van": random.randint(0, 8),
-    "Pickup": random.randint(0, 5),
-    "Electric Scooter": random.randint(0, 2),
-    "Tractor": random.randint(0, 1),
-    "E-Rickshaw": random.randint(0, 4),
-    "Scooty": random.randint(0, 2)
-}
+def draw_no_of_passengers_mapping(rng=random) -> dict:
+    # Number of passengers by vehicle type
+    return {
+        # It will based on vehicle type
+        "Car": rng.randint(0, 4),
+        "Motorcycle": rng.randint(0, 2),
+        "Truck": rng.randint(0, 3),
+        "Bus": rng.randint(0, 50),
+        "Auto-Rickshaw": rng.randint(0, 3),
+        "Bicycle": rng.randint(0, 1),
+        "Van": rng.randint(0, 8),
+        "Pickup": rng.randint(0, 5),
+        "Electric Scooter": rng.randint(0, 2),
+        "Tractor": rng.randint(0, 1),
+        "E-Rickshaw": rng.randint(0, 4),
+        "Scooty": rng.randint(0, 2)
+    }
+
+no_of_passengers_mapping = draw_no_of_passengers_mapping()
 
 license_types_list = [
     "Learner", 
@@ -159,11 +179,15 @@ breathalyzer_results_list = [
     "Not Applied", "Not Applied", "Not Applied", "Not Applied", "Not Applied"
 ]
 
-alcohol_levels_mapping = {    
-    "Positive": round(random.uniform(0.08, 0.40), 2), # Legal limit is often 0.08% in many places
-    "Negative": round(random.uniform(0.00, 0.07), 2),
-    "Not Applied": 0.00
-}
+def draw_alcohol_levels_mapping(rng=random) -> dict:
+    # Alcohol level by breathalyzer result
+    return {    
+        "Positive": round(rng.uniform(0.08, 0.40), 2), # Legal limit is often 0.08% in many places
+        "Negative": round(rng.uniform(0.00, 0.07), 2),
+        "Not Applied": 0.00
+    }
+
+alcohol_levels_mapping = draw_alcohol_levels_mapping()
 
 # -------------------- Environament CONDITIONS --------------------
 weather_conditions_list = [
@@ -214,52 +238,64 @@ states_list = [
 
 
 # ========================= Date Filteration =========================
-payment_methods_mapping  = {
-    'Yes' : random.choice([
-        'Cash', 'Cash', 'Cash', 'Cash'
-        'UPI', 'UPI', 'UPI',
-        'Online',
-        'Card', 
-    ]),
-    'No' : 'Pending'
-}
+def draw_payment_methods_mapping(rng=random) -> dict:
+    # Payment method by whether the fine was paid
+    return {
+        'Yes' : rng.choice([
+            'Cash', 'Cash', 'Cash', 'Cash'
+            'UPI', 'UPI', 'UPI',
+            'Online',
+            'Card', 
+        ]),
+        'No' : 'Pending'
+    }
+
+payment_methods_mapping = draw_payment_methods_mapping()
 
 # -------------------------- ACTION TAKEN --------------------------
-towing_mapping = {
-    # High Possibilities
-    "No Parking": random.choice(["Yes", "Yes", "Yes", "Yes", "Yes", "Yes", "Yes", "No", "No", "No"]), # 70% -> Yes, 30% -> No
-    "Hit and Run": random.choice(["Yes", "Yes", "Yes", "Yes", "Yes", "Yes", "Yes", "No", "No", "No"]), # 70% -> Yes, 30% -> No
-    "Drunk Driving": random.choice(["Yes", "Yes", "Yes", "Yes", "Yes", "Yes", "Yes", "No", "No", "No"]), # 70% -> Yes, 30% -> No
-    "Overloading": random.choice(["Yes", "No"]), # 50% -> Yes, 50% -> No
-    "Driving Without License": random.choice(["Yes", "Yes", "Yes", "Yes", "Yes", "Yes", "No", "No", "No", "No"]), # 60% -> Yes, 40% -> No
-
-    # Low Possibilities
-    "Wrong Lane": "No",
-    "Red Light Violation": "No",
-    "Helmet Violation": "No",
-    "Seatbelt Violation": "No",
-    "Mobile Phone Usage": "No",
-    "Illegal U Turn": "No",
-}
+def draw_towing_mapping(rng=random) -> dict:
+    # Towed by violation type
+    return {
+        # High Possibilities
+        "No Parking": rng.choice(["Yes", "Yes", "Yes", "Yes", "Yes", "Yes", "Yes", "No", "No", "No"]), # 70% -> Yes, 30% -> No
+        "Hit and Run": rng.choice(["Yes", "Yes", "Yes", "Yes", "Yes", "Yes", "Yes", "No", "No", "No"]), # 70% -> Yes, 30% -> No
+        "Drunk Driving": rng.choice(["Yes", "Yes", "Yes", "Yes", "Yes", "Yes", "Yes", "No", "No", "No"]), # 70% -> Yes, 30% -> No
+        "Overloading": rng.choice(["Yes", "No"]), # 50% -> Yes, 50% -> No
+        "Driving Without License": rng.choice(["Yes", "Yes", "Yes", "Yes", "Yes", "Yes", "No", "No", "No", "No"]), # 60% -> Yes, 40% -> No
 
-court_mapping = {
-    # --- SERIOUS OFFENSES (Mandatory Court/Magistrate) ---
-    "Hit and Run": random.choice(["Yes", "Yes", "Yes", "No"]), # 60% -> Yes, 40% -> No
-    "Overloading": random.choice(["Yes", "Yes", "No", "No"]), # 50% -> Yes, 50% -> No,
-    "Drunk Driving": random.choice(["Yes", "Yes", "Yes", "No", "No"]), # 60% -> Yes, 40% -> No,
-    "Driving Without License": random.choice(["Yes", "Yes", "Yes", "No", "No"]), # 60% -> Yes, 40% -> No,
+        # Low Possibilities
+        "Wrong Lane": "No",
+        "Red Light Violation": "No",
+        "Helmet Violation": "No",
+        "Seatbelt Violation": "No",
+        "Mobile Phone Usage": "No",
+        "Illegal U Turn": "No",
+    }
+
+towing_mapping = draw_towing_mapping()
+
+def draw_court_mapping(rng=random) -> dict:
+    # Court appearance required by violation type
+    return {
+        # --- SERIOUS OFFENSES (Mandatory Court/Magistrate) ---
+        "Hit and Run": rng.choice(["Yes", "Yes", "Yes", "No"]), # 60% -> Yes, 40% -> No
+        "Overloading": rng.choice(["Yes", "Yes", "No", "No"]), # 50% -> Yes, 50% -> No,
+        "Drunk Driving": rng.choice(["Yes", "Yes", "Yes", "No", "No"]), # 60% -> Yes, 40% -> No,
+        "Driving Without License": rng.choice(["Yes", "Yes", "Yes", "No", "No"]), # 60% -> Yes, 40% -> No,
     
-    # --- STANDARD TRAFFIC VIOLATIONS (Compounding/Spot Fines) ---
-    "Overspeeding": "No",
-    "Red Light Violation": "No",
-    "Wrong Lane": "No", 
-    "No Parking": "No",          
-    "Seatbelt Violation": "No",
-    "Helmet Violation": "No",
-    "Mobile Phone Usage": "No",      
-    "Illegal U Turn": "No",           
-    "Overloading": "No"               
-}
+        # --- STANDARD TRAFFIC VIOLATIONS (Compounding/Spot Fines) ---
+        "Overspeeding": "No",
+        "Red Light Violation": "No",
+        "Wrong Lane": "No", 
+        "No Parking": "No",          
+        "Seatbelt Violation": "No",
+        "Helmet Violation": "No",
+        "Mobile Phone Usage": "No",      
+        "Illegal U Turn": "No",           
+        "Overloading": "No"               
+    }
+
+court_mapping = draw_court_mapping()
 
 comments_list = [
     "First Violation", "First Violation", "First Violation", "First Violation",
@@ -307,4 +343,29 @@ indian_states_coordinates = {
     'Uttar Pradesh': {'latitude': 26.8467, 'longitude': 80.9462},
     'Uttarakhand': {'latitude': 30.0668, 'longitude': 79.0193},
     'West Bengal': {'latitude': 22.9868, 'longitude': 87.8550}
-}
\ No newline at end of file
+}
+
+
+# ====================================================================================
+# Drawn Mappings
+# ====================================================================================
+DRAWN_MAPPINGS = {
+    "seatbelt_worn_mapping": draw_seatbelt_worn_mapping,
+    "helmet_worn_mapping": draw_helmet_worn_mapping,
+    "fine_mapping": draw_fine_mapping,
+    "no_of_passengers_mapping": draw_no_of_passengers_mapping,
+    "alcohol_levels_mapping": draw_alcohol_levels_mapping,
+    "payment_methods_mapping": draw_payment_methods_mapping,
+    "towing_mapping": draw_towing_mapping,
+    "court_mapping": draw_court_mapping,
+}
+
+
+def draw_mappings(rng=random) -> dict:
+    """
+    Draws every mapping of DRAWN_MAPPINGS with rng (a random.Random, the global random module by default).
+
+    Returns:
+        dict: mapping name -> {category: value}.
+    """
+    return {name: draw(rng) for name, draw in DRAWN_MAPPINGS.items()}
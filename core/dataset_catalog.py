@@ -0,0 +1,592 @@
+import os
+import logging
+import io
+import csv
+import json
+import hashlib
+import sqlite3
+from collections import deque
+from datetime import datetime
+
+import pandas as pd
+
+from core import data_loader
+
+logger = logging.getLogger(__name__)
+
+# This module keeps a persistent catalog (SQLite) of the stored dataset files, their content hashes and metadata.
+# Every file is read once while it is streamed (whole-file SHA-256 plus one hash per fixed-size chunk, row count,
+# columns and 'Date' range), so duplicates and shared prefixes of a new upload are found with indexed lookups
+# and the dataset selectors are built from one query instead of walking the dataset folders.
+# It also keeps the change log of the datasets that are extended in place (see data_generator.append_dataset_days):
+# every change record names the appended byte, row, Violation_ID and date ranges, so caches built for the
+# previous version of a file can be brought up to date from the appended rows only.
+
+# ---------------------------------------------------------
+# CATALOG CONFIGURATION
+# ---------------------------------------------------------
+CATALOG_PATH = os.path.join(data_loader.CACHE_DIR, "dataset_catalog.sqlite3")
+# Size of the hashed chunks, overlaps between files are detected with this granularity
+CATALOG_CHUNK_BYTES = 1024 * 1024
+# Rows parsed per chunk while a stored file is scanned for its metadata
+SCAN_CHUNK_ROWS = 100_000
+# Hashes looked up per query (SQLite limits the number of bound parameters)
+LOOKUP_BATCH_SIZE = 500
+
+# Folders holding the stored datasets (scanned recursively for .csv files)
+DATASET_DIRECTORIES = [
+    "dataset",
+    "generated_fake_traffic_datasets",
+    "uploded_file_relateds",
+    "uploded_file_others",
+    "uploaded_datasets",
+]
+
+# Bumped whenever the tables change, an older catalog is dropped and rebuilt from the files
+CATALOG_VERSION = 2
+
+CATALOG_TABLES = """
+CREATE TABLE IF NOT EXISTS datasets (
+    path        TEXT PRIMARY KEY,
+    directory   TEXT NOT NULL,
+    source      TEXT NOT NULL,
+    group_name  TEXT NOT NULL,
+    file_name   TEXT NOT NULL,
+    size        INTEGER NOT NULL,
+    mtime_ns    INTEGER NOT NULL,
+    fingerprint TEXT NOT NULL,
+    sha256      TEXT NOT NULL,
+    chunk_bytes INTEGER NOT NULL,
+    row_count   INTEGER,
+    columns     TEXT,
+    date_min    TEXT,
+    date_max    TEXT,
+    indexed_at  TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_datasets_sha256 ON datasets (sha256, size);
+CREATE INDEX IF NOT EXISTS idx_datasets_directory ON datasets (directory);
+CREATE INDEX IF NOT EXISTS idx_datasets_listing ON datasets (source, group_name, file_name);
+
+CREATE TABLE IF NOT EXISTS dataset_chunks (
+    path          TEXT NOT NULL,
+    chunk_index   INTEGER NOT NULL,
+    end_offset    INTEGER NOT NULL,
+    chunk_sha256  TEXT NOT NULL,
+    prefix_sha256 TEXT NOT NULL,
+    PRIMARY KEY (path, chunk_index)
+);
+CREATE INDEX IF NOT EXISTS idx_dataset_chunks_prefix ON dataset_chunks (prefix_sha256);
+
+CREATE TABLE IF NOT EXISTS directories (
+    path     TEXT PRIMARY KEY,
+    parent   TEXT,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_directories_parent ON directories (parent);
+
+CREATE TABLE IF NOT EXISTS dataset_changes (
+    id                   INTEGER PRIMARY KEY AUTOINCREMENT,
+    path                 TEXT NOT NULL,
+    kind                 TEXT NOT NULL,
+    previous_fingerprint TEXT,
+    fingerprint          TEXT NOT NULL,
+    record               TEXT NOT NULL,
+    created_at           TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_dataset_changes_path ON dataset_changes (path, id);
+"""
+
+
+class StreamingHasher:
+    """
+    Hashes a byte stream in one pass.
+
+    Keeps the whole-file SHA-256, a (chunk, prefix) hash pair at every chunk boundary and the
+    prefix hash at any requested offset (used to check whether a stored file is a prefix of the stream).
+    """
+    def __init__(self, chunk_bytes: int = CATALOG_CHUNK_BYTES, snapshot_offsets=()):
+        self.chunk_bytes = chunk_bytes
+        self.file_hasher = hashlib.sha256()
+        self.chunk_hasher = hashlib.sha256()
+        self.size = 0
+        self.chunk_fill = 0
+        # (chunk_index, end_offset, chunk_sha256, prefix_sha256)
+        self.chunks = []
+        self.prefix_snapshots = {}
+        self._pending_snapshots = deque(sorted({offset for offset in snapshot_offsets if offset > 0}))
+
+    def update(self, data) -> None:
+        view = memoryview(data)
+        position = 0
+        while position < len(view):
+            # Feed the bytes up to the next chunk boundary or requested snapshot offset
+            step = self.chunk_bytes - self.chunk_fill
+            if self._pending_snapshots:
+                step = min(step, self._pending_snapshots[0] - self.size)
+            piece = view[position:position + step]
+            self.file_hasher.update(piece)
+            self.chunk_hasher.update(piece)
+            self.size += len(piece)
+            self.chunk_fill += len(piece)
+            position += len(piece)
+
+            if self._pending_snapshots and self.size == self._pending_snapshots[0]:
+                self.prefix_snapshots[self.size] = self.file_hasher.copy().hexdigest()
+                self._pending_snapshots.popleft()
+            if self.chunk_fill == self.chunk_bytes:
+                self._close_chunk()
+
+    def _close_chunk(self) -> None:
+        self.chunks.append((len(self.chunks), self.size, self.chunk_hasher.hexdigest(), self.file_hasher.copy().hexdigest()))
+        self.chunk_hasher = hashlib.sha256()
+        self.chunk_fill = 0
+
+    def finish(self) -> str:
+        """
+        Closes the last (partial) chunk and returns the whole-file SHA-256.
+        """
+        if self.chunk_fill:
+            self._close_chunk()
+        return self.file_hasher.hexdigest()
+
+    @property
+    def sha256(self) -> str:
+        return self.file_hasher.hexdigest()
+
+
+class HashingReader(io.RawIOBase):
+    """
+    Read-only file wrapper that hashes every byte read (see StreamingHasher)
+    and optionally copies it to a second file (tee).
+    """
+    def __init__(self, source, sink, hasher: StreamingHasher):
+        self.source = source
+        self.sink = sink
+        self.hasher = hasher
+        self.bytes_read = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        data = self.source.read(len(buffer))
+        size = len(data)
+        buffer[:size] = data
+        if size:
+            self.hasher.update(data)
+            if self.sink is not None:
+                self.sink.write(data)
+            self.bytes_read += size
+        return size
+
+
+class DatasetSummary:
+    """
+    Collects the catalog metadata of a CSV file (columns, row count, 'Date' range) chunk by chunk.
+    """
+    def __init__(self, columns: list):
+        self.columns = list(columns)
+        self.row_count = 0
+        self.date_min = None
+        self.date_max = None
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        self.row_count += len(chunk)
+        if 'Date' not in chunk.columns:
+            return
+        dates = chunk['Date']
+        if not pd.api.types.is_datetime64_any_dtype(dates):
+            dates = pd.to_datetime(dates, errors='coerce')
+        chunk_min, chunk_max = dates.min(), dates.max()
+        if pd.notna(chunk_min):
+            self.date_min = chunk_min if self.date_min is None else min(self.date_min, chunk_min)
+            self.date_max = chunk_max if self.date_max is None else max(self.date_max, chunk_max)
+
+    def as_dict(self) -> dict:
+        return {
+            'row_count': self.row_count,
+            'columns': self.columns,
+            'date_min': None if self.date_min is None else self.date_min.date().isoformat(),
+            'date_max': None if self.date_max is None else self.date_max.date().isoformat(),
+        }
+
+
+# ==================================================================================
+def connect() -> sqlite3.Connection:
+    """
+    Opens the catalog database, creating it on first use (or rebuilding it after a CATALOG_VERSION change).
+    """
+    os.makedirs(os.path.dirname(CATALOG_PATH), exist_ok=True)
+    connection = sqlite3.connect(CATALOG_PATH, timeout=30)
+    connection.execute("PRAGMA journal_mode=WAL")
+    (version,) = connection.execute("PRAGMA user_version").fetchone()
+    if version != CATALOG_VERSION:
+        # Everything in the catalog can be rebuilt from the files, so older tables are simply dropped.
+        # The change log cannot be rebuilt and is kept.
+        with connection:
+            for table in ["datasets", "dataset_chunks", "directories"]:
+                connection.execute(f"DROP TABLE IF EXISTS {table}")
+            connection.execute(f"PRAGMA user_version = {CATALOG_VERSION}")
+    connection.executescript(CATALOG_TABLES)
+    return connection
+# -------------------------------------------------------------------------------
+def read_header(file) -> list:
+    """
+    Reads the column names from the first line of a CSV file object and rewinds it.
+    """
+    first_line = file.readline()
+    file.seek(0)
+    if isinstance(first_line, bytes):
+        first_line = first_line.decode("utf-8-sig", errors="replace")
+    return next(csv.reader([first_line]), [])
+# -------------------------------------------------------------------------------
+def scan_file(path: str) -> tuple:
+    """
+    Reads a stored CSV file once to hash it and collect its metadata (only used the first time a file is indexed).
+    Only the 'Date' column is parsed. A file that cannot be parsed is still hashed, without a row count.
+
+    Returns:
+        tuple: (StreamingHasher, metadata dict from DatasetSummary.as_dict())
+    """
+    hasher = StreamingHasher()
+    with open(path, "rb") as f:
+        columns = read_header(f)
+        summary = DatasetSummary(columns)
+        reader = HashingReader(f, None, hasher)
+        try:
+            usecols = ['Date'] if 'Date' in columns else [0]
+            for chunk in pd.read_csv(io.BufferedReader(reader), chunksize=SCAN_CHUNK_ROWS, usecols=usecols, dtype=str):
+                summary.update(chunk)
+            metadata = summary.as_dict()
+        except (ValueError, pd.errors.ParserError, UnicodeDecodeError) as e:
+            logger.warning("Could not read the rows of %s: %s", path, e)
+            metadata = {'row_count': None, 'columns': columns, 'date_min': None, 'date_max': None}
+        # Hash whatever the parser did not consume
+        while reader.read(CATALOG_CHUNK_BYTES):
+            pass
+    hasher.finish()
+    return hasher, metadata
+# -------------------------------------------------------------------------------
+def hash_file(path: str) -> StreamingHasher:
+    """
+    Hashes a stored file without parsing it, for files whose metadata is already known.
+    """
+    hasher = StreamingHasher()
+    with open(path, "rb") as f:
+        while data := f.read(CATALOG_CHUNK_BYTES):
+            hasher.update(data)
+    hasher.finish()
+    return hasher
+# -------------------------------------------------------------------------------
+def _split_path(path: str) -> tuple:
+    """
+    Splits a stored file path into (directory, source folder, sub folder below the source folder).
+    """
+    directory = os.path.dirname(path)
+    parts = os.path.normpath(directory).split(os.sep)
+    return directory, parts[0], os.sep.join(parts[1:])
+# -------------------------------------------------------------------------------
+def register_dataset(path: str, hasher: StreamingHasher, metadata: dict = None, connection: sqlite3.Connection = None) -> None:
+    """
+    Stores (or replaces) the hashes and metadata of a dataset file in the catalog.
+
+    Args:
+        path (str): Path of the stored file.
+        hasher (StreamingHasher): The finished hasher of the file contents.
+        metadata (dict): 'row_count', 'columns', 'date_min' and 'date_max' (see DatasetSummary), unknown when None.
+        connection (sqlite3.Connection): Optional open catalog connection.
+    """
+    metadata = metadata or {}
+    own_connection = connection is None
+    connection = connection or connect()
+    try:
+        stat = os.stat(path)
+        directory, source, group_name = _split_path(path)
+        columns = metadata.get('columns')
+        with connection:
+            connection.execute("DELETE FROM dataset_chunks WHERE path = ?", (path,))
+            connection.execute(
+                "INSERT OR REPLACE INTO datasets (path, directory, source, group_name, file_name, size, mtime_ns, fingerprint, "
+                "sha256, chunk_bytes, row_count, columns, date_min, date_max, indexed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (path, directory, source, group_name, os.path.basename(path), stat.st_size, stat.st_mtime_ns,
+                 data_loader.dataset_fingerprint(path), hasher.sha256, hasher.chunk_bytes, metadata.get('row_count'),
+                 None if columns is None else json.dumps(columns), metadata.get('date_min'), metadata.get('date_max'),
+                 datetime.now().isoformat(timespec="seconds")),
+            )
+            connection.executemany(
+                "INSERT INTO dataset_chunks (path, chunk_index, end_offset, chunk_sha256, prefix_sha256) VALUES (?, ?, ?, ?, ?)",
+                [(path, *chunk) for chunk in hasher.chunks],
+            )
+    finally:
+        if own_connection:
+            connection.close()
+# -------------------------------------------------------------------------------
+def remove_dataset(path: str, connection: sqlite3.Connection = None) -> None:
+    """
+    Removes a dataset file from the catalog.
+    """
+    own_connection = connection is None
+    connection = connection or connect()
+    try:
+        with connection:
+            connection.execute("DELETE FROM dataset_chunks WHERE path = ?", (path,))
+            connection.execute("DELETE FROM datasets WHERE path = ?", (path,))
+            connection.execute("DELETE FROM dataset_changes WHERE path = ?", (path,))
+    finally:
+        if own_connection:
+            connection.close()
+# -------------------------------------------------------------------------------
+def _rescan_directory(connection: sqlite3.Connection, directory: str, mtime_ns: int) -> tuple:
+    """
+    Re-lists one directory whose mtime changed: new or changed .csv files (size / mtime) are scanned,
+    entries of deleted files are removed and the directory mtime is stored.
+
+    Returns:
+        tuple: (number of scanned files, list of sub directories)
+    """
+    with os.scandir(directory) as entries:
+        entries = list(entries)
+    sub_directories = sorted(entry.path for entry in entries if entry.is_dir())
+    on_disk = {entry.path: entry.stat() for entry in entries if entry.is_file() and entry.name.endswith(".csv")}
+    known = {
+        path: (size, mtime_ns)
+        for path, size, mtime_ns in connection.execute("SELECT path, size, mtime_ns FROM datasets WHERE directory = ?", (directory,))
+    }
+
+    scanned = 0
+    for path, stat in sorted(on_disk.items()):
+        if known.get(path) != (stat.st_size, stat.st_mtime_ns):
+            try:
+                register_dataset(path, *scan_file(path), connection=connection)
+                scanned += 1
+            except OSError as e:
+                logger.warning("Could not index %s: %s", path, e)
+    for path in set(known).difference(on_disk):
+        remove_dataset(path, connection)
+
+    with connection:
+        connection.execute(
+            "INSERT OR REPLACE INTO directories (path, parent, mtime_ns) VALUES (?, ?, ?)",
+            (directory, os.path.dirname(directory), mtime_ns),
+        )
+    return scanned, sub_directories
+# -------------------------------------------------------------------------------
+def refresh_catalog(directories: list = DATASET_DIRECTORIES) -> int:
+    """
+    Brings the catalog in line with the files on disk.
+
+    Only directories whose mtime changed since the last refresh (a file was added, removed or renamed)
+    are listed again, unchanged directories cost one stat() call. In a re-listed directory, new or
+    changed files (size / mtime) are scanned and entries of deleted files are removed.
+
+    Returns:
+        int: The number of files that were (re)scanned.
+    """
+    connection = connect()
+    try:
+        known_mtimes = {}
+        known_children = {}
+        for path, parent, mtime_ns in connection.execute("SELECT path, parent, mtime_ns FROM directories"):
+            known_mtimes[path] = mtime_ns
+            known_children.setdefault(parent, []).append(path)
+
+        scanned = 0
+        visited = set()
+        pending = list(directories)
+        while pending:
+            directory = pending.pop()
+            if not os.path.isdir(directory):
+                continue
+            visited.add(directory)
+            # The mtime is read before listing, so files added meanwhile trigger another scan next time
+            mtime_ns = os.stat(directory).st_mtime_ns
+            if known_mtimes.get(directory) == mtime_ns:
+                # A directory mtime does not change with its sub directories, they are checked on their own
+                pending.extend(known_children.get(directory, []))
+                continue
+            directory_scanned, sub_directories = _rescan_directory(connection, directory, mtime_ns)
+            scanned += directory_scanned
+            pending.extend(sub_directories)
+
+        # Directories that no longer exist
+        for directory in set(known_mtimes).difference(visited):
+            for (path,) in connection.execute("SELECT path FROM datasets WHERE directory = ?", (directory,)).fetchall():
+                remove_dataset(path, connection)
+            with connection:
+                connection.execute("DELETE FROM directories WHERE path = ?", (directory,))
+        return scanned
+    finally:
+        connection.close()
+# -------------------------------------------------------------------------------
+def list_datasets(sources: list = DATASET_DIRECTORIES) -> list:
+    """
+    Lists the cataloged datasets of the given source folders with one indexed query, ordered by
+    source folder (in the given order), sub folder (newest first for dated folders) and file name.
+
+    Returns:
+        list: One dict per dataset with 'path', 'source', 'group_name', 'file_name', 'size', 'fingerprint',
+              'row_count', 'columns' (list or None), 'date_min' and 'date_max'.
+    """
+    connection = connect()
+    try:
+        placeholders = ",".join("?" * len(sources))
+        source_order = " ".join(f"WHEN ? THEN {rank}" for rank in range(len(sources)))
+        rows = connection.execute(
+            "SELECT path, source, group_name, file_name, size, fingerprint, row_count, columns, date_min, date_max "
+            f"FROM datasets WHERE source IN ({placeholders}) "
+            f"ORDER BY CASE source {source_order} END, group_name DESC, file_name",
+            [*sources, *sources],
+        )
+        return [_dataset_entry(*row) for row in rows]
+    finally:
+        connection.close()
+# -------------------------------------------------------------------------------
+def get_dataset(path: str) -> dict:
+    """
+    Returns the catalog entry of one dataset file (see list_datasets), or None when it is not cataloged.
+    """
+    connection = connect()
+    try:
+        row = connection.execute(
+            "SELECT path, source, group_name, file_name, size, fingerprint, row_count, columns, date_min, date_max "
+            "FROM datasets WHERE path = ?", (path,)
+        ).fetchone()
+        return None if row is None else _dataset_entry(*row)
+    finally:
+        connection.close()
+# -------------------------------------------------------------------------------
+def _dataset_entry(path, source, group_name, file_name, size, fingerprint, row_count, columns, date_min, date_max) -> dict:
+    return {
+        'path': path,
+        'source': source,
+        'group_name': group_name,
+        'file_name': file_name,
+        'size': size,
+        'fingerprint': fingerprint,
+        'row_count': row_count,
+        'columns': None if columns is None else json.loads(columns),
+        'date_min': date_min,
+        'date_max': date_max,
+    }
+
+
+# ==================================================================================
+def record_change(change: dict) -> dict:
+    """
+    Adds a change record to the change log of its dataset.
+
+    Args:
+        change (dict): At least 'path', 'kind' (e.g. 'append'), 'previous_fingerprint' (data_loader fingerprint
+                       of the file before the change) and 'fingerprint' (after the change), plus the details
+                       of the change (see data_generator.append_dataset_days).
+
+    Returns:
+        dict: The change record with its 'id' (increasing in the order of the changes) and 'created_at'.
+    """
+    change = {**change, 'created_at': datetime.now().isoformat(timespec="seconds")}
+    connection = connect()
+    try:
+        with connection:
+            cursor = connection.execute(
+                "INSERT INTO dataset_changes (path, kind, previous_fingerprint, fingerprint, record, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (change['path'], change['kind'], change.get('previous_fingerprint'), change['fingerprint'],
+                 json.dumps(change, default=str), change['created_at']),
+            )
+        return {'id': cursor.lastrowid, **change}
+    finally:
+        connection.close()
+# -------------------------------------------------------------------------------
+def list_changes(path: str, after_id: int = 0) -> list:
+    """
+    Returns the change records of a dataset file newer than after_id, oldest first.
+
+    A cache built for the version of the file with fingerprint F applies the records from the one whose
+    'previous_fingerprint' is F; when there is none the file changed in another way and it is rebuilt.
+    """
+    connection = connect()
+    try:
+        rows = connection.execute(
+            "SELECT id, record FROM dataset_changes WHERE path = ? AND id > ? ORDER BY id", (path, after_id)
+        )
+        return [{'id': change_id, **json.loads(record)} for change_id, record in rows]
+    finally:
+        connection.close()
+
+
+# ==================================================================================
+def get_stored_sizes(max_size: int = None) -> list:
+    """
+    Returns the distinct sizes of the stored files (smaller than max_size), the offsets at which
+    an incoming stream needs a prefix hash to detect stored files that are a prefix of it.
+    """
+    connection = connect()
+    try:
+        if max_size is None:
+            rows = connection.execute("SELECT DISTINCT size FROM datasets")
+        else:
+            rows = connection.execute("SELECT DISTINCT size FROM datasets WHERE size < ?", (max_size,))
+        return [size for (size,) in rows]
+    finally:
+        connection.close()
+# -------------------------------------------------------------------------------
+def find_matches(hasher: StreamingHasher) -> dict:
+    """
+    Looks up a hashed stream in the catalog.
+
+    - duplicate_of: a stored file with the same size and SHA-256
+    - overlaps: stored files sharing a prefix with the stream, either a whole stored file being a
+      prefix of the stream ('stored file is a prefix'), the whole stream being a prefix of a stored
+      file and ending at one of its chunk boundaries ('upload is a prefix'), or identical leading
+      chunks ('shared prefix')
+
+    Returns:
+        dict: {'duplicate_of': path or None, 'overlaps': [{'path', 'overlap_bytes', 'kind'}, ...]}
+    """
+    connection = connect()
+    try:
+        duplicate = connection.execute(
+            "SELECT path FROM datasets WHERE sha256 = ? AND size = ? ORDER BY path LIMIT 1", (hasher.sha256, hasher.size)
+        ).fetchone()
+
+        overlaps = {}
+        # Stored files that are a prefix of the stream (their hash equals the stream's prefix hash at their size)
+        for offset, digest in hasher.prefix_snapshots.items():
+            for (path,) in connection.execute("SELECT path FROM datasets WHERE sha256 = ? AND size = ?", (digest, offset)):
+                overlaps[path] = {'path': path, 'overlap_bytes': offset, 'kind': 'stored file is a prefix'}
+
+        # Stored files starting with the same chunks as the stream (prefix hashes at the same chunk boundary)
+        prefix_digests = [chunk[3] for chunk in hasher.chunks]
+        shared = {}
+        for start in range(0, len(prefix_digests), LOOKUP_BATCH_SIZE):
+            batch = prefix_digests[start:start + LOOKUP_BATCH_SIZE]
+            placeholders = ",".join("?" * len(batch))
+            rows = connection.execute(
+                f"SELECT path, MAX(end_offset) FROM dataset_chunks WHERE prefix_sha256 IN ({placeholders}) GROUP BY path",
+                batch,
+            )
+            for path, overlap_bytes in rows:
+                shared[path] = max(shared.get(path, 0), overlap_bytes)
+        for path, overlap_bytes in shared.items():
+            if path not in overlaps:
+                overlaps[path] = {'path': path, 'overlap_bytes': overlap_bytes, 'kind': 'shared prefix'}
+
+        # Stored files the whole stream is a prefix of, from their stored prefix hashes only (no stored file is read):
+        # a stream ending at one of their chunk boundaries has the prefix hash of that chunk. A stream ending inside
+        # a chunk has no stored hash to compare with, its leading full chunks are reported as a 'shared prefix'
+        rows = connection.execute(
+            "SELECT datasets.path FROM dataset_chunks JOIN datasets ON datasets.path = dataset_chunks.path "
+            "WHERE prefix_sha256 = ? AND end_offset = ? AND size > ?",
+            (hasher.sha256, hasher.size, hasher.size),
+        )
+        for (path,) in rows:
+            overlaps[path] = {'path': path, 'overlap_bytes': hasher.size, 'kind': 'upload is a prefix'}
+
+        if duplicate is not None:
+            overlaps.pop(duplicate[0], None)
+        return {
+            'duplicate_of': duplicate[0] if duplicate else None,
+            'overlaps': sorted(overlaps.values(), key=lambda overlap: overlap['overlap_bytes'], reverse=True),
+        }
+    finally:
+        connection.close()
@@ -0,0 +1,95 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# This module memoizes the selections of the range filters (the year sliders of the dashboard).
+# A selection is keyed by (dataset fingerprint, filter spec), so every widget and every session asking for
+# the same range of the same dataset version gets the same object back instead of filtering again.
+# The least recently used selections are evicted past FILTER_CACHE_ENTRIES or FILTER_CACHE_BYTES.
+# Cached selections are shared and must never be modified.
+
+# ---------------------------------------------------------
+# CACHE BUDGET
+# ---------------------------------------------------------
+FILTER_CACHE_ENTRIES = 64
+FILTER_CACHE_BYTES = 32 * 1024 * 1024
+
+
+class FilterCache:
+    """
+    Thread-safe LRU cache of filter selections with an entry count and a memory budget.
+    """
+    def __init__(self, max_entries: int = FILTER_CACHE_ENTRIES, max_bytes: int = FILTER_CACHE_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # key -> (selection, size in bytes), least recently used first
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple, compute, size_of=None):
+        """
+        Returns the selection of key, computed with compute() and stored when it is not cached.
+
+        Args:
+            key (tuple): (dataset fingerprint, filter spec ...), hashable.
+            compute (callable): Builds the selection.
+            size_of (callable): Optional size in bytes of a selection (see selection_nbytes by default).
+
+        Returns:
+            object: The (shared) selection.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key][0]
+        # Computed outside of the lock, two sessions may compute the same selection once each
+        selection = compute()
+        size = (size_of or selection_nbytes)(selection)
+        if size > self.max_bytes:
+            return selection
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = (selection, size)
+                self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+        return selection
+
+
+# Shared by all the sessions of this server process
+_filter_cache = FilterCache()
+
+
+# ==================================================================================
+def selection_nbytes(selection) -> int:
+    """
+    Returns the approximate memory size of a selection: its NumPy arrays (a CubeSlice holds a dict of them).
+    """
+    if isinstance(selection, np.ndarray):
+        return selection.nbytes
+    values = getattr(selection, 'values', None)
+    if isinstance(values, dict):
+        return sum(array.nbytes for array in values.values())
+    return 0
+# -------------------------------------------------------------------------------
+def _day(value) -> str:
+    return None if value is None else pd.Timestamp(value).date().isoformat()
+# -------------------------------------------------------------------------------
+def get_cube_range(cube, fingerprint: str, start_date=None, end_date=None):
+    """
+    Returns the aggregates of a date range of a dataset cube (see data_cube.DataCube.query), memoized.
+
+    Args:
+        cube (DataCube): The cube of the dataset version identified by fingerprint.
+        fingerprint (str): The dataset fingerprint (see data_loader.dataset_fingerprint).
+        start_date, end_date: First and last day of the range (None for an open end).
+
+    Returns:
+        CubeSlice: The shared aggregates of the range.
+    """
+    key = (fingerprint, 'cube', _day(start_date), _day(end_date))
+    return _filter_cache.get(key, lambda: cube.query(start_date, end_date))
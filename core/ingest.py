@@ -0,0 +1,155 @@
+import os
+import io
+import pandas as pd
+import pyarrow as pa
+
+from core import data_loader, dataset_catalog
+from core.dataset_catalog import HashingReader, read_header
+from core.data_schema import TRAFFIC_VIOLATION_SCHEMA
+from core.data_variables import TRAFFIC_VIOLATION_COLUMNS
+
+# This module ingests uploaded CSV files in a single streaming pass with bounded memory.
+# The upload is read chunk by chunk: the raw bytes are hashed and written to disk, the rows are counted
+# and (for traffic violation datasets) type-coerced into a staged Arrow IPC copy used by data_loader.
+# The hashes are looked up in the dataset catalog to reject duplicates and report overlapping files.
+
+# ---------------------------------------------------------
+# INGEST CONFIGURATION
+# ---------------------------------------------------------
+RELATED_UPLOADS_DIR = "uploded_file_relateds"
+OTHER_UPLOADS_DIR = "uploded_file_others"
+# Rows parsed per chunk, memory use is bounded by this and not by the file size
+CHUNK_ROWS = 50_000
+
+
+# ==================================================================================
+def is_traffic_violation_header(columns: list) -> bool:
+    """
+    Checks whether the CSV header contains every traffic violation column.
+    """
+    return set(TRAFFIC_VIOLATION_COLUMNS).issubset(set(columns))
+# -------------------------------------------------------------------------------
+def get_staged_arrow_schema(columns: list) -> pa.Schema:
+    """
+    Returns the fixed Arrow schema of the staged copy: 'Date' as timestamp, the numeric columns
+    of the traffic violation schema as float64 (nullable, narrowed later by apply_schema), the rest as text.
+    """
+    fields = []
+    for col in columns:
+        spec = TRAFFIC_VIOLATION_SCHEMA.get(col)
+        if col == 'Date':
+            fields.append(pa.field(col, pa.timestamp('ns')))
+        elif isinstance(spec, str):
+            fields.append(pa.field(col, pa.float64()))
+        else:
+            fields.append(pa.field(col, pa.string()))
+    return pa.schema(fields)
+# -------------------------------------------------------------------------------
+def coerce_chunk(chunk: pd.DataFrame, schema: pa.Schema) -> pa.Table:
+    """
+    Coerces a chunk read as text into the staged Arrow schema. Unparseable values become null.
+    """
+    arrays = []
+    for field in schema:
+        values = chunk[field.name]
+        if pa.types.is_timestamp(field.type):
+            values = pd.to_datetime(values, errors='coerce')
+        elif pa.types.is_floating(field.type):
+            values = pd.to_numeric(values, errors='coerce').astype("float64")
+        arrays.append(pa.array(values, type=field.type, from_pandas=True))
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+# ==================================================================================
+def ingest_csv(file, file_name: str, progress_callback=None) -> dict:
+    """
+    Ingests an uploaded CSV file in one pass over its bytes.
+
+    - The header is checked against TRAFFIC_VIOLATION_COLUMNS to choose the target folder.
+    - The raw bytes are hashed (SHA-256, whole file and per chunk) and written to the target folder while they are parsed.
+    - Rows are counted chunk by chunk (CHUNK_ROWS), so memory does not grow with the file size.
+    - Traffic violation datasets are type-coerced into a staged Arrow IPC copy, which data_loader
+      uses to build the dataset sidecar without parsing the CSV again.
+    - The hashes are looked up in the dataset catalog: an exact duplicate is not saved, stored files
+      sharing a prefix with the upload are reported. Saved files are registered in the catalog
+      with their row count, columns and date range.
+
+    Args:
+        file: Binary file object of the upload (e.g. a Streamlit UploadedFile).
+        file_name (str): Name to save the file under.
+        progress_callback: Optional function (bytes_read, total_bytes, rows) called after each chunk.
+
+    Returns:
+        dict: 'file_path', 'save_dir', 'is_traffic_dataset', 'columns', 'rows', 'bytes', 'sha256',
+              'saved', 'duplicate_of' and 'overlaps' (see dataset_catalog.find_matches).
+    """
+    columns = read_header(file)
+    is_traffic_dataset = is_traffic_violation_header(columns)
+    save_dir = RELATED_UPLOADS_DIR if is_traffic_dataset else OTHER_UPLOADS_DIR
+    os.makedirs(save_dir, exist_ok=True)
+
+    file_path = os.path.join(save_dir, os.path.basename(file_name))
+    tmp_path = f"{file_path}.{os.getpid()}.tmp"
+    staged_tmp_path = None
+    writer = None
+    total_bytes = getattr(file, "size", None)
+    summary = dataset_catalog.DatasetSummary(columns)
+    # Prefix hashes are taken at the sizes of the stored files to detect those that are a prefix of the upload
+    hasher = dataset_catalog.StreamingHasher(snapshot_offsets=dataset_catalog.get_stored_sizes(total_bytes))
+
+    try:
+        with open(tmp_path, "wb") as raw_copy:
+            reader = HashingReader(file, raw_copy, hasher)
+            # Everything is read as text first so every chunk gets the same types
+            chunks = pd.read_csv(io.BufferedReader(reader), chunksize=CHUNK_ROWS, dtype=str)
+            for chunk in chunks:
+                if is_traffic_dataset:
+                    if writer is None:
+                        os.makedirs(data_loader.CACHE_DIR, exist_ok=True)
+                        staged_tmp_path = os.path.join(data_loader.CACHE_DIR, f"{os.path.basename(tmp_path)}.staged")
+                        schema = get_staged_arrow_schema(list(chunk.columns))
+                        writer = pa.ipc.new_file(staged_tmp_path, schema)
+                    table = coerce_chunk(chunk, schema)
+                    writer.write_table(table)
+                    # The coerced dates give the catalog its date range without parsing them twice
+                    chunk = chunk.assign(Date=table.column('Date').to_numpy())
+                summary.update(chunk)
+                if progress_callback is not None:
+                    progress_callback(reader.bytes_read, total_bytes, summary.row_count)
+        if writer is not None:
+            writer.close()
+            writer = None
+
+        hasher.finish()
+        matches = dataset_catalog.find_matches(hasher)
+        saved = matches['duplicate_of'] is None
+        if saved:
+            os.replace(tmp_path, file_path)
+            if staged_tmp_path is not None:
+                # The staged copy is named after the fingerprint of the saved CSV so the loader can find it
+                os.replace(staged_tmp_path, data_loader.get_staged_path(file_path))
+            dataset_catalog.register_dataset(file_path, hasher, summary.as_dict())
+        else:
+            for path in [tmp_path, staged_tmp_path]:
+                if path is not None:
+                    os.remove(path)
+    except Exception:
+        if writer is not None:
+            writer.close()
+        for path in [tmp_path, staged_tmp_path]:
+            if path is not None and os.path.exists(path):
+                os.remove(path)
+        raise
+
+    return {
+        'file_path': file_path,
+        'save_dir': save_dir,
+        'is_traffic_dataset': is_traffic_dataset,
+        'columns': columns,
+        'rows': summary.row_count,
+        'bytes': reader.bytes_read,
+        'sha256': hasher.sha256,
+        'saved': saved,
+        'duplicate_of': matches['duplicate_of'],
+        'overlaps': matches['overlaps'],
+    }
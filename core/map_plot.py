@@ -27,7 +27,7 @@ def plot_choropleth_map(map_data, geojson_data, location_col, value_col, state_p
     """
     
     # Normalize location names for matching FIRST
-    map_data[location_col] = map_data[location_col].astype(str).str.lower()
+    map_data = map_data.assign(**{location_col: map_data[location_col].astype(str).str.lower()})
     
     # Create simple lookup dictionary for values
     val_dict = map_data.set_index(location_col)[value_col].to_dict()
@@ -0,0 +1,152 @@
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+# This module computes summary metrics (modes, means, minimums, maximums, ...) of a dataset in one fused pass.
+# The metrics are described by a list of MetricSpec. Every column is read once, whatever the number of
+# metrics asked on it: categorical columns are counted with np.bincount over their codes (all the modes and
+# counts of the column come from those counts), numeric columns are converted once and reduced together.
+# The pass produces a small state per column (see accumulate) and the metrics are read from the states
+# (see finalize). Pre-aggregated sources like the dataset cube (see data_cube) provide the states directly.
+
+# ---------------------------------------------------------
+# METRIC FUNCTIONS
+# ---------------------------------------------------------
+# Functions read from the counts of the values of a column
+CATEGORICAL_FUNCTIONS = ['mode', 'mode_count', 'distinct']
+# Functions read from the summary of the numbers of a column
+NUMERIC_FUNCTIONS = ['count', 'sum', 'mean', 'min', 'max']
+
+
+class MetricSpec(NamedTuple):
+    """
+    One metric: its name in the result, its function (CATEGORICAL_FUNCTIONS or NUMERIC_FUNCTIONS),
+    the column it is computed on and the value returned when the column is missing or has no value.
+    """
+    name: str
+    func: str
+    column: str
+    default: object = None
+
+
+class CategoryCounts(NamedTuple):
+    """
+    State of a categorical column: the number of rows of every value (missing values are not counted).
+    """
+    labels: list
+    counts: np.ndarray
+
+
+class NumericSummary(NamedTuple):
+    """
+    State of a numeric column: number, sum, minimum and maximum of its values (missing values are skipped).
+    """
+    count: int
+    total: float
+    minimum: float
+    maximum: float
+
+
+# ==================================================================================
+def state_kind(func: str) -> str:
+    """
+    Returns the kind of state a metric function is read from: 'categories' or 'numbers'.
+    """
+    if func in CATEGORICAL_FUNCTIONS:
+        return 'categories'
+    if func in NUMERIC_FUNCTIONS:
+        return 'numbers'
+    raise ValueError(f"Unknown metric function '{func}', expected one of {CATEGORICAL_FUNCTIONS + NUMERIC_FUNCTIONS}")
+# -------------------------------------------------------------------------------
+def count_categories(values: pd.Series) -> CategoryCounts:
+    """
+    Counts the rows of every value of a column with one np.bincount over its codes
+    (the categories of a Categorical, in category order; the sorted values otherwise).
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes = values.cat.codes.to_numpy()
+        labels = values.cat.categories.tolist()
+    else:
+        codes, uniques = pd.factorize(values, sort=True)
+        labels = pd.Index(uniques).tolist()
+    return CategoryCounts(labels, np.bincount(codes[codes >= 0], minlength=len(labels)))
+# -------------------------------------------------------------------------------
+def summarize_numbers(values: pd.Series) -> NumericSummary:
+    """
+    Converts a column to float64 once and reduces it to its count, sum, minimum and maximum.
+    Values that are not numbers are skipped.
+    """
+    numbers = pd.to_numeric(values, errors='coerce').to_numpy(dtype="float64", na_value=np.nan)
+    numbers = numbers[~np.isnan(numbers)]
+    if numbers.size == 0:
+        return NumericSummary(0, 0.0, np.nan, np.nan)
+    return NumericSummary(int(numbers.size), float(numbers.sum()), float(numbers.min()), float(numbers.max()))
+# -------------------------------------------------------------------------------
+def accumulate(df: pd.DataFrame, specs: list) -> dict:
+    """
+    Computes the states of the metrics in one pass over each column they use.
+
+    Args:
+        df (pd.DataFrame): The rows.
+        specs (list): MetricSpec list.
+
+    Returns:
+        dict: (column, 'categories' or 'numbers') -> CategoryCounts or NumericSummary,
+              for the columns of df only.
+    """
+    states = {}
+    for spec in specs:
+        key = (spec.column, state_kind(spec.func))
+        if key in states or spec.column not in df.columns:
+            continue
+        if key[1] == 'categories':
+            states[key] = count_categories(df[spec.column])
+        else:
+            states[key] = summarize_numbers(df[spec.column])
+    return states
+# -------------------------------------------------------------------------------
+def finalize(states: dict, specs: list) -> dict:
+    """
+    Reads the metrics from their states (see accumulate).
+
+    - mode: the most frequent value (the first one in category order on ties), mode_count: its number
+      of rows, distinct: the number of values holding rows
+    - count, sum, mean, min, max: of the numbers of the column (mean, min and max are NaN without numbers)
+
+    Returns:
+        dict: metric name -> value, the default of the spec when its column has no state
+              (or a categorical column has no value).
+    """
+    metrics = {}
+    for spec in specs:
+        state = states.get((spec.column, state_kind(spec.func)))
+        if state is None:
+            metrics[spec.name] = spec.default
+        elif isinstance(state, CategoryCounts):
+            has_rows = state.counts.size > 0 and state.counts.max() > 0
+            if spec.func == 'distinct':
+                metrics[spec.name] = int((state.counts > 0).sum())
+            elif not has_rows:
+                metrics[spec.name] = spec.default
+            elif spec.func == 'mode':
+                metrics[spec.name] = state.labels[int(np.argmax(state.counts))]
+            else:
+                metrics[spec.name] = int(state.counts.max())
+        elif spec.func == 'count':
+            metrics[spec.name] = state.count
+        elif spec.func == 'sum':
+            metrics[spec.name] = state.total
+        elif spec.func == 'mean':
+            metrics[spec.name] = state.total / state.count if state.count > 0 else np.nan
+        elif spec.func == 'min':
+            metrics[spec.name] = state.minimum
+        else:
+            metrics[spec.name] = state.maximum
+    return metrics
+# -------------------------------------------------------------------------------
+def compute_metrics(df: pd.DataFrame, specs: list) -> dict:
+    """
+    Computes the metrics of the rows of df in one fused pass (see accumulate and finalize).
+    """
+    return finalize(accumulate(df, specs), specs)
@@ -0,0 +1,193 @@
+import os
+import logging
+import pandas as pd
+import pyarrow.dataset as pads
+
+from core import data_loader
+
+try:
+    import duckdb
+except ImportError:  # Optional, pandas is used when DuckDB is not installed
+    duckdb = None
+
+logger = logging.getLogger(__name__)
+
+# This module runs the grouped aggregations of the numerical analysis (see utils) on one of two backends:
+# - pandas: groupby on the loaded DataFrame (always available)
+# - duckdb: SQL over the stored Arrow IPC sidecar files of the dataset, multi-threaded and without loading
+#   the columns into pandas. Only the small aggregated result becomes a DataFrame.
+# Both backends return the same frame: same columns, dtypes (including categories) and group order.
+# When the dataset cube (see data_cube) holds the groups and measures of a query, the result is read from
+# its materialized aggregates instead and the backend only runs the other queries.
+
+# ---------------------------------------------------------
+# BACKEND CONFIGURATION
+# ---------------------------------------------------------
+# 'auto' (DuckDB for large datasets when installed), 'pandas' or 'duckdb'
+QUERY_BACKEND = os.environ.get("TRAFFIC_QUERY_BACKEND", "auto")
+# Below this number of rows the pandas groupby on the already loaded frame is faster
+DUCKDB_MIN_ROWS = 1_000_000
+
+AGGREGATION_FUNCTIONS = ['count', 'sum', 'mean', 'min', 'max', 'std', 'size']
+SQL_AGGREGATES = {
+    'count': "COUNT({col})",
+    'sum': "SUM({col})",
+    'mean': "AVG({col})",
+    'min': "MIN({col})",
+    'max': "MAX({col})",
+    'std': "STDDEV_SAMP({col})",
+    'size': "COUNT(*)",
+}
+
+
+class DatasetScan:
+    """
+    The stored sidecar files of a dataset, optionally limited to a 'Date' range, queried with SQL
+    instead of being loaded into pandas. Exposes 'columns' like a DataFrame so the utils checks work on both.
+    """
+    def __init__(self, path: str, start_date=None, end_date=None):
+        self.path = path
+        self.start = None if start_date is None else pd.Timestamp(start_date)
+        # The end date is inclusive: every time of that day is part of the range
+        self.end = None if end_date is None else pd.Timestamp(end_date) + pd.Timedelta(days=1)
+        # Only the sidecar files of the years in the range are scanned
+        years = None if self.start is None or self.end is None else (self.start.year, pd.Timestamp(end_date).year)
+        self.files = data_loader.get_partition_files(path, years)
+        if not self.files:
+            # No year in the range: scan one file for its schema, the date filter still leaves no rows
+            self.files = data_loader.get_partition_files(path)[:1]
+        # Zero-row frame with the dtypes (and categories) of the loaded dataset, used to type the results
+        self.schema = data_loader.get_dataset_schema(path)
+        self.columns = self.schema.columns
+
+    def where_clause(self) -> tuple:
+        conditions, parameters = [], []
+        if self.start is not None:
+            conditions.append('"Date" >= ?')
+            parameters.append(self.start.to_pydatetime())
+        if self.end is not None:
+            conditions.append('"Date" < ?')
+            parameters.append(self.end.to_pydatetime())
+        return conditions, parameters
+
+
+class MaterializedSource:
+    """
+    A date range of the dataset cube (see data_cube.DataCube.query) answering the aggregations it holds,
+    with the backend source (a DataFrame or DatasetScan) running the others. Exposes 'columns' like a DataFrame.
+    """
+    def __init__(self, cube_slice, fallback):
+        self.cube_slice = cube_slice
+        self.fallback = fallback
+        self.columns = fallback.columns
+
+
+# ==================================================================================
+def is_duckdb_available() -> bool:
+    return duckdb is not None
+# -------------------------------------------------------------------------------
+def get_query_source(df: pd.DataFrame, path: str, start_date=None, end_date=None, cube=None):
+    """
+    Chooses the execution backend for the aggregations of a (date-filtered) dataset.
+
+    Args:
+        df (pd.DataFrame): The loaded frame, already filtered to the date range and without the rows
+                           missing a 'Date' (pandas backend).
+        path (str): Path of the dataset CSV file (its sidecar files are read by the DuckDB backend).
+        start_date, end_date: The inclusive 'Date' range df was filtered to, None when not filtered.
+        cube (data_cube.DataCube): Optional cube of the dataset, answers the aggregations it holds.
+
+    Returns:
+        pd.DataFrame, DatasetScan or MaterializedSource: df itself for the pandas backend, a DatasetScan
+        for DuckDB, wrapped in a MaterializedSource when a cube is given.
+    """
+    source = _get_backend_source(df, path, start_date, end_date)
+    if cube is None:
+        return source
+    return MaterializedSource(cube.query(start_date, end_date), source)
+# -------------------------------------------------------------------------------
+def _get_backend_source(df: pd.DataFrame, path: str, start_date, end_date):
+    backend = QUERY_BACKEND
+    if backend == "auto":
+        backend = "duckdb" if len(df) >= DUCKDB_MIN_ROWS else "pandas"
+    if backend != "duckdb" or not is_duckdb_available():
+        return df
+    try:
+        return DatasetScan(path, start_date, end_date)
+    except Exception as e:
+        # Datasets without a sidecar (e.g. columns Arrow cannot store) stay on pandas
+        logger.warning("Could not open %s for DuckDB, using pandas: %s", path, e)
+        return df
+
+
+# ==================================================================================
+def _output_name(col: str, func: str) -> str:
+    return "size" if func == 'size' else f"{col}_{func}"
+# -------------------------------------------------------------------------------
+def _aggregate_pandas(df: pd.DataFrame, group_cols: list, aggregations: list) -> pd.DataFrame:
+    # The compact storage types are widened first: int32/int16 sums would overflow, float32 sums and means lose digits
+    widened = {}
+    for col, func in aggregations:
+        if func == 'sum' and pd.api.types.is_integer_dtype(df[col]) and df[col].dtype != "int64":
+            widened[col] = df[col].astype("int64")
+        elif func in ['sum', 'mean', 'std'] and df[col].dtype == "float32":
+            widened[col] = df[col].astype("float64")
+    if widened:
+        df = df.assign(**widened)
+    named = {_output_name(col, func): (group_cols[0] if func == 'size' else col, func) for col, func in aggregations}
+    return df.groupby(group_cols, observed=True).agg(**named).reset_index()
+# -------------------------------------------------------------------------------
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+# -------------------------------------------------------------------------------
+def _aggregate_duckdb(scan: DatasetScan, group_cols: list, aggregations: list) -> pd.DataFrame:
+    group_sql = ", ".join(_quote(col) for col in group_cols)
+    # One column per output name, like the named aggregations of pandas ('size' asked for several columns)
+    selects = {}
+    for col, func in aggregations:
+        expression = SQL_AGGREGATES[func].format(col="" if col is None else _quote(col))
+        if func == 'sum' and pd.api.types.is_integer_dtype(scan.schema[col]):
+            # SUM of integers is a HUGEINT in DuckDB, the pandas backend sums in int64
+            expression = f"CAST({expression} AS BIGINT)"
+        selects[_output_name(col, func)] = f"{expression} AS {_quote(_output_name(col, func))}"
+    # pandas drops the groups with a missing key (dropna=True)
+    conditions, parameters = scan.where_clause()
+    conditions += [f"{_quote(col)} IS NOT NULL" for col in group_cols]
+    sql = f"SELECT {group_sql}, {', '.join(selects.values())} FROM dataset WHERE {' AND '.join(conditions)} GROUP BY {group_sql}"
+
+    with duckdb.connect() as connection:
+        # Projections and the date filter are pushed down into the Arrow scan of the sidecar files
+        connection.register("dataset", pads.dataset(scan.files, format="ipc"))
+        result = connection.execute(sql, parameters).df()
+
+    # Same dtypes as the pandas backend: run it on the zero-row frame of the dataset
+    expected = _aggregate_pandas(scan.schema, group_cols, aggregations)
+    result = result.astype(expected.dtypes.to_dict())
+    # pandas orders the groups by key (category order for Categoricals)
+    return result.sort_values(by=group_cols, kind="stable").reset_index(drop=True)
+# -------------------------------------------------------------------------------
+def group_aggregate(source, group_cols: list, aggregations: list) -> pd.DataFrame:
+    """
+    Groups the rows by group_cols and computes the aggregations, on the backend of the source.
+
+    Args:
+        source (pd.DataFrame, DatasetScan or MaterializedSource): See get_query_source().
+        group_cols (list): Grouping columns.
+        aggregations (list): (column, function) pairs, functions from AGGREGATION_FUNCTIONS
+                             ('size' counts the rows of the group, its column is ignored).
+
+    Returns:
+        pd.DataFrame: One row per observed group, in key order: the group columns, then one column
+                      per aggregation named '<column>_<function>' ('size' for the row count).
+    """
+    if isinstance(source, MaterializedSource):
+        result = source.cube_slice.aggregate(group_cols, aggregations)
+        source = source.fallback
+        if result is not None:
+            # Same dtypes as the backends: run pandas on the zero-row frame of the dataset
+            schema = source.schema if isinstance(source, DatasetScan) else source.iloc[:0]
+            expected = _aggregate_pandas(schema, group_cols, aggregations)
+            return result.astype(expected.dtypes.to_dict())
+    if isinstance(source, DatasetScan):
+        return _aggregate_duckdb(source, group_cols, aggregations)
+    return _aggregate_pandas(source, group_cols, aggregations)
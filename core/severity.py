@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+
+# This module computes the violation severity score. The score is one vectorized column expression over
+# the whole frame: every factor column is converted once and weighted (see SEVERITY_WEIGHTS).
+# data_prepare stores the default score in the prepared dataset (the 'Violation_Severity_Score' column of
+# the sidecar), so it is computed once per dataset version and read by every severity plot and by the
+# dataset cube (see data_cube). Other weights are computed on demand.
+
+SEVERITY_COLUMN = 'Violation_Severity_Score'
+
+# ---------------------------------------------------------
+# SCORE WEIGHTS
+# ---------------------------------------------------------
+# Score added per unit of every factor (missing values add nothing)
+SEVERITY_WEIGHTS = {
+    'fine': 1 / 1000,            # per rupee of 'Fine_Amount'
+    'penalty_points': 1.0,       # per 'Penalty_Points'
+    'overspeed': 1 / 10,         # per km/h of 'Recorded_Speed' above 'Speed_Limit'
+    'alcohol': 10.0,             # per unit of 'Alcohol_Level'
+    'previous_violations': 1.5,  # per 'Previous_Violations'
+    'no_helmet': 10.0,           # 'Helmet_Worn' is 'No'
+    'no_seatbelt': 10.0,         # 'Seatbelt_Worn' is 'No'
+    'red_light': 15.0,           # 'Traffic_Light_Status' is 'Red'
+}
+
+# Numeric factors: weight name -> column
+NUMERIC_FACTORS = {
+    'fine': 'Fine_Amount',
+    'penalty_points': 'Penalty_Points',
+    'alcohol': 'Alcohol_Level',
+    'previous_violations': 'Previous_Violations',
+}
+# Flag factors: weight name -> (column, value)
+FLAG_FACTORS = {
+    'no_helmet': ('Helmet_Worn', 'No'),
+    'no_seatbelt': ('Seatbelt_Worn', 'No'),
+    'red_light': ('Traffic_Light_Status', 'Red'),
+}
+# Every column the score reads
+SOURCE_COLUMNS = list(NUMERIC_FACTORS.values()) + ['Recorded_Speed', 'Speed_Limit'] + [col for col, _ in FLAG_FACTORS.values()]
+
+
+# ==================================================================================
+def resolve_weights(weights: dict = None) -> dict:
+    """
+    Returns SEVERITY_WEIGHTS with the given weights replacing the defaults.
+    """
+    if not weights:
+        return dict(SEVERITY_WEIGHTS)
+    unknown = set(weights) - set(SEVERITY_WEIGHTS)
+    if unknown:
+        raise ValueError(f"Unknown severity weights {sorted(unknown)}, expected some of {list(SEVERITY_WEIGHTS)}")
+    return {**SEVERITY_WEIGHTS, **weights}
+# -------------------------------------------------------------------------------
+def _numbers(df: pd.DataFrame, col: str) -> np.ndarray:
+    """
+    Returns a column as float64 (NaN for missing columns, missing values and values that are not numbers).
+    """
+    if col not in df.columns:
+        return np.full(len(df), np.nan)
+    return pd.to_numeric(df[col], errors='coerce').to_numpy(dtype="float64", na_value=np.nan)
+# -------------------------------------------------------------------------------
+def severity_scores(df: pd.DataFrame, weights: dict = None) -> np.ndarray:
+    """
+    Computes the severity score of every row in one vectorized expression.
+
+    Args:
+        df (pd.DataFrame): The rows (missing factor columns add nothing).
+        weights (dict): Optional weights replacing some of SEVERITY_WEIGHTS.
+
+    Returns:
+        np.ndarray: float64 score of every row.
+    """
+    weights = resolve_weights(weights)
+    scores = np.zeros(len(df))
+    for name, col in NUMERIC_FACTORS.items():
+        scores += np.nan_to_num(_numbers(df, col)) * weights[name]
+    with np.errstate(invalid='ignore'):
+        overspeed = _numbers(df, 'Recorded_Speed') - _numbers(df, 'Speed_Limit')
+        scores += np.where(overspeed > 0, overspeed, 0.0) * weights['overspeed']
+    for name, (col, value) in FLAG_FACTORS.items():
+        if col in df.columns:
+            scores += df[col].eq(value).fillna(False).to_numpy(dtype=bool) * weights[name]
+    return scores
+# -------------------------------------------------------------------------------
+def get_severity_scores(df: pd.DataFrame, weights: dict = None) -> pd.Series:
+    """
+    Returns the severity score of every row: the stored column of a prepared dataset (see data_prepare)
+    for the default weights, computed otherwise.
+    """
+    if SEVERITY_COLUMN in df.columns and resolve_weights(weights) == SEVERITY_WEIGHTS:
+        return df[SEVERITY_COLUMN]
+    return pd.Series(severity_scores(df, weights), index=df.index, name=SEVERITY_COLUMN)
+# -------------------------------------------------------------------------------
+def get_severity_by_location(df: pd.DataFrame, weights: dict = None) -> pd.DataFrame:
+    """
+    Returns the average severity score per location (rows) and violation type (columns).
+    """
+    scores = get_severity_scores(df, weights)
+    return pd.DataFrame({'Location': df['Location'], 'Violation_Type': df['Violation_Type'], SEVERITY_COLUMN: scores}).pivot_table(
+        values=SEVERITY_COLUMN,
+        index='Location',
+        columns='Violation_Type',
+        aggfunc='mean',
+        observed=True
+    )
@@ -2,59 +2,61 @@ import streamlit as st
 import pandas as pd
 import os
 from streamlit_local_storage import LocalStorage
+from core import data_loader, data_cube, dataset_catalog, filter_cache, sketches
 
-def render_sidebar() -> pd.DataFrame:
+# Number of shared dataset frames (whole datasets and year ranges) kept in memory at the same time
+SHARED_DATASET_CACHE_ENTRIES = 8
+
+# Dataset folders shown in the selector (in this order) and their labels
+DATASET_SOURCE_LABELS = {
+    "dataset": "Sample",
+    "generated_fake_traffic_datasets": "Fake Generated",
+    "uploded_file_relateds": "Legacy",
+    "uploded_file_others": "Other CSVs",
+    "uploaded_datasets": "Legacy",
+}
+
+def get_dataset_display_name(entry: dict) -> str:
     """
-    Renders the sidebar components including the dataset selector.
-    Returns the selected and loaded pandas DataFrame.
+    Returns the selector name of a cataloged dataset (see dataset_catalog.list_datasets), or None
+    when the file is not at a level of its folder the selector lists.
+    """
+    label = DATASET_SOURCE_LABELS[entry['source']]
+    if entry['source'] == "uploaded_datasets":
+        # Legacy uploads live in dated sub folders, named after the folder holding the file
+        parent_dir = os.path.basename(os.path.dirname(entry['path']))
+        return f"[{label}] {parent_dir}/{entry['file_name']}"
+    if entry['source'] == "generated_fake_traffic_datasets":
+        if not entry['group_name'] or os.sep in entry['group_name']:
+            return None
+        return f"{entry['file_name']} [{label} - {entry['group_name']}]"
+    if entry['group_name']:
+        return None
+    return f"{entry['file_name']} [{label}]"
+
+def render_dataset_selector() -> dict:
+    """
+    Renders the dataset selector without loading the dataset, for pages that only read some years
+    of it (see load_selected_dataset).
+    Returns the catalog entry of the selected dataset (see dataset_catalog.list_datasets), or None.
     """
     st.sidebar.header("Dataset Selector")
     
-    # Get the list of available datasets
-    dataset_folder = "dataset"
-    uploaded_dataset_folder = "uploaded_datasets"
-    related_uploads_folder = "uploded_file_relateds"
-    generated_dataset_folder = "generated_fake_traffic_datasets"
-    other_party_uploads_folder = "uploded_file_others"
-    
-    dataset_options = {}
+    # Get the list of available datasets from the dataset catalog (see core/dataset_catalog.py)
+    # Only folders changed since the last rerun are listed again, new files are indexed once
+    try:
+        with st.spinner("Indexing datasets ..."):
+            dataset_catalog.refresh_catalog()
+    except Exception as e:
+        st.sidebar.error(f"Could not refresh the dataset catalog: {e}")
 
-    # Add datasets from the 'dataset' folder
-    if os.path.exists(dataset_folder):
-        for filename in os.listdir(dataset_folder):
-            if filename.endswith(".csv"):
-                dataset_options[f"{filename} [Sample]"] = os.path.join(dataset_folder, filename)
-
-    # Function to scan a directory and add to options
-    def scan_and_add_datasets(directory, prefix):
-        if os.path.exists(directory):
-            # Scan for date-based directories (for generated data)
-            if "generated" in directory:
-                for date_dir in sorted(os.listdir(directory), reverse=True):
-                    full_date_dir = os.path.join(directory, date_dir)
-                    if os.path.isdir(full_date_dir):
-                        for file_name in sorted(os.listdir(full_date_dir)):
-                            if file_name.endswith('.csv'):
-                                display_name = f"{file_name} [{prefix} - {date_dir}]"
-                                dataset_options[display_name] = os.path.join(full_date_dir, file_name)
-            else: # Original logic for other directories
-                for file_name in sorted(os.listdir(directory)):
-                    if file_name.endswith('.csv'):
-                        dataset_options[f"{file_name} [{prefix}]"] = os.path.join(directory, file_name)
-
-    # Scan new directories in the desired order
-    scan_and_add_datasets(generated_dataset_folder, "Fake Generated")
-    scan_and_add_datasets(related_uploads_folder, "Legacy")
-    scan_and_add_datasets(other_party_uploads_folder, "Other CSVs")
-
-    # Add datasets from the 'uploaded_datasets' folder (legacy)
-    if os.path.exists(uploaded_dataset_folder):
-        for root, dirs, files in os.walk(uploaded_dataset_folder):
-            for filename in files:
-                if filename.endswith(".csv"):
-                    # Get the parent directory name for context
-                    parent_dir = os.path.basename(root)
-                    dataset_options[f"[Legacy] {parent_dir}/{filename}"] = os.path.join(root, filename)
+    dataset_options = {}
+    dataset_entries = {}
+    for entry in dataset_catalog.list_datasets(list(DATASET_SOURCE_LABELS)):
+        display_name = get_dataset_display_name(entry)
+        if display_name is not None:
+            dataset_options[display_name] = entry['path']
+            dataset_entries[display_name] = entry
 
     # ==========================================================================================================    
     # Persistence with Local Storage
@@ -91,18 +93,118 @@ def render_sidebar() -> pd.DataFrame:
         st.sidebar.warning("Please select a dataset.")
         return None
 
-    # 3. Get Selected Dataset Path  
-    selected_dataset_path = dataset_options[selected_dataset_display_name]
-
-    # 4. Load the selected dataset
-    @st.cache_data
-    def load_data(path):
-        df = pd.read_csv(path)
-        return df.copy() # Return a copy to prevent mutation of cached data
-    df = load_data(selected_dataset_path)
-    
-    # 4. Display Success Message
+    # 3. Display Success Message
     st.sidebar.success(f"Loaded dataset: **{selected_dataset_display_name}**")
-    
-    # 5. Return the loaded dataset
-    return df.copy()
+    entry = dataset_entries[selected_dataset_display_name]
+    if entry['row_count'] is not None:
+        date_range = f" · {entry['date_min']} to {entry['date_max']}" if entry['date_min'] else ""
+        st.sidebar.caption(f"{entry['row_count']:,} rows · {len(entry['columns'])} columns{date_range}")
+    return entry
+
+
+# One shared frame per dataset version (path, size, mtime) and year range for all sessions, it must never be mutated
+@st.cache_resource(max_entries=SHARED_DATASET_CACHE_ENTRIES)
+def _load_shared_dataset(path, fingerprint, years):
+    return data_loader.load_dataset(path, years)
+
+def get_dataset_years(entry: dict) -> list:
+    """
+    Returns the years of the selected dataset (read from its sidecar file names, not from the data).
+    """
+    return [year for year in data_loader.get_dataset_partitions(entry['path']) if year is not None]
+
+def load_selected_dataset(entry: dict, years: tuple = None) -> pd.DataFrame:
+    """
+    Loads the dataset chosen in the selector (see render_dataset_selector).
+
+    Args:
+        entry (dict): The catalog entry of the dataset.
+        years (tuple): Optional (first, last) year range. Only the sidecar files of those years are read,
+                       so a narrow year slider touches only a part of the stored bytes.
+
+    Returns:
+        pd.DataFrame: The dataset, or only its rows of the selected years.
+    """
+    path = entry['path']
+    if years is not None:
+        partitions = data_loader.get_dataset_partitions(path)
+        selected = [year for year in partitions if year is not None and years[0] <= year <= years[1]]
+        # Ranges covering the same partitions share one cached frame, all of them is the whole dataset
+        if selected == partitions:
+            years = None
+        elif selected:
+            years = (selected[0], selected[-1])
+        else:
+            years = tuple(years)
+    df = _load_shared_dataset(path, data_loader.dataset_fingerprint(path), years)
+    # A shallow copy is enough: with Copy-on-Write, column changes made by a page stay in that page
+    return df.copy(deep=False)
+
+# One shared cube per dataset version for all sessions (see core/data_cube.py)
+@st.cache_resource(max_entries=SHARED_DATASET_CACHE_ENTRIES)
+def _load_shared_cube(path, fingerprint):
+    return data_cube.get_cube(path, lambda: _load_shared_dataset(path, fingerprint, None))
+
+def load_selected_cube(entry: dict) -> data_cube.DataCube:
+    """
+    Returns the daily aggregate cube of the dataset chosen in the selector. The dataset itself is
+    only loaded the first time, to build the cube.
+    """
+    path = entry['path']
+    return _load_shared_cube(path, data_loader.dataset_fingerprint(path))
+
+def query_selected_cube(entry: dict, start_date=None, end_date=None) -> data_cube.CubeSlice:
+    """
+    Returns the aggregates of a date range of the dataset chosen in the selector (see load_selected_cube).
+    The ranges are memoized per dataset version (see core/filter_cache.py), so the widgets and sessions
+    showing the same range share one selection.
+    """
+    path = entry['path']
+    fingerprint = data_loader.dataset_fingerprint(path)
+    return filter_cache.get_cube_range(_load_shared_cube(path, fingerprint), fingerprint, start_date, end_date)
+
+# One set of column sketches per dataset version, year range and columns for all sessions (see core/sketches.py)
+@st.cache_resource(max_entries=SHARED_DATASET_CACHE_ENTRIES)
+def _load_shared_sketches(path, fingerprint, years, columns):
+    return sketches.sketch_dataset(path, years, list(columns))
+
+def load_selected_sketches(entry: dict, columns: list, years: tuple = None) -> dict:
+    """
+    Returns the column sketches of the dataset chosen in the selector, built one partition at a time.
+
+    Args:
+        entry (dict): The catalog entry of the dataset.
+        columns (list): The columns to sketch.
+        years (tuple): Optional (first, last) year range (see sketches.sketch_dataset).
+
+    Returns:
+        dict: column -> sketches.ColumnSketch
+    """
+    path = entry['path']
+    return _load_shared_sketches(path, data_loader.dataset_fingerprint(path), years, tuple(columns))
+
+def render_memory_report() -> None:
+    """
+    Shows the resident vs shared memory of the memory-mapped datasets of this server process.
+    """
+    with st.sidebar.expander("Dataset Memory", expanded=False):
+        memory_df = data_loader.get_mapped_memory_usage()
+        if memory_df.empty:
+            st.caption("Memory usage of mapped datasets is only available on Linux.")
+        else:
+            st.dataframe(memory_df, hide_index=True, width='stretch')
+            process_usage = data_loader.get_process_memory_usage()
+            if process_usage:
+                st.caption(f"Server process: {process_usage['resident_mb']} MB resident, {process_usage['shared_mb']} MB shared with other processes.")
+
+def render_sidebar() -> pd.DataFrame:
+    """
+    Renders the sidebar components including the dataset selector.
+    Returns the selected and loaded pandas DataFrame.
+    """
+    entry = render_dataset_selector()
+    if entry is None:
+        return None
+    df = load_selected_dataset(entry)
+    render_memory_report()
+    return df
@@ -163,18 +163,8 @@ def plot_categorical_heatmap(percent_pivot, annot, x_label, y_label):
 
 def plot_peak_hour_traffic(df):
     apply_trend_plot_style()
-    df = df.copy()
-    if 'Time' in df.columns:
-        try:
-            df['hour'] = pd.to_datetime(df['Time'], format='%H:%M:%S', errors='coerce').dt.hour
-            if df['hour'].isnull().any():
-                 df['hour'] = pd.to_datetime(df['Time'], format='%H:%M', errors='coerce').dt.hour
-            if df['hour'].isnull().all():
-                 df['hour'] = df['Time'].astype(str).str.split(':').str[0].astype(float)
-        except:
-             return None
-
-        hour_counts = df['hour'].value_counts().sort_index()
+    if 'Hour' in df.columns:
+        hour_counts = df['Hour'].value_counts().sort_index()
         fig, ax = plt.subplots(figsize=TREND_FIG_SIZE)
         sns.lineplot(x=hour_counts.index, y=hour_counts.values, marker="o", linewidth=3, color="teal", ax=ax)
         ax.set_title("Peak Hour Traffic Violations", fontsize=TREND_TITLE_SIZE, fontweight='bold')
@@ -189,10 +179,7 @@ def plot_peak_hour_traffic(df):
 
 def plot_fines_per_year(df):
     apply_trend_plot_style()
-    df = df.copy()
-    if 'Date' in df.columns:
-        df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
-        df['Year'] = df['Date'].dt.year
+    if 'Year' in df.columns:
         fines_per_year = df.groupby('Year')['Fine_Amount'].sum()
         
         fig, ax = plt.subplots(figsize=TREND_FIG_SIZE)
@@ -210,7 +197,7 @@ def plot_fines_per_year(df):
 
 def plot_avg_fine_location_line(df):
     apply_trend_plot_style()
-    fine_location = df.groupby('Location')['Fine_Amount'].mean().reset_index()
+    fine_location = df.groupby('Location', observed=True)['Fine_Amount'].mean().reset_index()
     fig, ax = plt.subplots(figsize=TREND_FIG_SIZE)
     ax.plot(
         fine_location['Location'],
@@ -1,7 +1,12 @@
+import warnings
 import streamlit as st
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 from streamlit_folium import st_folium
-from core import map_plot
+from core import map_plot, query_backend
+from core.data_schema import ID_COLUMNS
 """
 All Fields in the dataset:
     Violation_ID                  object
@@ -78,30 +83,14 @@ def filter_the_dataset(df: pd.DataFrame) -> pd.DataFrame:
         Comments                      object
     """
     # Date and Time Filteration
-    df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
-    df['Time'] = pd.to_datetime(df['Time'], errors='coerce', format='mixed')
+    # 'Date' is already parsed and the time columns ('Event_Time', 'Year', 'Hour', ...) are derived
+    # once when the dataset is loaded (see data_prepare), nothing to re-parse here
 
     #===================
     # More refiners if required
     # ==================
     return df
 # -------------------------------------------------------------------------------
-def get_last_n_days_data(df: pd.DataFrame, n: int) -> pd.DataFrame:
-    """
-    Filters the DataFrame to include only records from the last n days.
-
-    Args:
-        df (pd.DataFrame): The DataFrame containing a 'Date' column.
-        n (int): The number of days to look back from today.
-
-    Returns:
-        pd.DataFrame: A filtered DataFrame with records from the last n days.
-    """
-    today = pd.Timestamp.now().normalize()
-    n_days_ago = today - pd.Timedelta(days=n)
-    filtered_df = df[(df['Date'] >= n_days_ago) & (df['Date'] <= today)]
-    return filtered_df.copy()
-# ----------------------------------------------------------------------------
 def find_location_columns(df, known_locations, sample_size=20, threshold=0.8) -> list:
     """
     Analyzes a DataFrame to find columns that likely contain location names.
@@ -118,7 +107,7 @@ def find_location_columns(df, known_locations, sample_size=20, threshold=0.8) ->
     potential_location_cols = []
     
     # Consider only object/categorical columns
-    categorical_cols = df.select_dtypes(include=['object']).columns
+    categorical_cols = df.select_dtypes(include=['object', 'category']).columns
     
     for col in categorical_cols:
         # Drop nulls and get unique values
@@ -149,47 +138,176 @@ def find_location_columns(df, known_locations, sample_size=20, threshold=0.8) ->
 # Block 1: Data Quality Analysis Functions
 # ===================== Data Quality Analysis Functions ============================
 
+# Integer columns spanning at most max(COUNTABLE_RANGE, rows) values are counted with np.bincount: their distinct
+# values, quartiles and outliers are all read from the counts instead of hashing, sorting and masking the rows
+COUNTABLE_RANGE = 1 << 20
+# Data quality reports kept in memory (see get_cached_data_quality_analysis)
+QUALITY_REPORT_CACHE_ENTRIES = 8
+
+def _count_integers(values: np.ndarray) -> tuple:
+    """
+    Returns (minimum, counts of every value from the minimum) of an integer array, None when its range is too wide.
+    """
+    if values.size == 0:
+        return None
+    minimum, maximum = int(values.min()), int(values.max())
+    if maximum - minimum >= max(COUNTABLE_RANGE, values.size):
+        return None
+    # Offsets in the value's own dtype overflow when its range is wider than half of it (int8 from -100 to 100):
+    # narrow integers are widened first, wide ones fit their offsets since the range is bounded above
+    if values.dtype.itemsize < np.dtype(np.intp).itemsize:
+        values = values.astype(np.intp)
+    return minimum, np.bincount((values - values.dtype.type(minimum)).astype(np.intp, copy=False),
+                                minlength=maximum - minimum + 1)
+# -------------------------------------------------------------------------------
+def _quantiles_from_counts(minimum: int, counts: np.ndarray, qs: list) -> list:
+    """
+    Returns the quantiles of the values counted by _count_integers, interpolated like pandas (linear).
+    """
+    cumulative = np.cumsum(counts)
+    quantiles = []
+    for q in qs:
+        position = q * (cumulative[-1] - 1)
+        below, above = int(np.floor(position)), int(np.ceil(position))
+        # The value at sorted position k is the first one whose cumulative count exceeds k
+        low = minimum + int(np.searchsorted(cumulative, below, side='right'))
+        high = minimum + int(np.searchsorted(cumulative, above, side='right'))
+        quantiles.append(low + (high - low) * (position - below))
+    return quantiles
+# -------------------------------------------------------------------------------
+def _count_distinct(values: pd.Series) -> int:
+    """
+    Returns the number of distinct non-missing values of a column: hashed by Arrow (on the codes of a Categorical),
+    with pandas factorize for text, Python objects and wide integers.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes = values.cat.codes.to_numpy()
+        # The missing code (-1) is one of the distinct codes when there are missing values
+        return pc.count_distinct(pa.array(codes)).as_py() - int((codes < 0).any())
+    if pd.api.types.is_float_dtype(values) or pd.api.types.is_datetime64_any_dtype(values):
+        try:
+            return pc.count_distinct(pa.array(values.array, from_pandas=True)).as_py()
+        except (pa.ArrowException, TypeError):
+            pass
+    return len(pd.factorize(values, use_na_sentinel=True)[1])
+# -------------------------------------------------------------------------------
 def get_data_quality_analysis(df: pd.DataFrame) -> pd.DataFrame:
     """
     Calculates missing, unique, and duplicate statistics for each column.
-    
+
+    Columnar and single pass over each column, no row is copied:
+    - missing values: counted for the whole frame at once
+    - distinct values: from the counts of narrow integer columns, hashed codes otherwise (see _count_distinct)
+    - IQR outliers: read from the counts of narrow integer columns, np.nanquantile and a mask sum over one
+      block of the other numeric columns
+
     Returns:
         pd.DataFrame: A formatted DataFrame with percentage metrics.
     """
     total_rows = len(df)
-    report = []
-    
+    missing_counts = df.isna().sum()
+    unique_counts = {}
+    outlier_counts = {}
+    block_cols = []
+
     for col in df.columns:
-        missing_count = df[col].isnull().sum()
-        unique_count = df[col].nunique()
-        redundant_count = total_rows - unique_count
-        
-        # present_pct = ((total_rows - missing_count) / total_rows) * 100
-        missing_pct = (missing_count / total_rows) * 100
-        unique_pct = (unique_count / total_rows) * 100
-        duplicate_pct = (redundant_count / total_rows) * 100
-        
-        # Outlier Calculation (IQR Method) for numeric columns
-        outlier_pct = 0.0
-        if pd.api.types.is_numeric_dtype(df[col]):
-            Q1 = df[col].quantile(0.25)
-            Q3 = df[col].quantile(0.75)
+        values = df[col]
+        outlier_counts[col] = 0
+        measured = pd.api.types.is_numeric_dtype(values) and col not in ID_COLUMNS
+        counted = None
+        if pd.api.types.is_integer_dtype(values) and isinstance(values.dtype, np.dtype):
+            counted = _count_integers(values.to_numpy())
+        if counted is None:
+            unique_counts[col] = _count_distinct(values)
+            if measured and total_rows:
+                block_cols.append(col)
+            continue
+
+        minimum, counts = counted
+        unique_counts[col] = int(np.count_nonzero(counts))
+        if measured:
+            Q1, Q3 = _quantiles_from_counts(minimum, counts, [0.25, 0.75])
             IQR = Q3 - Q1
             lower_bound = Q1 - 1.5 * IQR
             upper_bound = Q3 + 1.5 * IQR
-            
-            outliers = df[(df[col] < lower_bound) | (df[col] > upper_bound)]
-            outlier_pct = (len(outliers) / total_rows) * 100
+            # Rows of the values below the lower bound and above the upper bound
+            lower_index = int(np.ceil(lower_bound)) - minimum
+            upper_index = int(np.floor(upper_bound)) - minimum + 1
+            outlier_counts[col] = int(counts[:max(lower_index, 0)].sum() + counts[max(upper_index, 0):].sum())
+
+    # Outlier Calculation (IQR Method) for the other numeric columns, as one float block
+    if block_cols:
+        block = np.empty((total_rows, len(block_cols)), dtype="float64")
+        for position, col in enumerate(block_cols):
+            block[:, position] = df[col].to_numpy(dtype="float64", na_value=np.nan)
+        # All-missing columns have NaN quartiles and no outliers, as with Series.quantile
+        with np.errstate(invalid='ignore'), warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            Q1, Q3 = np.nanquantile(block, [0.25, 0.75], axis=0)
+            IQR = Q3 - Q1
+            outliers = ((block < Q1 - 1.5 * IQR) | (block > Q3 + 1.5 * IQR)).sum(axis=0)
+        outlier_counts.update(zip(block_cols, outliers.tolist()))
+
+    def percentages(counts) -> list:
+        return [round(count / total_rows * 100, 2) if total_rows else np.nan for count in counts]
+
+    return pd.DataFrame({
+        'Column Name': df.columns,
+        'Missing (%)': percentages(missing_counts.to_numpy()),
+        'Unique (%)': percentages(unique_counts[col] for col in df.columns),
+        'Duplicate (%)': percentages(total_rows - unique_counts[col] for col in df.columns),
+        'Outlier (%)': percentages(outlier_counts[col] for col in df.columns),
+    })
+# -------------------------------------------------------------------------------
+@st.cache_data(max_entries=QUALITY_REPORT_CACHE_ENTRIES, show_spinner=False)
+def get_cached_data_quality_analysis(dataset_key: tuple, _df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Returns get_data_quality_analysis(_df) computed once per dataset_key: (path, dataset fingerprint, ...),
+    anything identifying the rows of _df (see data_loader.dataset_fingerprint). _df itself is not hashed.
+    """
+    return get_data_quality_analysis(_df)
+# -------------------------------------------------------------------------------
+def get_approximate_data_quality_analysis(column_sketches: dict) -> pd.DataFrame:
+    """
+    Estimates the statistics of get_data_quality_analysis from column sketches (see core/sketches.py)
+    instead of the rows: distinct values from HyperLogLog, the IQR quartiles and the share of values
+    outside the fences from KLL. The '±' columns give the error bound of the estimated percentages.
+
+    Args:
+        column_sketches (dict): column -> sketches.ColumnSketch (see sketches.sketch_dataset).
+
+    Returns:
+        pd.DataFrame: A formatted DataFrame with percentage metrics and their error bounds.
+    """
+    report = []
+    for col, sketch in column_sketches.items():
+        total_rows = max(sketch.rows, 1)
+        distinct = sketch.distinct.estimate()
+        present = sketch.rows - sketch.missing
+        # There are never more distinct values than values
+        unique_count = min(distinct.value, present)
+        unique_error = (min(distinct.upper, present) - min(distinct.lower, present)) / 2
+
+        outlier_pct, outlier_error = 0.0, 0.0
+        if sketch.numbers is not None and sketch.numbers.count > 0 and col not in ID_COLUMNS:
+            Q1 = sketch.numbers.quantile(0.25).value
+            Q3 = sketch.numbers.quantile(0.75).value
+            IQR = Q3 - Q1
+            below = sketch.numbers.rank(Q1 - 1.5 * IQR)
+            above = sketch.numbers.rank(Q3 + 1.5 * IQR, inclusive=True)
+            numbers_share = sketch.numbers.count / total_rows
+            outlier_pct = (below.value + 1 - above.value) * numbers_share * 100
+            outlier_error = ((below.upper - below.lower) + (above.upper - above.lower)) / 2 * numbers_share * 100
 
         report.append({
             'Column Name': col,
-            # 'Present (%)': round(present_pct, 2),
-            'Missing (%)': round(missing_pct, 2),
-            'Unique (%)': round(unique_pct, 2),
-            'Duplicate (%)': round(duplicate_pct, 2),
-            'Outlier (%)': round(outlier_pct, 2)
+            'Missing (%)': round(sketch.missing / total_rows * 100, 2),
+            'Unique (%)': round(unique_count / total_rows * 100, 2),
+            'Duplicate (%)': round((sketch.rows - unique_count) / total_rows * 100, 2),
+            'Unique/Duplicate ± (%)': round(unique_error / total_rows * 100, 2),
+            'Outlier (%)': round(outlier_pct, 2),
+            'Outlier ± (%)': round(outlier_error, 2)
         })
-        
 
     return pd.DataFrame(report)
 
@@ -200,31 +318,35 @@ def get_data_quality_analysis(df: pd.DataFrame) -> pd.DataFrame:
 # Block 2: Numerical Analysis Functions (Tabular/Grouped)
 # ===================== Numerical Analysis Functions ===============================
 
-def get_violation_stats_table(df: pd.DataFrame) -> pd.DataFrame:
+# The grouped tables below take a DataFrame or a query_backend.DatasetScan (see query_backend.get_query_source),
+# the group-bys run on the matching backend and only the small aggregated result is shaped here.
+
+def get_violation_stats_table(df) -> pd.DataFrame:
     """
     Aggregates Fine Amount by Violation Type (Count, Sum, Mean, Min, Max).
     """
     if 'Violation_Type' not in df.columns or 'Fine_Amount' not in df.columns:
         return pd.DataFrame()
     
-    stats = df.groupby('Violation_Type')['Fine_Amount'].agg(['count', 'sum', 'mean', 'min', 'max']).reset_index()
+    stats = query_backend.group_aggregate(df, ['Violation_Type'], [('Fine_Amount', func) for func in ['count', 'sum', 'mean', 'min', 'max']])
     stats.columns = ['Violation Type', 'Total Incidents', 'Total Fines', 'Average Fine', 'Min Fine', 'Max Fine']
-    stats = stats.sort_values(by='Total Fines', ascending=False)
+    stats = stats.sort_values(by='Total Fines', ascending=False, kind='stable')
     return stats
 # -------------------------------------------------------------------------------
-def get_demographic_pivot(df: pd.DataFrame) -> pd.DataFrame:
+def get_demographic_pivot(df) -> pd.DataFrame:
     """
     Creates a pivot table of Violation Counts by Violation Type (Rows) and Driver Gender (Columns).
     """
     if 'Violation_Type' not in df.columns or 'Driver_Gender' not in df.columns:
         return pd.DataFrame()
     
-    pivot = df.pivot_table(index='Violation_Type', columns='Driver_Gender', values='Violation_ID', aggfunc='count', fill_value=0)
+    counts = query_backend.group_aggregate(df, ['Violation_Type', 'Driver_Gender'], [('Violation_ID', 'count')])
+    pivot = counts.pivot_table(index='Violation_Type', columns='Driver_Gender', values='Violation_ID_count', aggfunc='sum', fill_value=0, observed=True)
     pivot['Total'] = pivot.sum(axis=1)
-    pivot = pivot.sort_values(by='Total', ascending=False)
+    pivot = pivot.sort_values(by='Total', ascending=False, kind='stable')
     return pivot
 # -------------------------------------------------------------------------------
-def get_vehicle_analysis_table(df: pd.DataFrame) -> pd.DataFrame:
+def get_vehicle_analysis_table(df) -> pd.DataFrame:
     """
     Aggregates fines and counts by Vehicle Type and Model Year.
     """
@@ -232,22 +354,20 @@ def get_vehicle_analysis_table(df: pd.DataFrame) -> pd.DataFrame:
     if not all(col in df.columns for col in cols_needed):
         return pd.DataFrame()
         
-    stats = df.groupby(['Vehicle_Type', 'Vehicle_Model_Year'])['Fine_Amount'].agg(['count', 'mean']).reset_index()
+    stats = query_backend.group_aggregate(df, ['Vehicle_Type', 'Vehicle_Model_Year'], [('Fine_Amount', 'count'), ('Fine_Amount', 'mean')])
     stats.columns = ['Vehicle Type', 'Model Year', 'Violation Count', 'Avg Fine']
-    stats = stats.sort_values(by='Violation Count', ascending=False)
+    stats = stats.sort_values(by='Violation Count', ascending=False, kind='stable')
     return stats
 # -------------------------------------------------------------------------------
 def get_speeding_analysis_by_zone(df: pd.DataFrame) -> pd.DataFrame:
     """
     Analyzes speeding violations grouped by Speed Limit zones.
     """
-    cols_needed = ['Speed_Limit', 'Recorded_Speed']
+    cols_needed = ['Speed_Limit', 'Excess_Speed']
     if not all(col in df.columns for col in cols_needed):
         return pd.DataFrame()
     
-    df_speed = df.copy()
-    df_speed['Excess_Speed'] = df_speed['Recorded_Speed'] - df_speed['Speed_Limit']
-    df_speed = df_speed[df_speed['Excess_Speed'] > 0] # Only actual speeding
+    df_speed = df[df['Excess_Speed'] > 0] # Only actual speeding
     
     if df_speed.empty:
         return pd.DataFrame()
@@ -256,7 +376,7 @@ def get_speeding_analysis_by_zone(df: pd.DataFrame) -> pd.DataFrame:
     stats.columns = ['Speed Limit Zone', 'Speeding Incidents', 'Avg Excess Speed', 'Max Excess Speed']
     return stats
 # -------------------------------------------------------------------------------
-def get_environmental_stats(df: pd.DataFrame) -> pd.DataFrame:
+def get_environmental_stats(df) -> pd.DataFrame:
     """
     Grouped analysis of violations by Weather Condition and Road Condition.
     """
@@ -264,59 +384,36 @@ def get_environmental_stats(df: pd.DataFrame) -> pd.DataFrame:
     if not all(col in df.columns for col in cols_needed):
         return pd.DataFrame()
         
-    stats = df.groupby(['Weather_Condition', 'Road_Condition']).size().reset_index(name='Violation Count')
-    stats = stats.sort_values(by='Violation Count', ascending=False)
+    stats = query_backend.group_aggregate(df, ['Weather_Condition', 'Road_Condition'], [(None, 'size')])
+    stats = stats.rename(columns={'size': 'Violation Count'})
+    stats = stats.sort_values(by='Violation Count', ascending=False, kind='stable')
     return stats
 # -------------------------------------------------------------------------------
-def get_hourly_patterns_table(df: pd.DataFrame) -> pd.DataFrame:
+def get_hourly_patterns_table(df) -> pd.DataFrame:
     """
     Pivot table of Violation Counts by Day of Week vs Hour of Day.
     """
-    if 'Time' not in df.columns or 'Date' not in df.columns:
+    if 'Hour' not in df.columns or 'DayOfWeek' not in df.columns:
         return pd.DataFrame()
         
-    temp_df = df.copy()
-    # Fix UserWarning: parse dates/times with format='mixed' to handle inconsistencies
-    temp_df['Hour'] = pd.to_datetime(temp_df['Time'], format='mixed', errors='coerce').dt.hour
-    temp_df['Day'] = pd.to_datetime(temp_df['Date'], format='mixed', errors='coerce').dt.day_name()
-    
-    # Order days correctly
-    days_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-    temp_df['Day'] = pd.Categorical(temp_df['Day'], categories=days_order, ordered=True)
-    
-    # Fix FutureWarning: specify observed=False for categorical data
-    pivot = temp_df.pivot_table(index='Day', columns='Hour', values='Violation_ID', aggfunc='count', fill_value=0, observed=False)
+    counts = query_backend.group_aggregate(df, ['DayOfWeek', 'Hour'], [('Violation_ID', 'count')])
+    # 'DayOfWeek' is an ordered Categorical, observed=False keeps every day in Monday..Sunday order
+    pivot = counts.pivot_table(index='DayOfWeek', columns='Hour', values='Violation_ID_count', aggfunc='sum', fill_value=0, observed=False)
+    pivot.index = pivot.index.rename('Day')
     return pivot
 # -------------------------------------------------------------------------------
-def get_custom_grouping(df: pd.DataFrame, group_cols: list, agg_cols: list, agg_funcs: list) -> pd.DataFrame:
+def get_custom_grouping(df, group_cols: list, agg_cols: list, agg_funcs: list) -> pd.DataFrame:
     """
     Dynamically groups the dataframe based on user input.
     """
     if not group_cols or not agg_cols or not agg_funcs:
         return pd.DataFrame()
     
-    # Create the aggregation dictionary: apply all selected functions to all selected numerical columns
-    agg_dict = {col: agg_funcs for col in agg_cols}
+    # Apply all selected functions to all selected numerical columns, the results are named like 'Fine_Amount_sum'
+    aggregations = [(col, func) for col in agg_cols for func in agg_funcs]
     
     try:
-        grouped_df = df.groupby(group_cols).agg(agg_dict).reset_index()
-        
-        # Flatten MultiIndex columns (e.g., ('Fine_Amount', 'sum') -> 'Fine_Amount_sum')
-        new_cols = []
-        for col in grouped_df.columns:
-            if isinstance(col, tuple):
-                 # Skip the grouping columns if they happen to be part of the index/tuple structure in some pandas versions,
-                 # but usually reset_index handles grouping cols nicely.
-                 # The aggregated columns will be tuples like ('Fine_Amount', 'mean')
-                 if col[1] == '':
-                     new_cols.append(col[0])
-                 else:
-                     new_cols.append(f"{col[0]}_{col[1]}")
-            else:
-                new_cols.append(col)
-        
-        grouped_df.columns = new_cols
-        return grouped_df
+        return query_backend.group_aggregate(df, group_cols, aggregations)
     except Exception as e:
         print(f"Grouping Error: {e}")
         return pd.DataFrame()
@@ -336,8 +433,8 @@ def render_choropleth_map_on_page(map_data, geojson_data, location_col, value_co
         st.warning(f"No data available for {title}.")
         return
 
-    # Capitalize location names
-    map_data[location_col] = map_data[location_col].str.title()
+    # Capitalize location names (on a new frame, the caller's map_data is kept as is)
+    map_data = map_data.assign(**{location_col: map_data[location_col].astype(str).str.title()})
 
     # 4:1 Column Layout
     col1, col2 = st.columns([3, 1],border=True)
@@ -2,6 +2,8 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 import pandas as pd
 import matplotlib.ticker as mtick
+from core.data_schema import format_id_columns
+from core import severity
 
 # ---------------------------------------------------------
 # UNIFORM STYLE CONFIGURATION
@@ -56,11 +58,9 @@ def plot_speed_exceeded_vs_weather(df):
     Plots Average Speed Exceeded vs Weather Condition.
     """
     apply_plot_style()
-    df['Speed_Exceeded'] = df['Recorded_Speed'] - df['Speed_Limit']
-
     fig, ax = plt.subplots(figsize=FIG_SIZE)
 
-    avg_speed = df.groupby('Weather_Condition')['Speed_Exceeded'].mean().sort_values(ascending=False)
+    avg_speed = df.groupby('Weather_Condition', observed=True)['Excess_Speed'].mean().sort_values(ascending=False)
 
     sns.barplot(
         x=avg_speed.index,
@@ -91,7 +91,7 @@ def plot_avg_fine_by_violation_type(df):
     apply_plot_style()
     fig, ax = plt.subplots(figsize=FIG_SIZE)
 
-    avg_fines = df.groupby('Violation_Type')['Fine_Amount'].mean().sort_values(ascending=False)
+    avg_fines = df.groupby('Violation_Type', observed=True)['Fine_Amount'].mean().sort_values(ascending=False)
 
     sns.scatterplot(
         x=avg_fines.index, 
@@ -121,7 +121,7 @@ def plot_bar_or_count(df, x_col, y_col):
     fig, ax = plt.subplots(figsize=FIG_SIZE)
 
     if y_col == 'Count':
-        sns.countplot(x=x_col, data=df, ax=ax, order=df[x_col].value_counts().index, palette=UNI_PALETTE)
+        sns.countplot(x=x_col, data=df, ax=ax, order=df[x_col].value_counts().loc[lambda counts: counts > 0].index, palette=UNI_PALETTE)
         ax.set_title(f"Count of {x_col}")
         ax.set_ylabel("Count")
     else:
@@ -170,7 +170,7 @@ def plot_correlation_heatmap(df, numerical_cols):
 def plot_top_5_locations_violation(df):
     apply_plot_style()
     fig = plt.figure(figsize=FIG_SIZE)
-    Location_Count = df['Location'].value_counts().head(5)
+    Location_Count = df['Location'].value_counts().loc[lambda counts: counts > 0].head(5)
     sns.barplot(x=Location_Count.index, y=Location_Count.values, hue=Location_Count.index, legend=False, palette="viridis")
     plt.title("Top 5 Locations (Violations)")
     plt.xlabel("Location")
@@ -183,7 +183,7 @@ def plot_top_5_locations_violation(df):
 def plot_vehicle_type_vs_violation_type(df):
     apply_plot_style()
     fig = plt.figure(figsize=FIG_SIZE)
-    sns.countplot(data=df, x='Violation_Type', hue='Vehicle_Type', palette=UNI_PALETTE)
+    sns.countplot(data=df, x='Violation_Type', hue='Vehicle_Type', order=df['Violation_Type'].dropna().unique().tolist(), hue_order=df['Vehicle_Type'].dropna().unique().tolist(), palette=UNI_PALETTE)
     plt.title('Vehicle Type vs Violation Type')
     plt.xlabel('Violation Type')
     plt.ylabel('Number of Violations')
@@ -200,7 +200,7 @@ def plot_vehicle_type_vs_violation_type(df):
 
 def plot_violation_type_percentage(df):
     apply_plot_style()
-    violation_counts = df['Violation_Type'].value_counts()
+    violation_counts = df['Violation_Type'].value_counts().loc[lambda counts: counts > 0]
     fig = plt.figure(figsize=FIG_SIZE)
     
     # Use distinct colors
@@ -228,7 +228,7 @@ def plot_repeat_offenders(df):
     palette = sns.color_palette("rocket_r", n_colors=10) 
     
     if 'Previous_Violations' in df.columns:
-        violations = df[df['Previous_Violations']>3].head(10)
+        violations = format_id_columns(df[df['Previous_Violations']>3].head(10))
         if not violations.empty:
             plt.barh(
                 violations.get('Violation_ID', range(len(violations))), 
@@ -248,7 +248,7 @@ def plot_repeat_offenders(df):
 
 def plot_violation_by_location_pie(df):
     apply_plot_style()
-    location_counts = df["Location"].value_counts()
+    location_counts = df["Location"].value_counts().loc[lambda counts: counts > 0]
     if len(location_counts) > 10:
         top_n = location_counts.head(10)
         others_count = location_counts.iloc[10:].sum()
@@ -290,12 +290,10 @@ def plot_violation_by_location_pie(df):
 
 def plot_speeding_vs_road_condition(df):
     apply_plot_style()
-    df = df.copy()
-    if 'Recorded_Speed' in df.columns and 'Speed_Limit' in df.columns:
-        df['Speeding'] = df['Recorded_Speed'] - df['Speed_Limit']
-        speed_df = df[df['Speeding'] > 0]
+    if 'Excess_Speed' in df.columns:
+        speed_df = df[df['Excess_Speed'] > 0]
         
-        avg_speeding = speed_df.groupby('Road_Condition')['Speeding'].mean().reset_index()
+        avg_speeding = speed_df.groupby('Road_Condition', observed=True)['Excess_Speed'].mean().reset_index(name='Speeding')
         
         fig = plt.figure(figsize=FIG_SIZE)
         sns.barplot(
@@ -319,7 +317,7 @@ def plot_speeding_vs_road_condition(df):
 def plot_fines_vs_weather_severity(df):
     apply_plot_style()
     fig = plt.figure(figsize=FIG_SIZE)
-    df_severity = df.groupby('Weather_Condition')['Fine_Amount'].mean().sort_values()
+    df_severity = df.groupby('Weather_Condition', observed=True)['Fine_Amount'].mean().sort_values()
     
     sns.barplot(
         x=df_severity.values,
@@ -342,30 +340,8 @@ def plot_fines_vs_weather_severity(df):
 
 def plot_severity_heatmap_by_location(df):
     apply_plot_style()
-    df = df.copy()
-    
-    def calc_severity_score(row):
-        severity = 0
-        if pd.notnull(row.get('Fine_Amount')): severity += row['Fine_Amount'] / 1000
-        if pd.notnull(row.get('Penalty_Points')): severity += row['Penalty_Points'] 
-        if pd.notnull(row.get('Recorded_Speed')) and pd.notnull(row.get('Speed_Limit')):
-            overspeed = row['Recorded_Speed'] - row['Speed_Limit']
-            if overspeed > 0: severity += overspeed /10
-        if pd.notnull(row.get('Alcohol_Level')): severity += row['Alcohol_Level'] * 10
-        if row.get('Helmet_Worn') == 'No': severity += 10
-        if row.get('Seatbelt_Worn') == 'No': severity += 10
-        if row.get('Traffic_Light_Status') == 'Red': severity += 15
-        if pd.notnull(row.get('Previous_Violations')): severity += row['Previous_Violations'] * 1.5
-        return severity
-
-    df['Violation_Severity_Score'] = df.apply(calc_severity_score, axis=1)
     
-    location_heatmap = df.pivot_table(
-        values='Violation_Severity_Score',
-        index='Location',
-        columns='Violation_Type',
-        aggfunc='mean'
-    )
+    location_heatmap = severity.get_severity_by_location(df)
 
     fig = plt.figure(figsize=FIG_SIZE)
     sns.heatmap(
@@ -396,7 +372,7 @@ def plot_avg_fine_by_violation_type_2(df):
 
 def plot_violation_by_road_condition(df):
     apply_plot_style()
-    road_counts = df['Road_Condition'].value_counts()
+    road_counts = df['Road_Condition'].value_counts().loc[lambda counts: counts > 0]
     
     fig, ax = plt.subplots(figsize=FIG_SIZE)
     
@@ -436,7 +412,8 @@ def plot_weather_impact_heatmap(df):
         columns="Weather_Condition",
         values="Violation_ID",
         aggfunc="count",
-        fill_value=0
+        fill_value=0,
+        observed=True
     )
     fig = plt.figure(figsize=FIG_SIZE)
     sns.heatmap(
@@ -462,7 +439,7 @@ def plot_weather_impact_heatmap(df):
 
 def plot_vehicle_risk_countplot(df):
     apply_plot_style()
-    vehicle_counts = df['Vehicle_Type'].value_counts().index
+    vehicle_counts = df['Vehicle_Type'].value_counts().loc[lambda counts: counts > 0].index
     fig = plt.figure(figsize=FIG_SIZE)
     sns.countplot(
         y=df['Vehicle_Type'],
@@ -482,22 +459,10 @@ def plot_vehicle_risk_countplot(df):
 
 def plot_age_alcohol_heatmap(df):
     apply_plot_style()
-    df = df.copy()
-    bins = [0, 25, 35, 45, 60, 100]
-    labels = ["18-25", "26-35", "36-45", "46-60", "60+"]
-    
-    max_alcohol = df['Alcohol_Level'].max()
-    upper = max(0.251, max_alcohol)
-    ranges = [0, 0.03, 0.08, 0.15, 0.25, upper]
-    safelevels = ['Safe', 'Mild', 'Risky', 'High Risk', 'Dangerous']
-    ranges = sorted(list(set(ranges)))
-    
-    if len(ranges) - 1 != len(safelevels): 
+    if 'Age_Group' not in df.columns or 'Alcohol_Range' not in df.columns:
         return None
 
-    df["Age_Group"] = pd.cut(df["Driver_Age"], bins=bins, labels=labels, include_lowest=True)
-    df["Alcohol_Range"] = pd.cut(df["Alcohol_Level"], bins=ranges, labels=safelevels, include_lowest=True)
-    
+    # Age and alcohol bins are derived once when the dataset is loaded (see data_prepare)
     heatmap_data = pd.crosstab(df['Age_Group'], df['Alcohol_Range'])
     
     fig = plt.figure(figsize=FIG_SIZE)
@@ -521,7 +486,7 @@ def plot_age_alcohol_heatmap(df):
 
 def plot_fine_vs_vehicle_pie(df):
     apply_plot_style()
-    fine_data = df.groupby('Vehicle_Type')['Fine_Amount'].sum()
+    fine_data = df.groupby('Vehicle_Type', observed=True)['Fine_Amount'].sum()
     fig, ax = plt.subplots(figsize=FIG_SIZE)
     
     wedges, texts, autotexts = ax.pie(
@@ -550,7 +515,7 @@ def plot_fine_vs_vehicle_pie(df):
 
 def plot_license_validity_by_gender(df):
     apply_plot_style()
-    validity_gender = df.groupby(['License_Validity', 'Driver_Gender']).size().unstack(fill_value=0)
+    validity_gender = df.groupby(['License_Validity', 'Driver_Gender'], observed=True).size().unstack(fill_value=0)
     
     fig, ax = plt.subplots(figsize=FIG_SIZE)
     validity_gender.plot(
@@ -614,13 +579,11 @@ def plot_violation_types_vs_weather_heatmap(df):
 
 def plot_driver_risk_by_age(df):
     apply_plot_style()
-    df = df.copy()
-    bins = [0, 25, 35, 45, 60, 100]
-    labels = ["18-25", "26-35", "36-45", "46-60", "60+"]
-    df["Age_Group"] = pd.cut(df["Driver_Age"], bins=bins, labels=labels, include_lowest=True)
-    
-    df['Alcohol_Flag'] = (df['Breathalyzer_Result'] == "Positive").astype(int)
-    df["Risk_Level"] = df["Previous_Violations"] + df["Alcohol_Flag"]
+    alcohol_flag = (df['Breathalyzer_Result'] == "Positive").astype(int)
+    df = df.assign(
+        Alcohol_Flag=alcohol_flag,
+        Risk_Level=df["Previous_Violations"] + alcohol_flag,
+    )
 
     risk_by_age = df.groupby("Age_Group", observed=False)["Risk_Level"].mean().reset_index()
     risk_by_age = risk_by_age.sort_values("Age_Group")
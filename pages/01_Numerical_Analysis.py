@@ -1,7 +1,7 @@
 import streamlit as st
 import pandas as pd
-from core.sidebar import render_sidebar
-from core import utils
+from core.sidebar import render_dataset_selector, load_selected_dataset, load_selected_cube, load_selected_sketches, render_memory_report, get_dataset_years
+from core import utils, data_prepare, data_schema, query_backend, data_variables, data_loader
 
 # ------------------------------
 # PAGE CONFIG
@@ -136,10 +136,12 @@ st.markdown(quick_navigator, unsafe_allow_html=True)
 # LOAD DATA
 # ------------------------------
 try:
-    df_original = render_sidebar()
-    if df_original is None:
+    dataset_entry = render_dataset_selector()
+    if dataset_entry is None:
         st.warning("No dataset selected. Please select one from the sidebar.")
         st.stop()
+    df_original = load_selected_dataset(dataset_entry)
+    render_memory_report()
 except Exception as e:
     st.error(f"An error occurred while loading the data: {e}")
     st.stop()
@@ -149,12 +151,11 @@ except Exception as e:
 # ------------------------------
 with st.expander("Filters", expanded=True):
     start_date, end_date = None, None
-    df = df_original.copy() # Work with a copy
+    df = df_original # Shared frame: derive new frames from it, never modify it in place
 
     try:
         if 'Date' in df.columns:
-            df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
-            df.dropna(subset=['Date'], inplace=True)
+            df = df.dropna(subset=['Date'])
             if not df['Date'].empty:
                 min_date = df['Date'].min().date()
                 max_date = df['Date'].max().date()
@@ -175,24 +176,47 @@ with st.expander("Filters", expanded=True):
         if start_date > end_date:
             st.error("Error: End date must fall after start date.")
             st.stop()
-        df_filtered = df[(df['Date'].dt.date >= start_date) & (df['Date'].dt.date <= end_date)]
+        df_filtered = data_prepare.get_date_range(df, start_date, end_date)
     else:
         df_filtered = df
 
-    # CRITICAL FIX: Ensure Violation_ID is string to prevent PyArrow serialization errors
-    if 'Violation_ID' in df_filtered.columns:
-        df_filtered['Violation_ID'] = df_filtered['Violation_ID'].astype(str)
-        
     st.write(f"### Showing data for `{df_filtered.shape[0]}`x`{df_filtered.shape[1]}` records based on the selected filters.")
+
+# The grouped tables are read from the materialized aggregates of the dataset cube when it holds them (see core/data_cube.py),
+# the others run on DuckDB over the stored dataset files for large datasets, on pandas otherwise (see core/query_backend.py)
+dataset_cube = None
+if set(data_variables.TRAFFIC_VIOLATION_COLUMNS).issubset(df_original.columns) and 'Date' in df_original.columns:
+    try:
+        dataset_cube = load_selected_cube(dataset_entry)
+    except Exception as e:
+        st.warning(f"Could not aggregate the dataset, the tables are computed from the rows: {e}")
+query_source = query_backend.get_query_source(df_filtered, dataset_entry['path'], start_date, end_date, dataset_cube)
 st.markdown("---")
 
 st.markdown('<h2 id="dataset-info" style="text-align: center;">Dataset Information</h3>', unsafe_allow_html=True)
+# The derived analysis columns (see data_prepare) are not part of the dataset, keep them out of the dataset information
+df_source = data_prepare.drop_derived_columns(df)
+df_filtered_source = data_prepare.drop_derived_columns(df_filtered)
 # -----------------------------------d
 # Missing Duplicate Value Analysis
 # -----------------------------------
 st.subheader("Missing Duplicate Value Analysis")
 st.write("This section provides a combined view of column names, data types, and descriptive statistics for the filtered data.")
-data_quality_df = utils.get_data_quality_analysis(df)
+approximate_quality = st.toggle(
+    "Approximate statistics",
+    value=False,
+    help="Estimates the unique and outlier percentages from small sketches built one stored partition at a time "
+         "(HyperLogLog, KLL), for very large datasets. The '±' columns give the error bounds.",
+)
+if approximate_quality:
+    # The undated rows are left out like above, they are not part of any year
+    dataset_years = get_dataset_years(dataset_entry) if 'Date' in df_original.columns else []
+    quality_years = (dataset_years[0], dataset_years[-1]) if dataset_years else None
+    data_quality_df = utils.get_approximate_data_quality_analysis(load_selected_sketches(dataset_entry, list(df_source.columns), quality_years))
+else:
+    # Computed once per dataset version, df_source holds the rows of the whole dataset (the dated ones when there is a 'Date')
+    quality_key = (dataset_entry['path'], data_loader.dataset_fingerprint(dataset_entry['path']), 'Date' in df_source.columns)
+    data_quality_df = utils.get_cached_data_quality_analysis(quality_key, df_source)
 st.dataframe(data_quality_df, width='stretch', hide_index=True)   
 # -----------------------------------
 # 5 Sample Rows
@@ -200,7 +224,8 @@ st.dataframe(data_quality_df, width='stretch', hide_index=True)
 st.subheader("5 Sample Rows of the Dataset")
 st.write("This section provides a combined view of column names, data types, and descriptive statistics for the filtered data.")
 with st.expander("5 Sample Rows", expanded=True):
-    st.write(df_filtered.sample(5))
+    # IDs are stored as numbers, only the shown rows are formatted (see data_schema.format_id_columns)
+    st.write(data_schema.format_id_columns(df_filtered_source.sample(5)))
 st.markdown("---")
 # -----------------------------------
 # Column Information
@@ -210,8 +235,8 @@ st.write("This section provides a combined view of column names, data types, and
 with st.expander("Column Information", expanded=True):
     # Create a new dataframe for column information
     info_df = pd.DataFrame({
-        'Field': df_filtered.columns,
-        'Data Type': [str(x) for x in df_filtered.dtypes]
+        'Field': df_filtered_source.columns,
+        'Data Type': [str(x) for x in df_filtered_source.dtypes]
     })
     # Explicitly ensure 'Data Type' is treated as string for Arrow
     info_df['Data Type'] = info_df['Data Type'].astype(str)
@@ -219,7 +244,8 @@ with st.expander("Column Information", expanded=True):
     info_df = info_df.reset_index(drop=True)
 
     # Get the descriptive statistics & Merge the two dataframes
-    desc_df = df_filtered.describe(include='all').transpose()
+    # The IDs are described as text (count, unique, top, freq), not as numbers
+    desc_df = data_schema.format_id_columns(df_filtered_source).describe(include='all').transpose()
     for col in desc_df.columns:
         if desc_df[col].dtype == 'object':
             desc_df[col] = desc_df[col].astype(str)
@@ -238,7 +264,7 @@ st.markdown("---")
 st.markdown('<h2 id="violation-stats" style="text-align: center;">Violation Statistics & Fine Analysis</h3>', unsafe_allow_html=True)
 st.write("This section provides a combined view of column names, data types, and descriptive statistics for the filtered data.")
 with st.expander("Analysis by Violation Type", expanded=True):
-    violation_stats = utils.get_violation_stats_table(df_filtered)
+    violation_stats = utils.get_violation_stats_table(query_source)
     if not violation_stats.empty:
         # Format currency columns if they exist
         format_dict = {}
@@ -260,7 +286,7 @@ st.markdown("---")
 st.markdown('<h2 id="vehicle-analysis" style="text-align: center;">Vehicle & Fine Analysis</h3>', unsafe_allow_html=True)
 st.write("This section provides a combined view of column names, data types, and descriptive statistics for the filtered data.")
 with st.expander("Fines by Vehicle Type & Year", expanded=True):
-    vehicle_stats = utils.get_vehicle_analysis_table(df_filtered)
+    vehicle_stats = utils.get_vehicle_analysis_table(query_source)
     if not vehicle_stats.empty:
         format_dict = {}
         if "Avg Fine" in vehicle_stats.columns:
@@ -280,7 +306,7 @@ st.markdown("---")
 st.markdown('<h2 id="environmental-impact" style="text-align: center;">Environmental Impact</h3>', unsafe_allow_html=True)
 st.write("This section provides a combined view of column names, data types, and descriptive statistics for the filtered data.")
 with st.expander("Violations by Weather & Road Condition", expanded=True):
-    env_stats = utils.get_environmental_stats(df_filtered)
+    env_stats = utils.get_environmental_stats(query_source)
     if not env_stats.empty:
         st.dataframe(env_stats, width='stretch', hide_index=True)
     else:
@@ -292,7 +318,7 @@ st.markdown("---")
 st.markdown('<h2 id="hourly-patterns" style="text-align: center;">Hourly Violation Patterns</h3>', unsafe_allow_html=True)
 st.write("This section provides a combined view of column names, data types, and descriptive statistics for the filtered data.")
 with st.expander("Day of Week vs Hour (Pivot)", expanded=True):
-    hourly_pivot = utils.get_hourly_patterns_table(df_filtered)
+    hourly_pivot = utils.get_hourly_patterns_table(query_source)
     if not hourly_pivot.empty:
         # highlighting max values for better readability in table form
         # use simple gradient for better readability
@@ -308,8 +334,9 @@ st.write("This section provides a combined view of column names, data types, and
 
 with st.expander("🛠️ Custom Grouping & Aggregation", expanded=True):
     # Separate columns by type
-    cat_cols = df_filtered.select_dtypes(include=['object', 'category', 'bool']).columns.tolist()
-    num_cols = df_filtered.select_dtypes(include=['number']).columns.tolist()
+    cat_cols = df_filtered_source.select_dtypes(include=['object', 'category', 'bool']).columns.tolist()
+    cat_cols += [col for col in data_schema.ID_COLUMNS if col in df_filtered_source.columns and col not in cat_cols]
+    num_cols = data_prepare.get_measure_columns(df_filtered_source)
 
     c1, c2, c3 = st.columns(3)
     with c1:
@@ -320,7 +347,7 @@ with st.expander("🛠️ Custom Grouping & Aggregation", expanded=True):
         selected_funcs = st.multiselect("3. Select Aggregation Functions", ['count', 'sum', 'mean', 'min', 'max', 'std'], default=['count', 'mean'])
 
     if selected_group_cols and selected_agg_cols and selected_funcs:
-        custom_df = utils.get_custom_grouping(df_filtered, selected_group_cols, selected_agg_cols, selected_funcs)
+        custom_df = data_schema.format_id_columns(utils.get_custom_grouping(query_source, selected_group_cols, selected_agg_cols, selected_funcs))
         
         if not custom_df.empty:
             st.write(f"### Resulting Table: {custom_df.shape[0]} rows")
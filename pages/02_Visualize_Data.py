@@ -2,6 +2,7 @@ import streamlit as st
 import pandas as pd
 from core.sidebar import render_sidebar
 import core.visualize_plot as visualize_plot
+import core.data_prepare as data_prepare
 import matplotlib.pyplot as plt
 import seaborn as sns
 
@@ -213,13 +214,13 @@ def render_plot_item(title, insight, plot_func, team_member_name, df_local, key_
         key_start = f"start_{key_suffix}"
         key_end = f"end_{key_suffix}"
         
-        filtered_df = df_local.copy()
+        filtered_df = df_local
         
         # Determine min/max date if possible
         min_d, max_d = None, None
         if 'Date' in df_local.columns:
             try:
-                temp_dates = pd.to_datetime(df_local['Date'], errors='coerce').dropna()
+                temp_dates = df_local['Date'].dropna()
                 if not temp_dates.empty:
                     min_d = temp_dates.min().date()
                     max_d = temp_dates.max().date()
@@ -239,13 +240,7 @@ def render_plot_item(title, insight, plot_func, team_member_name, df_local, key_
                 if s_date > e_date:
                     st.error("Start Date must be before End Date.")
                 else:
-                    if filtered_df['Date'].dtype == 'object':
-                            filtered_df['Date'] = pd.to_datetime(filtered_df['Date'], errors='coerce')
-                    
-                    filtered_df = filtered_df[
-                        (filtered_df['Date'].dt.date >= s_date) & 
-                        (filtered_df['Date'].dt.date <= e_date)
-                    ]
+                    filtered_df = data_prepare.get_date_range(filtered_df, s_date, e_date)
         
         if filtered_df.empty:
             st.warning("No data available for the selected range.")
@@ -472,8 +467,9 @@ with st.expander("Custom Bar/Count Plot", expanded=True):
     
     with st.form(key="bar_plot_form"):
         # --- Bar Plot Controls ---
-        all_categorical_cols = [col for col in df.columns if df[col].dtype == 'object' and df[col].nunique() < 100]
-        all_numerical_cols = df.select_dtypes(include=['float64', 'int64']).columns.tolist()
+        df_source = data_prepare.drop_derived_columns(df)
+        all_categorical_cols = [col for col in df_source.select_dtypes(include=['object', 'category']).columns if df[col].nunique() < 100]
+        all_numerical_cols = data_prepare.get_measure_columns(df_source)
 
         if not all_categorical_cols:
             st.warning("No suitable categorical columns found for the X-axis of a bar plot.")
@@ -488,7 +484,7 @@ with st.expander("Custom Bar/Count Plot", expanded=True):
 
             # --- Date Range Selector ---
             bar_start_date, bar_end_date = None, None
-            plot_df_bar = df.copy()
+            plot_df_bar = df
             # Date filtering setup (simplified for form context if needed, but keeping logic)
             # Note: Inputs in form is fine.
 
@@ -498,8 +494,7 @@ with st.expander("Custom Bar/Count Plot", expanded=True):
             
             try:
                 if 'Date' in df.columns:
-                    plot_df_bar['Date'] = pd.to_datetime(plot_df_bar['Date'], errors='coerce')
-                    plot_df_bar.dropna(subset=['Date'], inplace=True)
+                    plot_df_bar = plot_df_bar.dropna(subset=['Date'])
                     if not plot_df_bar['Date'].empty:
                         min_date_bar = plot_df_bar['Date'].min().date()
                         max_date_bar = plot_df_bar['Date'].max().date()
@@ -523,7 +518,7 @@ with st.expander("Custom Bar/Count Plot", expanded=True):
         else:
             # Filter by date if applicable
             if bar_start_date and bar_end_date:
-                plot_df_bar = plot_df_bar[(plot_df_bar['Date'].dt.date >= bar_start_date) & (plot_df_bar['Date'].dt.date <= bar_end_date)]
+                plot_df_bar = data_prepare.get_date_range(plot_df_bar, bar_start_date, bar_end_date)
             
             if plot_df_bar.empty:
                 st.warning("No data available for the selected criteria.")
@@ -534,9 +529,9 @@ with st.expander("Custom Bar/Count Plot", expanded=True):
                 # Display the underlying data in an expander
                 with st.expander("View Data"):
                     if y_col_bar == 'Count':
-                        st.dataframe(plot_df_bar[x_col_bar].value_counts())
+                        st.dataframe(plot_df_bar[x_col_bar].value_counts().loc[lambda counts: counts > 0])
                     else:
-                        st.dataframe(plot_df_bar.groupby(x_col_bar)[y_col_bar].mean())
+                        st.dataframe(plot_df_bar.groupby(x_col_bar, observed=True)[y_col_bar].mean())
 
 # ====================================== Removed Plots =======================================================
 
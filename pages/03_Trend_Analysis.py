@@ -2,6 +2,7 @@ import streamlit as st
 import pandas as pd
 from core.sidebar import render_sidebar
 import core.trend_plot as trend_plot
+import core.data_prepare as data_prepare
 import matplotlib.pyplot as plt
 
 # ------------------------------
@@ -168,10 +169,8 @@ def render_hardcoded_trend_plots(df):
     if 'Date' not in df.columns:
          return
     
-    # Create working copy
-    df_plot = df.copy()
-    df_plot['Date'] = pd.to_datetime(df_plot['Date'], errors='coerce')
-    df_plot = df_plot.dropna(subset=['Date'])
+    # Rows without a valid date cannot be placed on the timeline
+    df_plot = df.dropna(subset=['Date'])
     
     if df_plot.empty:
         st.warning("No valid dates found for trend plotting.")
@@ -223,12 +222,12 @@ def render_hardcoded_trend_plots(df):
         # The values `sel_viol`, `start_d` etc. are updated.
 
         # Filter Date
-        data_filtered = dataset.copy()
+        data_filtered = dataset
         if start_d and end_d:
             if start_d > end_d:
                 st.error("End Date must be after Start Date")
                 return
-            data_filtered = data_filtered[(data_filtered['Date'].dt.date >= start_d) & (data_filtered['Date'].dt.date <= end_d)]
+            data_filtered = data_prepare.get_date_range(data_filtered, start_d, end_d)
 
         # Filter Violation
         if sel_viol:
@@ -240,8 +239,7 @@ def render_hardcoded_trend_plots(df):
 
         # --- Plotting Logic ---
         if timeframe_col == 'Month':
-            data_filtered['Month'] = data_filtered['Date'].dt.month_name()
-            counts = data_filtered.groupby(['Month', 'Violation_Type']).size().reset_index(name='Count')
+            counts = data_filtered.groupby(['Month', 'Violation_Type'], observed=True).size().reset_index(name='Count')
             if not counts.empty:
                 pivot_data = counts.pivot(index='Month', columns='Violation_Type', values='Count').fillna(0)
                 month_order = ["January", "February", "March", "April", "May", "June", "July", "August", "September", "October", "November", "December"]
@@ -252,8 +250,7 @@ def render_hardcoded_trend_plots(df):
                 st.info("No data to plot.")
 
         elif timeframe_col == 'Year':
-            data_filtered['Year'] = data_filtered['Date'].dt.year
-            counts = data_filtered.groupby(['Year', 'Violation_Type']).size().reset_index(name='Count')
+            counts = data_filtered.groupby(['Year', 'Violation_Type'], observed=True).size().reset_index(name='Count')
             if not counts.empty:
                 pivot_data = counts.pivot(index='Year', columns='Violation_Type', values='Count').fillna(0)
                 fig = trend_plot.plot_trend_analysis_line(pivot_data, plot_func_x_label, "Violation_Type")
@@ -285,12 +282,12 @@ def render_plot_item(title, insight, plot_func, team_member_name, df_local, key_
         key_start = f"start_{key_suffix}"
         key_end = f"end_{key_suffix}"
         
-        filtered_df = df_local.copy()
+        filtered_df = df_local
         
         min_d, max_d = None, None
         if 'Date' in df_local.columns:
             try:
-                temp_dates = pd.to_datetime(df_local['Date'], errors='coerce').dropna()
+                temp_dates = df_local['Date'].dropna()
                 if not temp_dates.empty:
                     min_d = temp_dates.min().date()
                     max_d = temp_dates.max().date()
@@ -309,13 +306,7 @@ def render_plot_item(title, insight, plot_func, team_member_name, df_local, key_
                 if s_date > e_date:
                     st.error("Start Date must be before End Date.")
                 else:
-                    if filtered_df['Date'].dtype == 'object':
-                            filtered_df['Date'] = pd.to_datetime(filtered_df['Date'], errors='coerce')
-                    
-                    filtered_df = filtered_df[
-                        (filtered_df['Date'].dt.date >= s_date) & 
-                        (filtered_df['Date'].dt.date <= e_date)
-                    ]
+                    filtered_df = data_prepare.get_date_range(filtered_df, s_date, e_date)
         
         if filtered_df.empty:
             st.warning("No data available for the selected range.")
@@ -370,7 +361,6 @@ def render_trend_analysis_line_plot_section():
         # DATA PREPARATION & VALIDATION
         # ------------------------------
         try:
-            df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
             df.dropna(subset=['Date'], inplace=True)
         except KeyError:
             st.error("The selected dataset does not have a 'Date' column, which is required for trend analysis.")
@@ -429,7 +419,7 @@ def render_trend_analysis_line_plot_section():
 
             start_date_dt = pd.to_datetime(start_date)
             end_date_dt = pd.to_datetime(end_date)
-            df_filtered = df[(df['Date'] >= start_date_dt) & (df['Date'] <= end_date_dt)].copy()
+            df_filtered = df[(df['Date'] >= start_date_dt) & (df['Date'] <= end_date_dt)]
 
             # --- Apply Multi-Filter ---
             if selected_filter_values:
@@ -439,15 +429,12 @@ def render_trend_analysis_line_plot_section():
                 st.warning("No data available for the selected date range.")
                 st.stop()
 
-            if X_axis == 'Year':
-                df_filtered['Year'] = df_filtered['Date'].dt.year
-            elif X_axis == 'Month':
-                df_filtered['Month'] = df_filtered['Date'].dt.month_name()
-            elif X_axis == "Year_Month":
-                df_filtered['Year_Month'] = df_filtered['Date'].dt.to_period('M')
+            # 'Year' and 'Month' are derived when the dataset is loaded, only 'Year_Month' is built here
+            if X_axis == "Year_Month":
+                df_filtered = df_filtered.assign(Year_Month=df_filtered['Date'].dt.to_period('M'))
 
             try:
-                attribute_based_counts = df_filtered.groupby([X_axis, Lines]).size().reset_index(name='Count')
+                attribute_based_counts = df_filtered.groupby([X_axis, Lines], observed=True).size().reset_index(name='Count')
             except KeyError:
                 st.error(f"The selected columns '{X_axis}' or '{Lines}' are not found in the dataset.")
                 st.stop()
@@ -488,7 +475,8 @@ def render_categorical_heatmap_section():
     st.markdown("Analyze the percentage of a specific outcome (e.g., 'Court Appearance Required') across different categories.")
 
     with st.expander("Configure Categorical Heatmap", expanded=False):
-        all_categorical_cols = [col for col in df.columns if df[col].dtype == 'object' and df[col].nunique() > 1 and df[col].nunique() < 50]
+        df_source = data_prepare.drop_derived_columns(df)
+        all_categorical_cols = [col for col in df_source.select_dtypes(include=['object', 'category']).columns if df[col].nunique() > 1 and df[col].nunique() < 50]
         
         if not all_categorical_cols:
             st.warning("No suitable categorical columns found for this analysis.")
@@ -544,25 +532,16 @@ def render_categorical_heatmap_section():
                 if start_date_cat > end_date_cat:
                     st.error("Error: End date must fall after start date.")
                     st.stop()
-                df_filtered = df[(df['Date'].dt.date >= start_date_cat) & (df['Date'].dt.date <= end_date_cat)].copy()
+                df_filtered = data_prepare.get_date_range(df, start_date_cat, end_date_cat)
             else:
-                df_filtered = df.copy()
+                df_filtered = df
 
             # --- Merged plotting logic ---
-            df_copy = df_filtered
-            if x_col in ['Year', 'Month', 'DayOfWeek'] and 'Date' in df_copy.columns:
-                # Date conversion already done, just extract parts
-                if x_col == 'Year':
-                    df_copy[x_col] = df_copy['Date'].dt.year
-                elif x_col == 'Month':
-                    df_copy[x_col] = df_copy['Date'].dt.month_name()
-                elif x_col == 'DayOfWeek':
-                    df_copy[x_col] = df_copy['Date'].dt.day_name()
-
-            df_copy['_flag'] = df_copy[category_col].astype(str).str.lower()
+            # 'Year', 'Month' and 'DayOfWeek' are derived when the dataset is loaded (see data_prepare)
+            df_copy = df_filtered.assign(_flag=df_filtered[category_col].astype(str).str.lower())
             
-            totals = df_copy.groupby([group_col, x_col]).size().reset_index(name='Total')
-            positive_cases = df_copy[df_copy['_flag'] == str(positive_value).lower()].groupby([group_col, x_col]).size().reset_index(name='Yes')
+            totals = df_copy.groupby([group_col, x_col], observed=True).size().reset_index(name='Total')
+            positive_cases = df_copy[df_copy['_flag'] == str(positive_value).lower()].groupby([group_col, x_col], observed=True).size().reset_index(name='Yes')
             
             merged = totals.merge(positive_cases, on=[group_col, x_col], how='left')
             merged['Yes'] = merged['Yes'].fillna(0)
@@ -1,12 +1,13 @@
 import streamlit as st
 import pandas as pd
-from core.sidebar import render_sidebar
+from core.sidebar import render_dataset_selector, get_dataset_years, load_selected_dataset, render_memory_report
 from core.utils import (
     find_location_columns,
     render_choropleth_map_on_page,
     
 )
 import core.map_plot as map_plot
+import core.data_prepare as data_prepare
 from core.data_variables import TRAFFIC_VIOLATION_COLUMNS
 
 # ------------------------------
@@ -28,8 +29,8 @@ st.set_page_config(
 # LOAD DATA
 # ------------------------------
 try:
-    df = render_sidebar()
-    if df is None:
+    dataset_entry = render_dataset_selector()
+    if dataset_entry is None:
         st.warning("No dataset selected. Please select one from the sidebar.")
         st.stop()
 except Exception as e:
@@ -42,17 +43,20 @@ except Exception as e:
 st.title("🗺️ Map Visualization")
 st.markdown("Visualize traffic violation data across India.")
 
-if set(TRAFFIC_VIOLATION_COLUMNS).issubset(set(df.columns)) is False:
+if set(TRAFFIC_VIOLATION_COLUMNS).issubset(set(dataset_entry['columns'] or [])) is False:
     st.error("No traffic violation columns found in the dataset.")
     st.stop()
 
-# Ensure Date column is datetime and extract years
+# Year range of the dataset (from its year partitions, see core/data_loader.py)
 min_year, max_year = 2000, 2024
-if 'Date' in df.columns:
-    df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
-    if not df['Date'].isna().all():
-        min_year = int(df['Date'].dt.year.min())
-        max_year = int(df['Date'].dt.year.max())
+dataset_years = get_dataset_years(dataset_entry)
+if dataset_years:
+    min_year = dataset_years[0]
+    max_year = dataset_years[-1]
+
+# Each map reads only the years of its slider, the columns are inspected on the latest year
+df = load_selected_dataset(dataset_entry, (max_year, max_year) if dataset_years else None)
+render_memory_report()
 
 
 # ------------------------------
@@ -70,7 +74,7 @@ valid_location_cols = find_location_columns(df, known_states)
 
 if not valid_location_cols:
     # Fallback to categorical columns
-    valid_location_cols = [col for col in df.select_dtypes(include=['object']).columns if df[col].nunique() < 50]
+    valid_location_cols = [col for col in data_prepare.drop_derived_columns(df).select_dtypes(include=['object', 'category']).columns if df[col].nunique() < 50]
     if not valid_location_cols:
         st.error("No suitable location/categorical column found.")
         st.stop()
@@ -93,11 +97,10 @@ else:
     sel_years_viol = st.slider("Filter by Year", min_year, max_year, (min_year, max_year), key="viol_slider")
 
 # Filter
-mask_viol = (df['Date'].dt.year >= sel_years_viol[0]) & (df['Date'].dt.year <= sel_years_viol[1])
-df_viol = df[mask_viol]
+df_viol = load_selected_dataset(dataset_entry, sel_years_viol)
 
 try:
-    map_data_count = df_viol[default_loc_col].value_counts().reset_index()
+    map_data_count = df_viol[default_loc_col].value_counts().loc[lambda counts: counts > 0].reset_index()
     map_data_count.columns = [default_loc_col, 'Count']
     render_choropleth_map_on_page(map_data_count, geojson_data, default_loc_col, 'Count', state_prop_name, color_theme="YlOrRd", title="Violations Count")
 except Exception as e:
@@ -119,12 +122,11 @@ if 'Driver_Age' in df.columns:
             sel_years_age = st.slider("Filter by Year", min_year, max_year, (min_year, max_year), key="age_slider")
 
         # Filter
-        mask_age = (df['Date'].dt.year >= sel_years_age[0]) & (df['Date'].dt.year <= sel_years_age[1])
-        df_age = df[mask_age].copy()
+        df_age = load_selected_dataset(dataset_entry, sel_years_age)
 
         # Ensure numeric
-        df_age['Driver_Age'] = pd.to_numeric(df_age['Driver_Age'], errors='coerce')
-        map_data_age = df_age.groupby(default_loc_col)['Driver_Age'].mean().reset_index()
+        df_age = df_age.assign(Driver_Age=pd.to_numeric(df_age['Driver_Age'], errors='coerce'))
+        map_data_age = df_age.groupby(default_loc_col, observed=True)['Driver_Age'].mean().reset_index()
         map_data_age.columns = [default_loc_col, 'Avg Age']
         #All Color Themes Options: OrRd, YlOrRd, PuBuGn, YlGnBu, RdBu, BrBG, PiYG, PRGn, PuOr, Set1, Set2, Set3, Pastel1, Pastel2, Accent, Dark2, Paired, Set1, Set2, Set3, Pastel1, Pastel2, Accent, Dark2, Paired
         render_choropleth_map_on_page(map_data_age, geojson_data, default_loc_col, 'Avg Age', state_prop_name, color_theme="BrBG", title="Average Driver's Age")
@@ -155,7 +157,7 @@ with st.expander("Configure Custom Map", expanded=True):
         # end_date input removed
 
         
-        numerical_cols = df.select_dtypes(include=['float64', 'int64']).columns.tolist()
+        numerical_cols = data_prepare.get_measure_columns(df)
         # Exclude Fine_Amount_Num helper if exists
         numerical_cols = [c for c in numerical_cols if c != 'Fine_Amount_Num']
         
@@ -171,17 +173,16 @@ with st.expander("Configure Custom Map", expanded=True):
 
     if st.button("Generate Custom Map"):
         # Filter
-        mask_custom = (df['Date'].dt.year >= sel_years_custom[0]) & (df['Date'].dt.year <= sel_years_custom[1])
-        plot_df = df[mask_custom].copy()
+        plot_df = load_selected_dataset(dataset_entry, sel_years_custom)
 
         # Aggregate
         if value_col == 'Count of Violations':
-            custom_map_data = plot_df[location_col].value_counts().reset_index()
+            custom_map_data = plot_df[location_col].value_counts().loc[lambda counts: counts > 0].reset_index()
             custom_map_data.columns = [location_col, 'Count']
             viz_val_col = 'Count'
         else:
             agg_map = {'Mean': 'mean', 'Sum': 'sum', 'Median': 'median'}
-            custom_map_data = plot_df.groupby(location_col)[value_col].agg(agg_map[agg_func]).reset_index()
+            custom_map_data = plot_df.groupby(location_col, observed=True)[value_col].agg(agg_map[agg_func]).reset_index()
             viz_val_col = value_col
         
         # Store in Session State
@@ -4,7 +4,8 @@ from datetime import datetime
 import streamlit as st
 import pandas as pd
 import numpy as np
-from core.data_generator import generate_dataset_by_days
+from core.data_generator import write_dataset_by_days, append_dataset_days, WORKLOAD_PROFILES, DEFAULT_PROFILE, FAULT_PROFILES, DEFAULT_FAULTS
+from core import ingest, dataset_catalog
 
 # ------------------------------
 # PAGE CONFIG
@@ -39,64 +40,112 @@ with st.expander("🤖 Generate Fake Traffic Dataset"):
     with col2:
         min_records_per_day = st.number_input("Enter the minimum number of records per day:", min_value=1, max_value=100, value=1, step=1)
         max_records_per_day = st.number_input("Enter the maximum number of records per day:", min_value=1, max_value=100, value=10, step=1)
+        profile_names = list(WORKLOAD_PROFILES)
+        workload_profile = st.selectbox(
+            "Workload profile", profile_names, index=profile_names.index(DEFAULT_PROFILE),
+            help="uniform: every value equally likely. realistic: skewed locations and officers, rush hours, seasons, weekends and yearly growth. spiky: realistic plus injected spikes."
+        )
+        fault_names = list(FAULT_PROFILES)
+        fault_profile = st.selectbox(
+            "Fault injection", fault_names, index=fault_names.index(DEFAULT_FAULTS),
+            help="messy: nulls, malformed dates, HH:MM times, stray quotes, currency and unit suffixes and out-of-range values, to test the cleaning of real uploads."
+        )
 
 
 
     if st.button("Generate and Save Dataset"):
-        with st.spinner("Generating dataset ..."):
-            df = pd.DataFrame(
-                generate_dataset_by_days(
-                    start_date=start_date.strftime('%Y-%m-%d'), 
-                    end_date=end_date.strftime('%Y-%m-%d'), 
-                    min_records_per_day=min_records_per_day, 
-                    max_records_per_day=max_records_per_day
-                )
-            )
-        with st.spinner("Saving dataset ..."):
-            # --- Save the generated dataset ---
-            save_dir = f"generated_fake_traffic_datasets/{datetime.now().strftime('%Y-%m-%d')}"
-            os.makedirs(save_dir, exist_ok=True)
-            
-            dataset_id = 1
-            while (dataset_id <= 99) and (os.path.exists(os.path.join(save_dir, f"{dataset_id:02d}_traffic_dataset.csv"))):
-                dataset_id += 1
-            
-            if dataset_id <= 99:
-                file_path = os.path.join(save_dir, f"{dataset_id:02d}_traffic_dataset.csv")
-                df.to_csv(file_path, index=False)
-                st.success(f"Successfully generated and saved '{os.path.basename(file_path)}' in the `{save_dir}` directory.")
-                st.dataframe(df.head())
-            else:
-                st.warning("Dataset generation limit (99) reached for today. Please try again tomorrow.")
+        # --- Find a free file name for today's generated datasets ---
+        save_dir = f"generated_fake_traffic_datasets/{datetime.now().strftime('%Y-%m-%d')}"
+        os.makedirs(save_dir, exist_ok=True)
+        
+        dataset_id = 1
+        while (dataset_id <= 99) and (os.path.exists(os.path.join(save_dir, f"{dataset_id:02d}_traffic_dataset.csv"))):
+            dataset_id += 1
+        
+        if dataset_id <= 99:
+            file_path = os.path.join(save_dir, f"{dataset_id:02d}_traffic_dataset.csv")
+            # --- Generate and save the dataset chunk by chunk (see core/data_generator.py) ---
+            progress_bar = st.progress(0.0, text="Generating dataset ...")
+            def show_progress(rows_written, total_rows):
+                fraction = min(rows_written / total_rows, 1.0) if total_rows else 1.0
+                progress_bar.progress(fraction, text=f"Generating dataset ... {rows_written:,} of {total_rows:,} rows")
 
-st.markdown("---")
-st.markdown("### Upload and save new datasets")
+            result = write_dataset_by_days(
+                file_path,
+                start_date=start_date.strftime('%Y-%m-%d'), 
+                end_date=end_date.strftime('%Y-%m-%d'), 
+                min_records_per_day=min_records_per_day, 
+                max_records_per_day=max_records_per_day,
+                profile=workload_profile,
+                faults=fault_profile,
+                progress_callback=show_progress
+            )
+            progress_bar.progress(1.0, text=f"Generated {result['rows']:,} rows")
+            st.success(f"Successfully generated and saved '{os.path.basename(file_path)}' in the `{save_dir}` directory.")
+            st.dataframe(pd.read_csv(file_path, nrows=5))
+            if result['spikes']:
+                st.markdown(f"**Injected spikes ({len(result['spikes'])})** — the ground truth for the pattern detection:")
+                st.dataframe(pd.DataFrame(result['spikes']), hide_index=True)
+        else:
+            st.warning("Dataset generation limit (99) reached for today. Please try again tomorrow.")
 
-# --- Gather existing datasets for duplicate check ---
+# --- Index existing datasets (new generated ones included) for the selectors and the duplicate check ---
 root_upload_dir = "uploaded_datasets"
 local_dataset_dir = "dataset"
-all_dataset_paths = []
-if os.path.exists(local_dataset_dir):
-    for file_name in os.listdir(local_dataset_dir):
-        if file_name.endswith('.csv'):
-            all_dataset_paths.append(os.path.join(local_dataset_dir, file_name))
-if os.path.exists(root_upload_dir):
-    for root, _, files in os.walk(root_upload_dir):
-        for file_name in files:
-            if file_name.endswith('.csv'):
-                all_dataset_paths.append(os.path.join(root, file_name))
+# Only files that are new or changed since the last visit are hashed (see core/dataset_catalog.py)
+try:
+    dataset_catalog.refresh_catalog()
+except Exception as e:
+    st.error(f"Could not refresh the dataset catalog: {e}")
+
+# --- Extend a generated dataset with new days ---
+with st.expander("➕ Extend a Generated Dataset"):
+    st.markdown("Add the days after the last record of a generated dataset, continuing its `Violation_ID`s. Only the new rows are written.")
+    generated_datasets = {
+        f"{entry['group_name']} / {entry['file_name']} (until {entry['date_max']})": entry['path']
+        for entry in dataset_catalog.list_datasets(["generated_fake_traffic_datasets"])
+        if entry['file_name'].endswith(".csv")
+    }
+    if not generated_datasets:
+        st.info("No generated datasets found.")
+    else:
+        col1, col2 = st.columns(2)
+        with col1:
+            dataset_to_extend = st.selectbox("Generated dataset", list(generated_datasets))
+            extend_end_date = st.date_input("Extend until", value=datetime.now().date(), key="extend_end_date")
+        with col2:
+            extend_min_records = st.number_input("Minimum records per new day:", min_value=1, max_value=100, value=1, step=1, key="extend_min_records")
+            extend_max_records = st.number_input("Maximum records per new day:", min_value=1, max_value=100, value=10, step=1, key="extend_max_records")
+            extend_profile = st.selectbox("Workload profile of the new days", profile_names, index=profile_names.index(DEFAULT_PROFILE), key="extend_profile")
+
+        if st.button("Append New Days"):
+            progress_bar = st.progress(0.0, text="Generating new days ...")
+            def show_append_progress(rows_written, total_rows):
+                fraction = min(rows_written / total_rows, 1.0) if total_rows else 1.0
+                progress_bar.progress(fraction, text=f"Generating new days ... {rows_written:,} of {total_rows:,} rows")
+
+            try:
+                change = append_dataset_days(
+                    generated_datasets[dataset_to_extend],
+                    end_date=extend_end_date.strftime('%Y-%m-%d'),
+                    min_records_per_day=extend_min_records,
+                    max_records_per_day=extend_max_records,
+                    profile=extend_profile,
+                    progress_callback=show_append_progress
+                )
+                if change is None:
+                    progress_bar.empty()
+                    st.warning("The dataset already reaches the selected date, there are no new days to add.")
+                else:
+                    progress_bar.progress(1.0, text=f"Appended {change['rows']:,} rows")
+                    st.success(f"Appended {change['rows']:,} rows from {change['date_min']} to {change['date_max']} "
+                               f"(Violation_IDs {change['first_id']:,} to {change['last_id']:,}).")
+                    st.json({key: value for key, value in change.items() if key != 'spikes'}, expanded=False)
+            except Exception as e:
+                st.error(f"An error occurred while extending the dataset: {e}")
 
-# --- Traffic Violation Columns ---
-TRAFFIC_VIOLATION_COLUMNS = [
-    'Violation_ID', 'Violation_Type', 'Fine_Amount', 'Location', 'Date', 'Time', 
-    'Vehicle_Type', 'Vehicle_Color', 'Vehicle_Model_Year', 'Registration_State', 
-    'Driver_Age', 'Driver_Gender', 'License_Type', 'Penalty_Points', 
-    'Weather_Condition', 'Road_Condition', 'Officer_ID', 'Issuing_Agency', 
-    'License_Validity', 'Number_of_Passengers', 'Helmet_Worn', 'Seatbelt_Worn', 
-    'Traffic_Light_Status', 'Speed_Limit', 'Recorded_Speed', 'Alcohol_Level', 
-    'Breathalyzer_Result', 'Towed', 'Fine_Paid', 'Payment_Method', 
-    'Court_Appearance_Required', 'Previous_Violations', 'Comments'
-]
+st.markdown("---")
+st.markdown("### Upload and save new datasets")
 
 # --- File Uploader ---
 uploaded_file = st.file_uploader("Choose a CSV file to upload", type="csv", key="datasets_page_uploader")
@@ -109,45 +158,27 @@ if uploaded_file is not None:
         uploaded_file.seek(0)
 
         if st.button("Upload and Save Dataset"):
-            # ... (duplicate check and save logic)
-            is_duplicate = False
             try:
-                for existing_path in all_dataset_paths:
-                    existing_basename = os.path.basename(existing_path)
-                    parts = existing_basename.split('_', 1)
-                    unprefixed_name = parts[1] if len(parts) == 2 and parts[0].isdigit() else existing_basename
-                    if unprefixed_name == uploaded_file.name:
-                        existing_df_head = pd.read_csv(existing_path, nrows=5)
-                        if preview_df.equals(existing_df_head):
-                            is_duplicate = True
-                            st.error(f"Duplicate of '{existing_basename}' found. Upload cancelled.")
-                            break
-            except Exception as e:
-                st.error(f"An error occurred during duplicate check: {e}")
-                is_duplicate = True
+                # Single streaming pass: header check, row count, hashes, duplicate lookup, typed copy and save (see core/ingest.py)
+                uploaded_file.seek(0)
+                progress_bar = st.progress(0.0, text="Ingesting dataset ...")
+                def show_progress(bytes_read, total_bytes, rows):
+                    fraction = min(bytes_read / total_bytes, 1.0) if total_bytes else 0.0
+                    progress_bar.progress(fraction, text=f"Ingesting dataset ... {rows:,} rows")
 
-            if not is_duplicate:
-                try:
-                    # Check columns to decide the folder
-                    uploaded_df = pd.read_csv(uploaded_file)
-                    uploaded_file.seek(0) # Reset file pointer
-                    uploaded_columns = set(uploaded_df.columns)
-                    
-                    if set(TRAFFIC_VIOLATION_COLUMNS).issubset(uploaded_columns):
-                        save_dir = "uploded_file_relateds"
-                    else:
-                        save_dir = "uploded_file_others"
-
-                    os.makedirs(save_dir, exist_ok=True)
-                    
-                    file_path = os.path.join(save_dir, uploaded_file.name)
+                result = ingest.ingest_csv(uploaded_file, uploaded_file.name, progress_callback=show_progress)
+                progress_bar.progress(1.0, text=f"Ingested {result['rows']:,} rows")
 
-                    with open(file_path, "wb") as f:
-                        f.write(uploaded_file.getbuffer())
-                    st.success(f"File '{uploaded_file.name}' saved successfully in `{save_dir}`.")
-                
-                except Exception as e:
-                    st.error(f"An error occurred while saving the file: {e}")
+                if result['duplicate_of']:
+                    st.error(f"Duplicate of '{os.path.basename(result['duplicate_of'])}' found. Upload cancelled.")
+                else:
+                    st.success(f"File '{uploaded_file.name}' saved successfully in `{result['save_dir']}` ({result['rows']:,} rows).")
+                    for overlap in result['overlaps']:
+                        share = overlap['overlap_bytes'] / result['bytes'] if result['bytes'] else 0
+                        st.warning(f"Overlaps with '{overlap['path']}' ({overlap['kind']}, first {share:.0%} of the upload).")
+            
+            except Exception as e:
+                st.error(f"An error occurred while saving the file: {e}")
     except Exception as e:
         st.error(f"Error processing file: {e}")
 
@@ -155,51 +186,31 @@ if uploaded_file is not None:
 st.markdown("---")
 st.markdown("### View Previously Uploaded Datasets")
 
-dataset_options = {}
-if os.path.exists(local_dataset_dir):
-    for file_name in os.listdir(local_dataset_dir):
-        if file_name.endswith('.csv'):
-            dataset_options[f"[Sample] / {file_name}"] = os.path.join(local_dataset_dir, file_name)
-
-# Function to scan a directory and add to options
-def scan_and_add_datasets(directory, prefix):
-    if os.path.exists(directory):
-        # Scan for date-based directories (for generated data)
-        if "generated" in directory:
-            for date_dir in sorted(os.listdir(directory), reverse=True):
-                full_date_dir = os.path.join(directory, date_dir)
-                if os.path.isdir(full_date_dir):
-                    for file_name in sorted(os.listdir(full_date_dir)):
-                        if file_name.endswith('.csv'):
-                            display_name = f"[{prefix} - {date_dir}] / {file_name}"
-                            dataset_options[display_name] = os.path.join(full_date_dir, file_name)
-        else: # Original logic for other directories
-            for file_name in sorted(os.listdir(directory)):
-                if file_name.endswith('.csv'):
-                    dataset_options[f"[{prefix}] / {file_name}"] = os.path.join(directory, file_name)
-
-# Scan new directories
-scan_and_add_datasets("uploded_file_relateds", "Traffic Related")
-scan_and_add_datasets("generated_fake_traffic_datasets", "Generated")
-scan_and_add_datasets("uploded_file_others", "Other CSVs")
-
+# Built from the dataset catalog refreshed above (see core/dataset_catalog.py)
+def get_date_from_dir_name(dir_name):
+    date_str = dir_name.replace("Date(", "").replace(")", "")
+    return datetime.strptime(date_str, "%d-%m-%Y")
 
+dataset_options = {}
+legacy_options = []
+for entry in dataset_catalog.list_datasets(["dataset", "uploded_file_relateds", "generated_fake_traffic_datasets", "uploded_file_others", root_upload_dir]):
+    source, group_name, file_name = entry['source'], entry['group_name'], entry['file_name']
+    if source == root_upload_dir:
+        if group_name.startswith("Date(") and os.sep not in group_name:
+            legacy_options.append((get_date_from_dir_name(group_name), f"[Legacy] {group_name.replace('Date(', '').replace(')', '')} / {file_name}", entry['path']))
+    elif source == "generated_fake_traffic_datasets":
+        if group_name and os.sep not in group_name:
+            dataset_options[f"[Generated - {group_name}] / {file_name}"] = entry['path']
+    elif not group_name:
+        prefix = {"dataset": "Sample", "uploded_file_relateds": "Traffic Related", "uploded_file_others": "Other CSVs"}[source]
+        dataset_options[f"[{prefix}] / {file_name}"] = entry['path']
+# Legacy folders are named after their day, newest first
+for _, display_name, path in sorted(legacy_options, key=lambda option: option[0], reverse=True):
+    dataset_options[display_name] = path
 
-if not os.path.exists(root_upload_dir) and not dataset_options and not os.path.exists("uploded_file_relateds") and not os.path.exists("uploded_file_others"):
+if not dataset_options:
     st.info("No datasets have been uploaded or found locally.")
 else:
-    if os.path.exists(root_upload_dir):
-        date_dirs = [d for d in os.listdir(root_upload_dir) if os.path.isdir(os.path.join(root_upload_dir, d)) and d.startswith("Date(")]
-        def get_date_from_dir_name(dir_name):
-            date_str = dir_name.replace("Date(", "").replace(")", "")
-            return datetime.strptime(date_str, "%d-%m-%Y")
-        sorted_date_dirs = sorted(date_dirs, key=get_date_from_dir_name, reverse=True)
-        for date_dir in sorted_date_dirs:
-            dir_path = os.path.join(root_upload_dir, date_dir)
-            files = sorted([f for f in os.listdir(dir_path) if f.endswith('.csv')])
-            for file_name in files:
-                dataset_options[f"[Legacy] {date_dir.replace('Date(', '').replace(')', '')} / {file_name}"] = os.path.join(dir_path, file_name)
-
     selected_dataset_display_name = st.selectbox("Select a dataset to view", options=["-"] + list(dataset_options.keys()))
 
     if selected_dataset_display_name != "-":
@@ -265,6 +276,7 @@ if st.session_state.file_to_delete:
                 if secret_code == "123456789":
                     try:
                         os.remove(file_path_to_delete)
+                        dataset_catalog.remove_dataset(file_path_to_delete)
                         st.success(f"Successfully deleted `{os.path.basename(file_path_to_delete)}`.")
                         st.session_state.file_to_delete = None
                         st.rerun()
@@ -2,7 +2,9 @@ import streamlit as st
 import pandas as pd
 from core import (
     sidebar,
-    data_variables
+    data_variables,
+    data_prepare,
+    data_schema
 )
 
 # ------------------------------
@@ -21,6 +23,8 @@ st.title("📝 Dataset Summary")
 st.markdown("Visualize and analyze traffic violation data.")
 
 df = sidebar.render_sidebar()
+# Show the dataset as stored in the CSV, without the derived analysis columns
+df = data_prepare.drop_derived_columns(df)
 total_data_records = len(df)
 st.metric(label="Total Data Records", value=total_data_records)
 
@@ -72,7 +76,7 @@ if set(data_variables.TRAFFIC_VIOLATION_COLUMNS).issubset(set(df.columns)):
         st.button("🔄 Reset Filters", on_click=clear_filters)
 
 # Filter the dataset logic using Session State values
-df_filtered = df.copy()
+df_filtered = df
 
 if set(data_variables.TRAFFIC_VIOLATION_COLUMNS).issubset(set(df.columns)):
     # Apply Filters based on Session State (which holds the submitted form values)
@@ -99,8 +103,5 @@ if set(data_variables.TRAFFIC_VIOLATION_COLUMNS).issubset(set(df.columns)):
 else:
     st.error("Dataset does not contain required columns for advanced filtering.")
 
-# CRITICAL FIX: Ensure Violation_ID is string to prevent PyArrow serialization errors
-if 'Violation_ID' in df_filtered.columns:
-    df_filtered['Violation_ID'] = df_filtered['Violation_ID'].astype(str)
-
-st.data_editor(df_filtered, width='stretch')
\ No newline at end of file
+# The IDs are stored as numbers (see core/data_schema.py), they are shown with their prefix
+st.data_editor(data_schema.format_id_columns(df_filtered), width='stretch')
\ No newline at end of file
@@ -0,0 +1,25 @@
+import os
+
+import pandas as pd
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE_DATASET = os.path.join(REPO_ROOT, "dataset", "Indian_Traffic_Violations.csv")
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    """
+    Runs a test from an empty folder: the dataset cache, the catalog and the upload folders are
+    relative paths and are created there instead of in the repository.
+    """
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture(scope="session")
+def sample_frame() -> pd.DataFrame:
+    """
+    The rows of the sample traffic violation dataset, as read from the CSV.
+    """
+    return pd.read_csv(SAMPLE_DATASET)
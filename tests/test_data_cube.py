@@ -0,0 +1,72 @@
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from core import data_cube, data_generator, data_loader
+from core.data_schema import apply_schema
+from tests.conftest import SAMPLE_DATASET
+
+
+def assert_cubes_equal(cube: data_cube.DataCube, expected: data_cube.DataCube) -> None:
+    assert cube.labels == expected.labels
+    np.testing.assert_array_equal(cube.days, expected.days)
+    assert cube.prefix.keys() == expected.prefix.keys()
+    assert cube.extremes.keys() == expected.extremes.keys()
+    for name, prefix in expected.prefix.items():
+        assert cube.prefix[name].shape == prefix.shape, name
+        if prefix.dtype.kind == 'f':
+            # Float sums are added in another order
+            np.testing.assert_allclose(cube.prefix[name], prefix, rtol=1e-9, err_msg=name)
+        else:
+            np.testing.assert_array_equal(cube.prefix[name], prefix, err_msg=name)
+    for name, values in expected.extremes.items():
+        np.testing.assert_array_equal(cube.extremes[name], values, err_msg=name)
+
+
+def test_update_cube_equals_full_build(workspace):
+    path = os.path.join("generated_fake_traffic_datasets", "test", "01_traffic_dataset.csv")
+    os.makedirs(os.path.dirname(path))
+    data_generator.write_dataset_by_days(path, "2024-10-01", "2024-12-31", 20, 40, seed=1)
+    df = data_loader.load_dataset(path)
+    base = data_cube.get_cube(path, lambda: df)
+
+    change = data_generator.append_dataset_days(path, "2025-02-15", 20, 40, seed=2)
+    assert change is not None and change['rows'] > 0
+    updated = data_cube.update_cube(path)
+    assert updated is not None
+    full = data_cube.build_cube(data_loader.load_dataset(path))
+
+    # Vehicles of model year 2025 only appear in the appended days
+    assert 2025 not in base.labels['Vehicle_Model_Year']
+    assert 2025 in full.labels['Vehicle_Model_Year']
+    assert_cubes_equal(updated, full)
+
+    def full_build():
+        raise AssertionError("the cube should be updated from the appended rows")
+    assert_cubes_equal(data_cube.get_cube(path, full_build), full)
+    # The updated cube is stored for the current version
+    assert_cubes_equal(data_cube.load_cube(path), full)
+
+
+def test_merge_cubes_equals_full_build(workspace):
+    path = os.path.join("dataset", "sample.csv")
+    os.makedirs("dataset")
+    shutil.copy(SAMPLE_DATASET, path)
+    df = data_loader.load_dataset(path)
+
+    # The delta holds the later days, and every row of one location: its label is first seen in the delta,
+    # and the days of those rows are also base days
+    new_location = df['Location'].value_counts().index[-1]
+    in_delta = (df['Date'] >= pd.Timestamp("2023-07-01")) | (df['Location'] == new_location)
+    # apply_schema keeps only the categories a part holds, like a dataset loaded from those rows
+    base, delta = apply_schema(df[~in_delta]), apply_schema(df[in_delta])
+    assert new_location not in base['Location'].cat.categories
+
+    merged = data_cube.merge_cubes(data_cube.build_cube(base), data_cube.build_cube(delta))
+    full = data_cube.build_cube(df)
+    assert new_location in merged.labels['Location']
+    assert_cubes_equal(merged, full)
+    # Merging is symmetric
+    assert_cubes_equal(data_cube.merge_cubes(data_cube.build_cube(delta), data_cube.build_cube(base)), full)
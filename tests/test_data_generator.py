@@ -0,0 +1,106 @@
+import csv
+import io
+import os
+import subprocess
+import sys
+
+import pytest
+
+from core import data_generator, dataset_catalog
+from tests.conftest import REPO_ROOT
+
+
+def _run_in_new_process(cwd, *args) -> None:
+    # Run from cwd, so the dataset cache and catalog of the repository are not touched
+    env = {**os.environ, "PYTHONPATH": REPO_ROOT}
+    subprocess.run([sys.executable, "-m", "core.data_generator", *args], cwd=cwd, env=env, check=True, capture_output=True)
+
+
+def _generate_in_new_process(output, *args) -> bytes:
+    _run_in_new_process(output.parent, "--output", str(output), "--start-date", "2024-01-01", "--end-date", "2024-03-31", *args)
+    return output.read_bytes()
+
+
+def test_seeded_mappings():
+    assert data_generator.get_seeded_mappings(7) == data_generator.get_seeded_mappings(7)
+    drawn = [data_generator.get_seeded_mappings(seed)['fine_mapping'] for seed in range(5)]
+    assert len({tuple(fines.values()) for fines in drawn}) > 1
+
+
+def test_same_seed_same_file_in_every_process(tmp_path):
+    first = _generate_in_new_process(tmp_path / "first.csv", "--seed", "7", "--workers", "1")
+    second = _generate_in_new_process(tmp_path / "second.csv", "--seed", "7", "--workers", "1")
+    assert first == second
+    assert _generate_in_new_process(tmp_path / "other.csv", "--seed", "8", "--workers", "1") != first
+
+
+def test_generate_dataset_by_days_is_seeded():
+    first = data_generator.generate_dataset_by_days("2024-01-01", "2024-01-31", seed=3)
+    second = data_generator.generate_dataset_by_days("2024-01-01", "2024-01-31", seed=3)
+    assert first.equals(second)
+
+
+def test_same_file_for_any_number_of_workers(tmp_path):
+    single = _generate_in_new_process(tmp_path / "single.csv", "--seed", "11", "--workers", "1")
+    parallel = _generate_in_new_process(tmp_path / "parallel.csv", "--seed", "11", "--workers", "3")
+    assert single == parallel
+
+
+def test_appended_rows_regenerate_from_change_record(workspace):
+    path = workspace / "dataset.csv"
+    _generate_in_new_process(path, "--seed", "5", "--workers", "1", "--faults", "messy")
+    _run_in_new_process(workspace, "--output", str(path), "--append", "--end-date", "2024-05-10", "--seed", "9",
+                        "--min-per-day", "3", "--max-per-day", "6", "--faults", "messy", "--workers", "2")
+
+    (change,) = dataset_catalog.list_changes(str(path))
+    with open(path, "rb") as f:
+        f.seek(change['first_byte'])
+        appended = f.read()
+    assert change['date_min'] == "2024-04-01" and change['seed'] == 9
+
+    result = data_generator.write_dataset_by_days(
+        str(workspace / "again.csv"), change['date_min'], change['date_max'], change['min_records_per_day'],
+        change['max_records_per_day'], seed=change['seed'], rows=change['requested_rows'], profile=change['profile'],
+        first_id=change['first_id'], include_header=False, faults=change['faults'],
+    )
+    assert result['rows'] == change['rows']
+    assert (workspace / "again.csv").read_bytes() == appended
+
+
+def _fault_last_records(path, faults: dict) -> None:
+    # faults: {position from the end: {column: faulty value}}
+    lines = path.read_bytes().decode().splitlines()
+    columns = lines[0].split(",")
+    for position, values in faults.items():
+        record = next(csv.reader([lines[-position]]))
+        for col, value in values.items():
+            record[columns.index(col)] = value
+        text = io.StringIO()
+        csv.writer(text, lineterminator="").writerow(record)
+        lines[-position] = text.getvalue()
+    path.write_bytes(("\n".join(lines) + "\n").encode())
+
+
+@pytest.mark.parametrize("faults", [
+    {1: {"Date": "2024-03-32"}},
+    {1: {"Date": ""}, 2: {"Date": "31/03/2024"}},
+    {1: {"Violation_ID": "", "Date": ""}, 2: {"Violation_ID": ""}},
+])
+def test_append_after_faulty_last_records(workspace, faults):
+    clean, faulty = workspace / "clean.csv", workspace / "faulty.csv"
+    for path in [clean, faulty]:
+        data_generator.write_dataset_by_days(str(path), "2024-03-01", "2024-03-31", seed=4, workers=1)
+    _fault_last_records(faulty, faults)
+
+    expected = data_generator.read_last_record(str(clean))
+    assert {**data_generator.read_last_record(str(faulty)), 'size': None} == {**expected, 'size': None}
+    change = data_generator.append_dataset_days(str(faulty), "2024-04-05", seed=6)
+    assert (change['first_id'], change['date_min']) == (expected['violation_id'] + 1, "2024-04-01")
+
+
+def test_last_record_unreadable(workspace):
+    path = workspace / "dataset.csv"
+    data_generator.write_dataset_by_days(str(path), "2024-03-01", "2024-03-01", 2, 2, seed=4, workers=1)
+    _fault_last_records(path, {1: {"Violation_ID": ""}, 2: {"Violation_ID": ""}})
+    with pytest.raises(ValueError, match="readable Violation_ID and Date"):
+        data_generator.read_last_record(str(path))
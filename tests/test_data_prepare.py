@@ -0,0 +1,57 @@
+import datetime
+
+import pandas as pd
+import pytest
+
+from core import data_generator, data_loader, data_prepare
+
+
+@pytest.fixture(scope="module")
+def dataset(tmp_path_factory) -> pd.DataFrame:
+    # Faulty dates are NaT once loaded, sorted after the dated rows
+    path = str(tmp_path_factory.mktemp("prepare") / "dataset.csv")
+    data_generator.write_dataset_by_days(path, "2024-01-01", "2024-03-31", seed=2, faults="messy", workers=1)
+    df = data_loader.load_dataset(path)
+    assert df['Date'].isna().any() and df['Date'].notna().any()
+    return df
+
+
+def _masked(df: pd.DataFrame, start_date, end_date) -> pd.DataFrame:
+    # Whole days, whatever the time of day of the bounds
+    days = df['Date'].dt.normalize()
+    mask = days.notna()
+    if start_date is not None:
+        mask &= days >= pd.Timestamp(start_date).normalize()
+    if end_date is not None:
+        mask &= days <= pd.Timestamp(end_date).normalize()
+    return df[mask]
+
+
+@pytest.mark.parametrize("start_date, end_date", [
+    ("2024-02-01", "2024-02-29"),
+    # Inclusive end day, given as dates and timestamps within the day
+    (datetime.date(2024, 1, 15), datetime.date(2024, 1, 15)),
+    (pd.Timestamp("2024-03-10 18:30"), pd.Timestamp("2024-03-12 00:01")),
+    # Open ends
+    (None, "2024-01-10"),
+    ("2024-03-25", None),
+    (None, None),
+    # Outside the data, overlapping it and reversed
+    ("2023-01-01", "2023-12-31"),
+    ("2025-01-01", "2025-12-31"),
+    ("2023-12-01", "2024-01-05"),
+    ("2024-03-30", "2025-06-30"),
+    ("2024-02-10", "2024-02-01"),
+])
+def test_slice_matches_mask(dataset, start_date, end_date):
+    expected = _masked(dataset, start_date, end_date)
+    result = data_prepare.get_date_range(dataset, start_date, end_date)
+    pd.testing.assert_frame_equal(result, expected)
+    # Filtered frames keep the order, the slice still applies
+    subset = dataset[dataset['Fine_Amount'].notna()]
+    pd.testing.assert_frame_equal(data_prepare.get_date_range(subset, start_date, end_date), _masked(subset, start_date, end_date))
+
+
+def test_frames_without_event_time(dataset):
+    df = dataset.drop(columns=['Event_Time']).sample(frac=1, random_state=0)
+    pd.testing.assert_frame_equal(data_prepare.get_date_range(df, "2024-02-01", "2024-02-29"), _masked(df, "2024-02-01", "2024-02-29"))
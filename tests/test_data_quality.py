@@ -0,0 +1,87 @@
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core import data_loader, data_prepare, utils
+from core.data_schema import ID_COLUMNS
+from tests.conftest import SAMPLE_DATASET
+
+
+def baseline_data_quality_analysis(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    The per-column report get_data_quality_analysis replaced, kept as the reference of its output.
+    """
+    total_rows = len(df)
+    report = []
+    for col in df.columns:
+        missing_count = df[col].isnull().sum()
+        unique_count = df[col].nunique()
+        redundant_count = total_rows - unique_count
+        missing_pct = (missing_count / total_rows) * 100
+        unique_pct = (unique_count / total_rows) * 100
+        duplicate_pct = (redundant_count / total_rows) * 100
+        outlier_pct = 0.0
+        if pd.api.types.is_numeric_dtype(df[col]) and col not in ID_COLUMNS:
+            Q1 = df[col].quantile(0.25)
+            Q3 = df[col].quantile(0.75)
+            IQR = Q3 - Q1
+            lower_bound = Q1 - 1.5 * IQR
+            upper_bound = Q3 + 1.5 * IQR
+            outliers = df[(df[col] < lower_bound) | (df[col] > upper_bound)]
+            outlier_pct = (len(outliers) / total_rows) * 100
+        report.append({
+            'Column Name': col,
+            'Missing (%)': round(missing_pct, 2),
+            'Unique (%)': round(unique_pct, 2),
+            'Duplicate (%)': round(duplicate_pct, 2),
+            'Outlier (%)': round(outlier_pct, 2)
+        })
+    return pd.DataFrame(report)
+
+
+@pytest.fixture(scope="module")
+def loaded_sample(tmp_path_factory) -> pd.DataFrame:
+    folder = tmp_path_factory.mktemp("quality")
+    cwd = os.getcwd()
+    os.chdir(folder)
+    try:
+        os.makedirs("dataset")
+        shutil.copy(SAMPLE_DATASET, os.path.join("dataset", "sample.csv"))
+        return data_prepare.drop_derived_columns(data_loader.load_dataset(os.path.join("dataset", "sample.csv")))
+    finally:
+        os.chdir(cwd)
+
+
+def _messy(df: pd.DataFrame) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    size = len(df)
+    columns = {}
+    for col in ['Fine_Amount', 'Driver_Age', 'Location', 'Alcohol_Level', 'Time']:
+        columns[col] = df[col].mask(rng.random(size) < 0.1)
+    columns.update({
+        # Narrow integers, counted instead of sorted (negative values and a far outlier)
+        'Narrow_Int8': rng.integers(-100, 100, size).astype(np.int8),
+        'Narrow_Int16': np.where(rng.random(size) < 0.01, 30_000, rng.integers(-50, 50, size)).astype(np.int16),
+        'Constant': np.full(size, 7, dtype=np.int32),
+        'Wide_Int': rng.integers(0, 10 ** 12, size),
+        'Nullable_Int': pd.array(np.where(rng.random(size) < 0.2, None, rng.integers(0, 50, size)), dtype="Int64"),
+        'Text': pd.array(np.where(rng.random(size) < 0.05, None, rng.integers(0, 500, size).astype(str)), dtype="string[pyarrow]"),
+        'Mixed': pd.Series(['x' if flip else 1 for flip in rng.random(size) < 0.5], dtype=object),
+        'All_Missing': np.full(size, np.nan),
+    })
+    return df.assign(**columns)
+
+
+@pytest.mark.parametrize("frame", ["loaded", "raw", "messy", "messy raw", "slice"])
+def test_matches_baseline_report(loaded_sample, frame):
+    df = {
+        "loaded": lambda: loaded_sample,
+        "raw": lambda: pd.read_csv(SAMPLE_DATASET),
+        "messy": lambda: _messy(loaded_sample),
+        "messy raw": lambda: _messy(pd.read_csv(SAMPLE_DATASET)),
+        "slice": lambda: _messy(loaded_sample).iloc[1000:1017],
+    }[frame]()
+    pd.testing.assert_frame_equal(utils.get_data_quality_analysis(df), baseline_data_quality_analysis(df), check_exact=True)
@@ -0,0 +1,63 @@
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core import data_generator, data_loader
+from core.data_schema import OFFICER_ID, VIOLATION_ID, format_id_columns, format_prefixed_ids, to_prefixed_id
+from tests.conftest import SAMPLE_DATASET
+
+
+def _assert_ids_round_trip(path: str) -> None:
+    # The text IDs of the CSV, formatted back from the stored numbers of every row
+    raw = pd.read_csv(path, usecols=['Violation_ID', 'Officer_ID'], dtype=str)
+    loaded = data_loader.load_dataset(path)
+    assert loaded['Violation_ID'].dtype == VIOLATION_ID.dtype and loaded['Officer_ID'].dtype == OFFICER_ID.dtype
+
+    shown = format_id_columns(loaded)[['Violation_ID', 'Officer_ID']].astype(object)
+    rows = shown.merge(raw, on='Violation_ID', how='outer', suffixes=('', '_csv'), indicator=True, validate='one_to_one')
+    assert (rows['_merge'] == 'both').all()
+    assert (rows['Officer_ID'] == rows['Officer_ID_csv']).all()
+
+
+def test_sample_ids_round_trip(workspace):
+    os.makedirs("dataset")
+    _assert_ids_round_trip(shutil.copy(SAMPLE_DATASET, os.path.join("dataset", "sample.csv")))
+
+
+def test_generated_ids_past_their_width_round_trip(workspace):
+    path = str(workspace / "dataset.csv")
+    # Violation_IDs go from 6 to 7 digits
+    data_generator.write_dataset_by_days(path, "2024-01-01", "2024-01-31", seed=1, first_id=999_900, workers=1)
+    _assert_ids_round_trip(path)
+    assert data_loader.load_dataset(path)['Violation_ID'].max() > 999_999
+
+
+@pytest.mark.parametrize("text, number", [
+    ("VLT000000", 0), ("VLT000123", 123), ("VLT999999", 999_999), ("VLT1000000", 1_000_000), ("VLT2147483647", 2**31 - 1),
+])
+def test_format_and_parse(text, number):
+    parsed = to_prefixed_id(pd.Series([text, "VLT000001"]), VIOLATION_ID)
+    assert pd.api.types.is_integer_dtype(parsed) and parsed.tolist() == [number, 1]
+    assert format_prefixed_ids(parsed, VIOLATION_ID).tolist() == [text, "VLT000001"]
+
+
+@pytest.mark.parametrize("values", [
+    # Would not be written back the same way
+    ["VLT0000123", "VLT000001"], ["VLT12", "VLT000001"],
+    # Another prefix, missing or other values
+    ["OFF000001", "VLT000001"], [None, "VLT000001"], ["VLT000001", "VLT00000A"],
+])
+def test_other_ids_stay_text(values):
+    series = pd.Series(values, dtype=object)
+    assert to_prefixed_id(series, VIOLATION_ID) is series
+
+
+def test_missing_numbers_stay_missing():
+    numbers = pd.Series(pd.array([7, None, 1234], dtype="Int64"), index=[5, 6, 7], name='Officer_ID')
+    formatted = format_prefixed_ids(numbers, OFFICER_ID)
+    assert formatted.index.tolist() == [5, 6, 7] and formatted.name == 'Officer_ID'
+    assert formatted.tolist()[0] == "OFF0007" and pd.isna(formatted.tolist()[1]) and formatted.tolist()[2] == "OFF1234"
+    assert format_prefixed_ids(np.array([12]), OFFICER_ID).tolist() == ["OFF0012"]
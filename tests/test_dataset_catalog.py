@@ -0,0 +1,105 @@
+import os
+
+import numpy as np
+
+from core import dataset_catalog, ingest
+from core.dataset_catalog import CATALOG_CHUNK_BYTES, StreamingHasher
+
+
+def _store(path: str, data: bytes) -> str:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+    dataset_catalog.register_dataset(path, dataset_catalog.hash_file(path))
+    return path
+
+
+def _matches(data: bytes) -> dict:
+    # Fed in uneven pieces, like the reads of an upload
+    hasher = StreamingHasher(snapshot_offsets=dataset_catalog.get_stored_sizes(len(data)))
+    for start in range(0, len(data), 300_007):
+        hasher.update(data[start:start + 300_007])
+    hasher.finish()
+    return dataset_catalog.find_matches(hasher)
+
+
+def _overlaps(matches: dict) -> dict:
+    return {overlap['path']: (overlap['kind'], overlap['overlap_bytes']) for overlap in matches['overlaps']}
+
+
+def _random_bytes(size: int, seed: int = 0) -> bytes:
+    return np.random.default_rng(seed).integers(0, 256, size, dtype=np.uint8).tobytes()
+
+
+def test_exact_duplicate(workspace):
+    data = _random_bytes(CATALOG_CHUNK_BYTES + 1234)
+    stored = _store(os.path.join("dataset", "stored.csv"), data)
+
+    matches = _matches(data)
+    assert matches['duplicate_of'] == stored
+    assert matches['overlaps'] == []
+
+
+def test_renamed_copy_is_not_saved(workspace):
+    data = b"a,b\n" + b"".join(b"%d,%d\n" % (i, i * i) for i in range(1000))
+    (workspace / "original.csv").write_bytes(data)
+    with open(workspace / "original.csv", "rb") as f:
+        first = ingest.ingest_csv(f, "original.csv")
+    with open(workspace / "original.csv", "rb") as f:
+        renamed = ingest.ingest_csv(f, "renamed.csv")
+
+    assert first['saved']
+    assert not renamed['saved']
+    assert renamed['duplicate_of'] == first['file_path']
+    assert not os.path.exists(os.path.join(ingest.OTHER_UPLOADS_DIR, "renamed.csv"))
+
+
+def test_stored_file_is_prefix(workspace):
+    data = _random_bytes(2 * CATALOG_CHUNK_BYTES + 5000)
+    small = _store(os.path.join("dataset", "small.csv"), data[:1000])
+    large = _store(os.path.join("dataset", "large.csv"), data[:CATALOG_CHUNK_BYTES + 777])
+
+    matches = _matches(data)
+    assert matches['duplicate_of'] is None
+    assert _overlaps(matches) == {
+        small: ('stored file is a prefix', 1000),
+        large: ('stored file is a prefix', CATALOG_CHUNK_BYTES + 777),
+    }
+
+
+def test_upload_is_prefix(workspace):
+    data = _random_bytes(2 * CATALOG_CHUNK_BYTES + 5000)
+    stored = _store(os.path.join("dataset", "stored.csv"), data)
+    # Same first byte range, different content afterwards
+    other = _store(os.path.join("dataset", "other.csv"), data[:CATALOG_CHUNK_BYTES] + _random_bytes(CATALOG_CHUNK_BYTES, seed=1))
+
+    # Ends at a chunk boundary: the upload's hash is the stored prefix hash of that chunk
+    size = 2 * CATALOG_CHUNK_BYTES
+    assert _overlaps(_matches(data[:size])) == {stored: ('upload is a prefix', size), other: ('shared prefix', CATALOG_CHUNK_BYTES)}
+    size = CATALOG_CHUNK_BYTES
+    assert _overlaps(_matches(data[:size])) == {stored: ('upload is a prefix', size), other: ('upload is a prefix', size)}
+    # Ends inside the second chunk: no stored hash ends there, the leading full chunk is the overlap
+    size = CATALOG_CHUNK_BYTES + 4096
+    assert _overlaps(_matches(data[:size])) == {stored: ('shared prefix', CATALOG_CHUNK_BYTES), other: ('shared prefix', CATALOG_CHUNK_BYTES)}
+    # Smaller than one chunk: nothing to look up
+    assert _overlaps(_matches(data[:4096])) == {}
+
+
+def test_matches_do_not_read_stored_files(workspace):
+    data = _random_bytes(2 * CATALOG_CHUNK_BYTES + 5000)
+    stored = _store(os.path.join("dataset", "stored.csv"), data)
+    small = _store(os.path.join("dataset", "small.csv"), data[:1000])
+    # Only the catalog is read: the matches are the same once the stored files are gone
+    os.remove(stored)
+    os.remove(small)
+
+    assert _overlaps(_matches(data[:CATALOG_CHUNK_BYTES])) == {
+        stored: ('upload is a prefix', CATALOG_CHUNK_BYTES), small: ('stored file is a prefix', 1000),
+    }
+    assert _overlaps(_matches(data[:4096])) == {small: ('stored file is a prefix', 1000)}
+
+def test_unrelated_upload(workspace):
+    _store(os.path.join("dataset", "stored.csv"), _random_bytes(CATALOG_CHUNK_BYTES + 10))
+
+    matches = _matches(_random_bytes(5000, seed=2))
+    assert matches == {'duplicate_of': None, 'overlaps': []}
@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+
+from core import data_cube, data_generator, data_loader, filter_cache
+from core.filter_cache import FilterCache
+
+
+class _Computations:
+    """
+    Counts the selections built, each one an array of the given size in bytes.
+    """
+    def __init__(self):
+        self.keys = []
+
+    def __call__(self, key, nbytes: int = 8):
+        def compute():
+            self.keys.append(key)
+            return np.zeros(nbytes, dtype=np.uint8)
+        return compute
+
+
+def test_hits_and_misses():
+    cache, compute = FilterCache(), _Computations()
+    first = cache.get(("v1", 2020, 2022), compute(("v1", 2020, 2022)))
+    assert cache.get(("v1", 2020, 2022), compute(("v1", 2020, 2022))) is first
+    other = cache.get(("v1", 2021, 2022), compute(("v1", 2021, 2022)))
+    assert other is not first
+    assert compute.keys == [("v1", 2020, 2022), ("v1", 2021, 2022)]
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache, compute = FilterCache(max_entries=2), _Computations()
+    for key in ["a", "b", "a", "c"]:
+        cache.get(key, compute(key))
+    # 'b' was the least recently used when 'c' came in
+    cache.get("a", compute("a"))
+    cache.get("b", compute("b"))
+    assert compute.keys == ["a", "b", "c", "b"]
+
+
+def test_byte_budget():
+    cache, compute = FilterCache(max_bytes=100), _Computations()
+    for key in ["a", "b", "c"]:
+        cache.get(key, compute(key, 40))
+    # 120 bytes: 'a' is evicted, 'b' and 'c' fit
+    for key in ["b", "c", "a"]:
+        cache.get(key, compute(key, 40))
+    assert compute.keys == ["a", "b", "c", "a"]
+    assert cache._bytes == 80
+
+    # Larger than the whole budget: returned, never stored and nothing evicted for it
+    huge = cache.get("huge", compute("huge", 101))
+    assert cache.get("huge", compute("huge", 101)) is not huge
+    for key in ["c", "a"]:
+        cache.get(key, compute(key, 40))
+    assert compute.keys == ["a", "b", "c", "a", "huge", "huge"]
+
+    sizes = FilterCache(max_bytes=100)
+    sizes.get("x", lambda: "selection", size_of=lambda selection: 60)
+    sizes.get("y", lambda: "selection", size_of=lambda selection: 60)
+    assert list(sizes._entries) == ["y"] and sizes._bytes == 60
+
+
+@pytest.fixture
+def shared_cache(monkeypatch) -> FilterCache:
+    cache = FilterCache()
+    monkeypatch.setattr(filter_cache, "_filter_cache", cache)
+    return cache
+
+
+def test_cube_ranges_follow_the_dataset_version(workspace, shared_cache):
+    path = str(workspace / "dataset.csv")
+    data_generator.write_dataset_by_days(path, "2024-01-01", "2024-02-29", seed=3, workers=1)
+    fingerprint = data_loader.dataset_fingerprint(path)
+    cube = data_cube.build_cube(data_loader.load_dataset(path))
+
+    january = filter_cache.get_cube_range(cube, fingerprint, "2024-01-01", "2024-01-31")
+    # Same days given as other types: the same shared selection
+    assert filter_cache.get_cube_range(cube, fingerprint, np.datetime64("2024-01-01"), "2024-01-31 23:00") is january
+    whole = filter_cache.get_cube_range(cube, fingerprint)
+    assert whole is not january and whole.total('count') > january.total('count')
+
+    # A new version of the file has another fingerprint: its ranges are computed from its own cube
+    data_generator.append_dataset_days(path, "2024-03-31", seed=4)
+    new_fingerprint = data_loader.dataset_fingerprint(path)
+    assert new_fingerprint != fingerprint
+    new_cube = data_cube.build_cube(data_loader.load_dataset(path))
+    new_whole = filter_cache.get_cube_range(new_cube, new_fingerprint)
+    assert new_whole is not whole
+    assert new_whole.total('count') == len(data_loader.load_dataset(path)) > whole.total('count')
+    assert filter_cache.get_cube_range(cube, fingerprint) is whole
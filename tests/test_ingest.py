@@ -0,0 +1,65 @@
+import hashlib
+
+import pandas as pd
+
+from core import data_loader, ingest
+from core.data_schema import apply_schema
+from tests.conftest import SAMPLE_DATASET
+
+
+def _write_sample(path, rows: int) -> bytes:
+    with open(SAMPLE_DATASET, "rb") as f:
+        data = b"".join(f.readline() for _ in range(rows + 1))
+    path.write_bytes(data)
+    return data
+
+
+def test_ingest_traffic_dataset(workspace, monkeypatch):
+    # Several chunks, so the staged copy is written from more than one table
+    monkeypatch.setattr(ingest, "CHUNK_ROWS", 700)
+    data = _write_sample(workspace / "upload.csv", 2500)
+
+    with open(workspace / "upload.csv", "rb") as f:
+        result = ingest.ingest_csv(f, "traffic.csv")
+
+    assert result['is_traffic_dataset']
+    assert result['save_dir'] == ingest.RELATED_UPLOADS_DIR
+    assert result['saved'] and result['duplicate_of'] is None
+    assert result['rows'] == 2500
+    assert result['bytes'] == len(data)
+    assert result['sha256'] == hashlib.sha256(data).hexdigest()
+    with open(result['file_path'], "rb") as f:
+        assert f.read() == data
+
+    staged = apply_schema(data_loader.read_sidecar(data_loader.get_staged_path(result['file_path'])))
+    expected = data_loader.read_csv_typed(result['file_path'])
+    pd.testing.assert_frame_equal(staged, expected, check_dtype=False)
+    # Text stays in Arrow buffers in the staged copy, every other column has the dtype of the parsed CSV
+    text_columns = [col for col in expected.columns if expected[col].dtype == object]
+    pd.testing.assert_series_equal(staged.dtypes.drop(text_columns), expected.dtypes.drop(text_columns))
+
+
+def test_ingest_other_dataset(workspace):
+    data = b"a,b\n1,x\n2,y\n3,z\n"
+    (workspace / "other.csv").write_bytes(data)
+
+    with open(workspace / "other.csv", "rb") as f:
+        result = ingest.ingest_csv(f, "other.csv")
+
+    assert not result['is_traffic_dataset']
+    assert result['save_dir'] == ingest.OTHER_UPLOADS_DIR
+    assert result['columns'] == ['a', 'b']
+    assert result['rows'] == 3
+    assert result['sha256'] == hashlib.sha256(data).hexdigest()
+
+
+def test_ingest_rejects_duplicate(workspace):
+    _write_sample(workspace / "upload.csv", 50)
+    with open(workspace / "upload.csv", "rb") as f:
+        first = ingest.ingest_csv(f, "first.csv")
+    with open(workspace / "upload.csv", "rb") as f:
+        second = ingest.ingest_csv(f, "second.csv")
+
+    assert first['saved']
+    assert not second['saved']
+    assert second['duplicate_of'] == first['file_path']
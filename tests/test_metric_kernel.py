@@ -0,0 +1,88 @@
+import math
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core import data_cube, data_loader, metric_kernel
+from core.dashboard_summary import GLOBAL_OVERVIEW_METRICS, get_global_overview_metrics
+from tests.conftest import SAMPLE_DATASET
+
+
+def pandas_overview_metrics(df: pd.DataFrame) -> dict:
+    """
+    The Global Data Overview metrics as computed with pandas before the fused kernel.
+    """
+    metrics = {'total_violations': len(df)}
+    for name, col in [('most_common_violation', 'Violation_Type'), ('top_location', 'Location'),
+                      ('top_agency', 'Issuing_Agency'), ('common_payment', 'Payment_Method')]:
+        modes = df[col].mode() if col in df.columns else pd.Series([])
+        metrics[name] = modes.iloc[0] if not modes.empty else "N/A"
+    if 'Fine_Amount' in df.columns:
+        metrics['avg_fine'] = df['Fine_Amount'].mean()
+        metrics['max_fine'] = df['Fine_Amount'].max()
+        metrics['min_fine'] = df['Fine_Amount'].min()
+    else:
+        metrics['avg_fine'] = metrics['max_fine'] = metrics['min_fine'] = 0
+    return metrics
+
+
+def assert_metrics_equal(metrics: dict, expected: dict) -> None:
+    assert metrics.keys() == expected.keys()
+    for name, value in expected.items():
+        if isinstance(value, float) and math.isnan(value):
+            assert isinstance(metrics[name], float) and math.isnan(metrics[name]), name
+        else:
+            assert metrics[name] == value, name
+
+
+@pytest.fixture(scope="module")
+def loaded(tmp_path_factory) -> pd.DataFrame:
+    path = str(tmp_path_factory.mktemp("kernel") / "sample.csv")
+    shutil.copy(SAMPLE_DATASET, path)
+    cwd = os.getcwd()
+    os.chdir(os.path.dirname(path))
+    try:
+        return data_loader.load_dataset(path)
+    finally:
+        os.chdir(cwd)
+
+
+@pytest.fixture(params=["loaded", "raw"])
+def frame(request, loaded, sample_frame) -> pd.DataFrame:
+    # Categorical columns once loaded, text as read from the CSV
+    return loaded if request.param == "loaded" else sample_frame
+
+
+@pytest.mark.parametrize("rows", ["all", "range", "empty", "nan fines", "missing columns"])
+def test_rows_match_pandas(frame, rows):
+    df = {
+        "all": lambda: frame,
+        "range": lambda: frame[pd.to_datetime(frame['Date']).between("2023-03-01", "2023-03-31")],
+        "empty": lambda: frame.iloc[:0],
+        "nan fines": lambda: frame.assign(Fine_Amount=np.nan),
+        "missing columns": lambda: frame.drop(columns=['Fine_Amount', 'Location']),
+    }[rows]()
+    assert_metrics_equal(get_global_overview_metrics(df), pandas_overview_metrics(df))
+
+
+def test_cube_matches_pandas(loaded):
+    cube = data_cube.build_cube(loaded)
+    for start, end in [(None, None), ("2023-03-01", "2023-03-31"), ("2030-01-01", "2030-12-31")]:
+        rows = loaded if start is None else loaded[loaded['Date'].between(start, end)]
+        assert_metrics_equal(get_global_overview_metrics(cube.query(start, end)), pandas_overview_metrics(rows))
+
+
+def test_ties_and_missing_values():
+    df = pd.DataFrame({
+        'Violation_Type': ['b', 'a', 'b', 'a', None],
+        # Ties go to the first value in category order, or in sorted order for text
+        'Location': pd.Categorical([None, 'x', 'x', 'y', 'y'], categories=['y', 'x']),
+        'Issuing_Agency': [None] * 5,
+        'Fine_Amount': [np.nan, 10.0, np.nan, 2.5, 7.0],
+    })
+    assert_metrics_equal(get_global_overview_metrics(df), pandas_overview_metrics(df))
+    # Every metric of a column is read from one state
+    assert len(metric_kernel.accumulate(df, GLOBAL_OVERVIEW_METRICS)) == 4
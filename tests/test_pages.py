@@ -0,0 +1,46 @@
+import os
+import shutil
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+from core import sidebar
+from tests.conftest import REPO_ROOT, SAMPLE_DATASET
+
+
+class _MemoryStorage:
+    """
+    Stands in for the browser local storage component, which only answers inside a browser session.
+    """
+    items = {}
+
+    def getItem(self, key):
+        return self.items.get(key)
+
+    def setItem(self, key, value, key_=None, **kwargs):
+        self.items[key] = value
+
+
+@pytest.fixture
+def sample_workspace(workspace, monkeypatch):
+    os.makedirs("dataset")
+    shutil.copy(SAMPLE_DATASET, os.path.join("dataset", os.path.basename(SAMPLE_DATASET)))
+    monkeypatch.setattr(sidebar, "LocalStorage", _MemoryStorage)
+    return workspace
+
+
+def _run_page(name: str) -> AppTest:
+    app = AppTest.from_file(os.path.join(REPO_ROOT, "pages", name), default_timeout=120)
+    app.run()
+    assert not app.exception
+    return app
+
+
+def test_trend_analysis_categorical_heatmap(sample_workspace):
+    app = _run_page("03_Trend_Analysis.py")
+    next(button for button in app.button if button.label == "Generate Categorical Heatmap").click()
+    app.run()
+
+    assert not app.exception
+    assert not app.error
+    assert any("Count & Percentage Heatmap" in markdown.value for markdown in app.markdown)
@@ -0,0 +1,52 @@
+import os
+import shutil
+
+import pandas as pd
+import pytest
+
+from core import data_loader, query_backend, utils
+from tests.conftest import SAMPLE_DATASET
+
+pytest.importorskip("duckdb")
+
+# The five grouped tables of the Numerical Analysis page
+GROUPED_TABLES = [
+    utils.get_violation_stats_table,
+    utils.get_demographic_pivot,
+    utils.get_vehicle_analysis_table,
+    utils.get_environmental_stats,
+    utils.get_hourly_patterns_table,
+]
+
+
+@pytest.fixture
+def stored_dataset(workspace) -> str:
+    path = os.path.join("dataset", "sample.csv")
+    os.makedirs("dataset")
+    shutil.copy(SAMPLE_DATASET, path)
+    return path
+
+
+@pytest.mark.parametrize("table", GROUPED_TABLES, ids=lambda table: table.__name__)
+@pytest.mark.parametrize("date_range", [(None, None), ("2023-03-01", "2023-06-15")], ids=["all", "range"])
+def test_duckdb_tables_equal_pandas(stored_dataset, table, date_range):
+    df = data_loader.load_dataset(stored_dataset)
+    start_date, end_date = date_range
+    if start_date is not None:
+        df = df[df['Date'].between(pd.Timestamp(start_date), pd.Timestamp(end_date) + pd.Timedelta(days=1), inclusive="left")]
+    scan = query_backend.DatasetScan(stored_dataset, start_date, end_date)
+
+    expected = table(df)
+    result = table(scan)
+    assert not expected.empty
+    pd.testing.assert_frame_equal(result.reset_index(drop=True), expected.reset_index(drop=True))
+
+
+def test_duckdb_custom_grouping_equals_pandas(stored_dataset):
+    df = data_loader.load_dataset(stored_dataset)
+    scan = query_backend.DatasetScan(stored_dataset)
+    aggregations = [(col, func) for col in ['Fine_Amount', 'Driver_Age', 'Alcohol_Level'] for func in query_backend.AGGREGATION_FUNCTIONS]
+
+    expected = query_backend.group_aggregate(df, ['Location', 'Vehicle_Type'], aggregations)
+    result = query_backend.group_aggregate(scan, ['Location', 'Vehicle_Type'], aggregations)
+    pd.testing.assert_frame_equal(result, expected)
@@ -0,0 +1,93 @@
+import math
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core import data_loader, severity
+from core.severity import SEVERITY_COLUMN, SEVERITY_WEIGHTS
+from tests.conftest import SAMPLE_DATASET
+
+
+def _number(value) -> float:
+    # None for missing values and values that are not numbers
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(number) else number
+
+
+def row_severity(row: dict, weights: dict = SEVERITY_WEIGHTS) -> float:
+    """
+    The severity score of one row, factor by factor.
+    """
+    score = 0.0
+    score += (_number(row.get('Fine_Amount')) or 0.0) * weights['fine']
+    score += (_number(row.get('Penalty_Points')) or 0.0) * weights['penalty_points']
+    score += (_number(row.get('Alcohol_Level')) or 0.0) * weights['alcohol']
+    score += (_number(row.get('Previous_Violations')) or 0.0) * weights['previous_violations']
+    speed, limit = _number(row.get('Recorded_Speed')), _number(row.get('Speed_Limit'))
+    if speed is not None and limit is not None and speed > limit:
+        score += (speed - limit) * weights['overspeed']
+    if row.get('Helmet_Worn') == 'No':
+        score += weights['no_helmet']
+    if row.get('Seatbelt_Worn') == 'No':
+        score += weights['no_seatbelt']
+    if row.get('Traffic_Light_Status') == 'Red':
+        score += weights['red_light']
+    return score
+
+
+@pytest.fixture
+def rows() -> pd.DataFrame:
+    return pd.DataFrame({
+        'Fine_Amount': [1000, 2500, np.nan, 500, 0, 7000],
+        'Penalty_Points': pd.array([3, None, 1, 0, 6, 2], dtype="Int64"),
+        'Alcohol_Level': [0.0, 0.12, np.nan, 0.3, 0.0, 0.05],
+        'Previous_Violations': [0, 2, 5, 1, 0, 3],
+        'Recorded_Speed': [80, 40, 120, np.nan, 61, 100],
+        'Speed_Limit': [60, 50, np.nan, 40, 60, 100],
+        # Missing values and categories the score does not know
+        'Helmet_Worn': pd.Categorical(['No', 'Yes', None, 'No', 'Unknown', 'Yes']),
+        'Seatbelt_Worn': ['No', None, 'Yes', 'no', 'No', 'Maybe'],
+        'Traffic_Light_Status': pd.Categorical(['Red', 'Green', 'Yellow', None, 'Red', 'Flashing']),
+    })
+
+
+def _expected(df: pd.DataFrame, weights: dict = SEVERITY_WEIGHTS) -> np.ndarray:
+    records = df.astype(object).where(df.notna(), None).to_dict('records')
+    return np.array([row_severity(row, weights) for row in records])
+
+
+def test_matches_row_wise_score(rows):
+    np.testing.assert_allclose(severity.severity_scores(rows), _expected(rows), rtol=1e-12)
+
+
+def test_custom_weights(rows):
+    weights = {'red_light': 100.0, 'fine': 0.0}
+    np.testing.assert_allclose(severity.severity_scores(rows, weights), _expected(rows, severity.resolve_weights(weights)), rtol=1e-12)
+    with pytest.raises(ValueError, match="Unknown severity weights"):
+        severity.severity_scores(rows, {'speeding': 1.0})
+
+
+def test_missing_columns_and_text_numbers(rows):
+    partial = rows.drop(columns=['Speed_Limit', 'Helmet_Worn']).assign(Fine_Amount=['₹1,000', '2500', None, '500', 'n/a', '7000'])
+    np.testing.assert_allclose(severity.severity_scores(partial), _expected(partial), rtol=1e-12)
+    assert severity.severity_scores(rows.iloc[:0]).shape == (0,)
+
+
+def test_stored_score_is_used_for_default_weights(rows):
+    prepared = rows.assign(**{SEVERITY_COLUMN: -1.0})
+    assert (severity.get_severity_scores(prepared) == -1.0).all()
+    np.testing.assert_allclose(severity.get_severity_scores(prepared, {'alcohol': 0.0}),
+                               _expected(rows, severity.resolve_weights({'alcohol': 0.0})), rtol=1e-12)
+
+
+def test_prepared_dataset_score(workspace):
+    os.makedirs("dataset")
+    path = shutil.copy(SAMPLE_DATASET, os.path.join("dataset", "sample.csv"))
+    df = data_loader.load_dataset(path)
+    np.testing.assert_allclose(df[SEVERITY_COLUMN].to_numpy(), _expected(df[severity.SOURCE_COLUMNS]), rtol=1e-12)
@@ -0,0 +1,172 @@
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core import data_loader, sketches
+from tests.conftest import SAMPLE_DATASET
+
+
+def _hll(values) -> sketches.HyperLogLog:
+    sketch = sketches.HyperLogLog()
+    sketch.update(pd.Series(values))
+    return sketch
+
+
+def _kll(values) -> sketches.KLLSketch:
+    sketch = sketches.KLLSketch()
+    sketch.update(pd.Series(values))
+    return sketch
+
+
+def _zipf_values(size: int, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).zipf(1.3, size=size) % 5000
+
+
+# ==================================================================================
+@pytest.mark.parametrize("distinct", [10, 1_000, 20_000, 300_000])
+def test_hyperloglog_bounds(distinct):
+    values = np.random.default_rng(distinct).permutation(np.repeat(np.arange(distinct), 3))
+    estimate = _hll(values).estimate()
+    assert estimate.lower <= distinct <= estimate.upper
+
+
+def test_hyperloglog_counts_text_and_categoricals():
+    words = [f"value {i}" for i in range(2_000)] * 2 + [None]
+    categorical = pd.Series(pd.Categorical(words, categories=[f"value {i}" for i in range(3_000)]))
+    for values in [pd.Series(words), categorical]:
+        estimate = _hll(values).estimate()
+        assert estimate.lower <= 2_000 <= estimate.upper
+    # Unused categories are not counted
+    np.testing.assert_array_equal(_hll(categorical).registers, _hll(pd.Series(words)).registers)
+
+
+def test_hyperloglog_merge_equals_whole():
+    values = _zipf_values(100_000)
+    merged = _hll(values[:40_000])
+    merged.merge(_hll(values[40_000:]))
+    np.testing.assert_array_equal(merged.registers, _hll(values).registers)
+
+
+# ==================================================================================
+@pytest.mark.parametrize("distribution", ["normal", "exponential", "integers"])
+def test_kll_quantile_and_rank_bounds(distribution):
+    rng = np.random.default_rng(1)
+    values = {
+        "normal": rng.normal(50, 10, 300_000),
+        "exponential": rng.exponential(3, 300_000),
+        "integers": rng.integers(0, 20, 300_000).astype(float),
+    }[distribution]
+    sketch = sketches.KLLSketch()
+    # Fed in partitions, like a dataset
+    for part in np.array_split(values, 7):
+        sketch.update(pd.Series(part))
+    assert sketch.rank_error() > 0
+    ordered = np.sort(values)
+
+    for q in [0.01, 0.25, 0.5, 0.75, 0.99]:
+        exact = ordered[int(np.ceil(q * len(values))) - 1]
+        estimate = sketch.quantile(q)
+        assert estimate.lower <= exact <= estimate.upper, q
+        assert estimate.lower <= estimate.value <= estimate.upper
+
+    for value in np.quantile(values, [0.1, 0.5, 0.9]):
+        exact = np.searchsorted(ordered, value, side='left') / len(values)
+        estimate = sketch.rank(value)
+        assert estimate.lower <= exact <= estimate.upper
+
+
+def test_kll_is_exact_before_compaction():
+    values = np.random.default_rng(2).normal(size=150)
+    sketch = _kll(values)
+    assert sketch.rank_error() == 0.0
+    assert sketch.quantile(0.5) == (np.sort(values)[74],) * 3
+
+
+def test_kll_merge_matches_whole():
+    values = np.random.default_rng(3).lognormal(size=200_000)
+    merged = _kll(values[:150_000])
+    merged.merge(_kll(values[150_000:]))
+    whole = _kll(values)
+
+    assert (merged.count, merged.minimum, merged.maximum) == (whole.count, whole.minimum, whole.maximum)
+    ordered = np.sort(values)
+    for q in [0.25, 0.5, 0.75]:
+        exact = ordered[int(np.ceil(q * len(values))) - 1]
+        for sketch in [merged, whole]:
+            estimate = sketch.quantile(q)
+            assert estimate.lower <= exact <= estimate.upper, q
+        # Both estimates are within the rank error of the exact quantile
+        assert abs(np.searchsorted(ordered, merged.quantile(q).value) / len(values) - q) <= merged.rank_error()
+
+    # Below the compactor size nothing is compacted, the merge is exact
+    small = np.arange(120.0)
+    exact_merge = _kll(small[:70])
+    exact_merge.merge(_kll(small[70:]))
+    assert [exact_merge.quantile(q) for q in [0.1, 0.5, 0.9]] == [_kll(small).quantile(q) for q in [0.1, 0.5, 0.9]]
+
+
+# ==================================================================================
+def _assert_space_saving_bounds(sketch: sketches.SpaceSaving, values: np.ndarray) -> None:
+    exact = pd.Series(values).value_counts()
+    assert sketch.total == len(values)
+    top = sketch.top()
+    assert len(top) == min(sketch.capacity, len(exact))
+    for value, estimate in top:
+        assert estimate.lower <= exact[value] <= estimate.upper, value
+    # A value that is not monitored occurs at most `floor` times
+    unmonitored = exact.drop([value for value, _ in top])
+    assert unmonitored.empty or unmonitored.max() <= sketch.floor
+
+
+def test_space_saving_bounds():
+    values = _zipf_values(200_000)
+    sketch = sketches.SpaceSaving()
+    for part in np.array_split(values, 5):
+        sketch.update(pd.Series(part))
+    _assert_space_saving_bounds(sketch, values)
+    # The most frequent values of a skewed column are found
+    assert [value for value, _ in sketch.top(5)] == pd.Series(values).value_counts().index[:5].tolist()
+
+
+def test_space_saving_merge_matches_whole():
+    # Fewer distinct values than counters: both are exact
+    values = np.random.default_rng(4).integers(0, 40, 50_000)
+    merged = sketches.SpaceSaving()
+    merged.update(pd.Series(values[:20_000]))
+    other = sketches.SpaceSaving()
+    other.update(pd.Series(values[20_000:]))
+    merged.merge(other)
+    whole = sketches.SpaceSaving()
+    whole.update(pd.Series(values))
+    assert dict(merged.top()) == dict(whole.top())
+    assert merged.floor == whole.floor == 0
+
+    values = _zipf_values(100_000, seed=5)
+    merged = sketches.SpaceSaving()
+    for part in np.array_split(values, 4):
+        part_sketch = sketches.SpaceSaving()
+        part_sketch.update(pd.Series(part))
+        merged.merge(part_sketch)
+    _assert_space_saving_bounds(merged, values)
+
+
+# ==================================================================================
+def test_sketch_dataset_merges_partitions(workspace):
+    path = os.path.join("dataset", "sample.csv")
+    os.makedirs("dataset")
+    shutil.copy(SAMPLE_DATASET, path)
+    df = data_loader.load_dataset(path)
+    assert len(data_loader.get_partition_files(path)) > 1
+
+    merged = sketches.sketch_dataset(path)
+    whole = sketches.sketch_frame(df)
+    assert merged.keys() == whole.keys()
+    for col, sketch in whole.items():
+        assert (merged[col].rows, merged[col].missing) == (sketch.rows, sketch.missing), col
+        np.testing.assert_array_equal(merged[col].distinct.registers, sketch.distinct.registers, err_msg=col)
+        assert merged[col].top_values.total == sketch.top_values.total, col
+        if sketch.numbers is not None:
+            assert merged[col].numbers.count == sketch.numbers.count, col